@@ -8,6 +8,7 @@ from alembic import context
 
 # Import your models here for autogenerate
 from app.models import *  # noqa
+from app.models import SEARCH_COLUMNS
 from app.core.config import settings
 from sqlmodel import SQLModel
 
@@ -31,6 +32,16 @@ config.set_main_option("sqlalchemy.url", str(settings.SQLALCHEMY_DATABASE_URI))
 # target_metadata = mymodel.Base.metadata
 target_metadata = SQLModel.metadata
 
+
+
+def include_name(name, type_, parent_names):
+    # SQLite full-text search tables (and their shadow tables) are created by
+    # DDL events on the bag and script tables, not declared in the metadata
+    if type_ == "table":
+        return not any(name.startswith(f"{table}_fts") for table in SEARCH_COLUMNS)
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -53,6 +64,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -76,7 +88,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_name=include_name
         )
 
         with context.begin_transaction():
@@ -0,0 +1,44 @@
+"""Add background import jobs
+
+Revision ID: 1af8d2e907bc
+Revises: c47e2a9d5b18
+Create Date: 2026-10-19 03:26:40.168750
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '1af8d2e907bc'
+down_revision = 'c47e2a9d5b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('importjob',
+    sa.Column('filename', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'running', 'completed', 'failed', name='importjobstatus'), nullable=False),
+    sa.Column('rows_processed', sa.Integer(), nullable=False),
+    sa.Column('rows_imported', sa.Integer(), nullable=False),
+    sa.Column('rows_failed', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.JSON(), nullable=False),
+    sa.Column('error', sqlmodel.sql.sqltypes.AutoString(length=1000), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('file_ext', sqlmodel.sql.sqltypes.AutoString(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_importjob_status', 'importjob', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_importjob_status', table_name='importjob')
+    op.drop_table('importjob')
+    sa.Enum(name='importjobstatus').drop(op.get_bind(), checkfirst=True)
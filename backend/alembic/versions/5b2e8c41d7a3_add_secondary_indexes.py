@@ -0,0 +1,35 @@
+"""Add secondary indexes on foreign keys and time columns
+
+Revision ID: 5b2e8c41d7a3
+Revises: 19637acabf9d
+Create Date: 2026-10-19 10:12:44.318902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e8c41d7a3'
+down_revision = '19637acabf9d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_bag_account_id', 'bag', ['account_id'], unique=False)
+    op.create_index('ix_script_bag_id_script_type', 'script', ['bag_id', 'script_type'], unique=False)
+    op.create_index('ix_phrasemap_account_id_active', 'phrasemap', ['account_id', 'active'], unique=False)
+    op.create_index('ix_feedback_script_id_live_event_ts', 'feedback', ['script_id', 'live_event_ts'], unique=False)
+    op.create_index('ix_feedback_live_event_ts', 'feedback', ['live_event_ts'], unique=False)
+    op.create_index('ix_feedback_created_at', 'feedback', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_feedback_created_at', table_name='feedback')
+    op.drop_index('ix_feedback_live_event_ts', table_name='feedback')
+    op.drop_index('ix_feedback_script_id_live_event_ts', table_name='feedback')
+    op.drop_index('ix_phrasemap_account_id_active', table_name='phrasemap')
+    op.drop_index('ix_script_bag_id_script_type', table_name='script')
+    op.drop_index('ix_bag_account_id', table_name='bag')
@@ -0,0 +1,61 @@
+"""Add full-text search over bags and scripts
+
+Revision ID: 5c2e40e8c7fe
+Revises: b0fbe9ee4b89
+Create Date: 2026-10-19 11:02:47.390516
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e40e8c7fe'
+down_revision = 'b0fbe9ee4b89'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = {'bag': ('brand', 'model', 'color', 'details'), 'script': ('content',)}
+
+
+def sqlite_statements(table):
+    columns = SEARCH_COLUMNS[table]
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete = f"INSERT INTO {table}_fts({table}_fts, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f'INSERT INTO {table}_fts(rowid, {names}) VALUES (new.id, {new});'
+    return [
+        f"CREATE VIRTUAL TABLE {table}_fts USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END',
+        f'CREATE TRIGGER {table}_fts_update AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END',
+        # Index the rows that already exist
+        f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')",
+    ]
+
+
+def postgresql_vector(table):
+    text = " || ' ' || ".join(f"coalesce({column}, '')" for column in SEARCH_COLUMNS[table])
+    return f"to_tsvector('simple', {text})"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table in SEARCH_COLUMNS:
+        if dialect == 'sqlite':
+            for statement in sqlite_statements(table):
+                op.execute(statement)
+        elif dialect == 'postgresql':
+            op.execute(f'CREATE INDEX ix_{table}_search ON {table} USING gin ({postgresql_vector(table)})')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in SEARCH_COLUMNS:
+        if dialect == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f'DROP TRIGGER {table}_fts_{trigger}')
+            op.execute(f'DROP TABLE {table}_fts')
+        elif dialect == 'postgresql':
+            op.execute(f'DROP INDEX ix_{table}_search')
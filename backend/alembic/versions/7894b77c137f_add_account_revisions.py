@@ -0,0 +1,24 @@
+"""Add account revisions
+
+Revision ID: 7894b77c137f
+Revises: 5c2e40e8c7fe
+Create Date: 2026-10-19 04:11:26.181720
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7894b77c137f'
+down_revision = '5c2e40e8c7fe'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('account', sa.Column('revision', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('account', 'revision')
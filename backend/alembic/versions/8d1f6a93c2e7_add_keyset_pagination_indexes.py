@@ -0,0 +1,36 @@
+"""Add (timestamp, id) indexes for keyset pagination
+
+Revision ID: 8d1f6a93c2e7
+Revises: 5b2e8c41d7a3
+Create Date: 2026-10-19 13:41:08.527716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '8d1f6a93c2e7'
+down_revision = '5b2e8c41d7a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Composite replaces the account_id-only index (same leading column)
+    op.drop_index('ix_bag_account_id', table_name='bag')
+    op.create_index('ix_bag_account_id_created_at_id', 'bag', ['account_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_bag_created_at_id', 'bag', ['created_at', 'id'], unique=False)
+    op.create_index('ix_script_created_at_id', 'script', ['created_at', 'id'], unique=False)
+    op.drop_index('ix_feedback_live_event_ts', table_name='feedback')
+    op.create_index('ix_feedback_live_event_ts_id', 'feedback', ['live_event_ts', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_feedback_live_event_ts_id', table_name='feedback')
+    op.create_index('ix_feedback_live_event_ts', 'feedback', ['live_event_ts'], unique=False)
+    op.drop_index('ix_script_created_at_id', table_name='script')
+    op.drop_index('ix_bag_created_at_id', table_name='bag')
+    op.drop_index('ix_bag_account_id_created_at_id', table_name='bag')
+    op.create_index('ix_bag_account_id', 'bag', ['account_id'], unique=False)
@@ -0,0 +1,44 @@
+"""Cascade script and feedback deletes
+
+Revision ID: b0fbe9ee4b89
+Revises: ef1717accaaf
+Create Date: 2026-10-19 09:12:04.118263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b0fbe9ee4b89'
+down_revision = 'ef1717accaaf'
+branch_labels = None
+depends_on = None
+
+# SQLite foreign keys are unnamed; batch mode names them by this convention
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+FOREIGN_KEYS = [('script', 'bag_id', 'bag'), ('feedback', 'script_id', 'script')]
+
+
+def replace_foreign_key(table, column, referred_table, ondelete):
+    # Constraints can't be altered in place (SQLite rebuilds the table)
+    existing = next(
+        foreign_key for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys(table)
+        if foreign_key['constrained_columns'] == [column]
+    )
+    name = existing['name'] or NAMING_CONVENTION['fk'] % {
+        'table_name': table, 'column_0_name': column, 'referred_table_name': referred_table
+    }
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(f'{table}_{column}_fkey', referred_table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    for table, column, referred_table in FOREIGN_KEYS:
+        replace_foreign_key(table, column, referred_table, 'CASCADE')
+
+
+def downgrade():
+    for table, column, referred_table in reversed(FOREIGN_KEYS):
+        replace_foreign_key(table, column, referred_table, None)
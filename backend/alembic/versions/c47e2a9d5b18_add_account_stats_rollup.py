@@ -0,0 +1,63 @@
+"""Add per-account stats rollup table
+
+Revision ID: c47e2a9d5b18
+Revises: 8d1f6a93c2e7
+Create Date: 2026-10-19 15:02:44.183520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e2a9d5b18'
+down_revision = '8d1f6a93c2e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    accountstat = op.create_table('accountstat',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.Enum('brand', 'script_type', name='statdimension'), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('used_count', sa.Integer(), nullable=False),
+    sa.Column('like_count', sa.Integer(), nullable=False),
+    sa.Column('total_value', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('account_id', 'dimension', 'name')
+    )
+
+    # Backfill from existing rows (the same aggregation as app.rebuild_stats)
+    bag = sa.table('bag', sa.column('id'), sa.column('account_id'), sa.column('brand'), sa.column('price'))
+    script = sa.table(
+        'script', sa.column('id'), sa.column('bag_id'), sa.column('script_type'),
+        sa.column('used_count'), sa.column('like_count')
+    )
+    columns = ['account_id', 'dimension', 'name', 'item_count', 'used_count', 'like_count', 'total_value']
+    dimension = accountstat.c.dimension.type
+    op.execute(accountstat.insert().from_select(columns, sa.select(
+        bag.c.account_id,
+        sa.literal('brand', dimension),
+        bag.c.brand,
+        sa.func.count(bag.c.id),
+        sa.literal(0),
+        sa.literal(0),
+        sa.func.coalesce(sa.func.sum(bag.c.price), 0),
+    ).group_by(bag.c.account_id, bag.c.brand)))
+    op.execute(accountstat.insert().from_select(columns, sa.select(
+        bag.c.account_id,
+        sa.literal('script_type', dimension),
+        sa.cast(script.c.script_type, sa.String),
+        sa.func.count(script.c.id),
+        sa.func.coalesce(sa.func.sum(script.c.used_count), 0),
+        sa.func.coalesce(sa.func.sum(script.c.like_count), 0),
+        sa.literal(0),
+    ).select_from(script.join(bag, bag.c.id == script.c.bag_id)).group_by(bag.c.account_id, script.c.script_type)))
+
+
+def downgrade():
+    op.drop_table('accountstat')
+    sa.Enum(name='statdimension').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,55 @@
+"""Add bag import keys for idempotent imports
+
+Revision ID: ef1717accaaf
+Revises: 1af8d2e907bc
+Create Date: 2026-10-19 03:40:38.561547
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ef1717accaaf'
+down_revision = '1af8d2e907bc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('bag', sa.Column('import_key', sa.BigInteger(), nullable=True))
+    op.create_index('ix_bag_import_key_account_id', 'bag', ['import_key', 'account_id'], unique=False)
+    op.add_column('importjob', sa.Column('rows_inserted', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('importjob', sa.Column('rows_updated', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('importjob', sa.Column('rows_unchanged', sa.Integer(), nullable=False, server_default='0'))
+
+    # Key existing bags (same hash as app.services.bag_import.bag_import_key)
+    bag = sa.table(
+        'bag', sa.column('id'), sa.column('brand'), sa.column('model'), sa.column('color'),
+        sa.column('details'), sa.column('import_key')
+    )
+    connection = op.get_bind()
+    keys = [
+        {
+            'bag_id': row.id,
+            'key': int.from_bytes(hashlib.blake2b("\x1f".join(
+                str(value) if value else "" for value in (row.brand, row.model, row.color, row.details)
+            ).encode(), digest_size=8).digest(), "big", signed=True)
+        }
+        for row in connection.execute(sa.select(bag.c.id, bag.c.brand, bag.c.model, bag.c.color, bag.c.details))
+    ]
+    if keys:
+        connection.execute(
+            bag.update().where(bag.c.id == sa.bindparam('bag_id')).values(import_key=sa.bindparam('key')),
+            keys
+        )
+
+
+def downgrade():
+    op.drop_column('importjob', 'rows_unchanged')
+    op.drop_column('importjob', 'rows_updated')
+    op.drop_column('importjob', 'rows_inserted')
+    op.drop_index('ix_bag_import_key_account_id', table_name='bag')
+    op.drop_column('bag', 'import_key')
@@ -1,9 +1,12 @@
 from typing import Annotated, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlmodel import Session, select, func
 from app.core.deps import get_db, get_current_user
-from app.models import Account, Bag, Script, Feedback
+from app.models import Account, Bag, StatDimension
+from app.services.stats import get_account_stats
+import csv
+import io
 import json
 
 router = APIRouter()
@@ -18,34 +21,18 @@ def get_analytics(
     Get comprehensive analytics data for the dashboard.
     Returns overview metrics, trends, top performers, and engagement data.
     """
-    # Parse date range
-    days_map = {"7d": 7, "30d": 30, "90d": 90, "1y": 365}
-    days = days_map.get(date_range, 30)
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Get bags for current user
-    bags_stmt = select(Bag).where(Bag.account_id == current_user.id)
-    bags = session.exec(bags_stmt).all()
-    
-    # Get scripts
-    scripts_stmt = select(Script).join(Bag).where(Bag.account_id == current_user.id)
-    scripts = session.exec(scripts_stmt).all()
-    
-    # Get feedback
-    feedback_stmt = select(Feedback).join(Script).join(Bag).where(Bag.account_id == current_user.id)
-    feedback_stmt = feedback_stmt.where(Feedback.created_at >= start_date)
-    feedbacks = session.exec(feedback_stmt).all()
+    # Counters come from the account's rollup rows
+    stats = get_account_stats(current_user.id, session)
+    brands = stats[StatDimension.brand]
+    script_types = stats[StatDimension.script_type]
     
     # Calculate overview metrics
-    total_bags = len(bags)
-    total_scripts = len(scripts)
-    total_revenue = sum(bag.price or 0 for bag in bags)
+    total_bags = sum(row.item_count for row in brands.values())
+    total_revenue = sum(row.total_value for row in brands.values())
     avg_price = total_revenue / total_bags if total_bags > 0 else 0
     
     # Calculate engagement metrics
-    total_usage = sum(script.used_count for script in scripts)
-    total_likes = sum(script.like_count for script in scripts)
-    avg_rating = sum(f.rating for f in feedbacks) / len(feedbacks) if feedbacks else 0
+    total_likes = sum(row.like_count for row in script_types.values())
     
     # Mock some data for demonstration (in production, this would come from real analytics)
     # In a real implementation, you'd track actual sales and viewer data
@@ -67,32 +54,20 @@ def get_analytics(
     trends.reverse()
     
     # Top performers by brand
-    brand_performance = {}
-    for bag in bags:
-        if bag.brand not in brand_performance:
-            brand_performance[bag.brand] = {
-                "revenue": 0,
-                "items_sold": 0,
-                "total_price": 0
-            }
-        brand_performance[bag.brand]["revenue"] += bag.price or 0
-        brand_performance[bag.brand]["items_sold"] += 1
-        brand_performance[bag.brand]["total_price"] += bag.price or 0
-    
-    # Format brand performance
     brand_perf_list = []
-    for brand, data in brand_performance.items():
+    for brand, row in brands.items():
         brand_perf_list.append({
             "brand": brand,
-            "revenue": data["revenue"],
-            "items_sold": data["items_sold"],
-            "avg_price": data["total_price"] / data["items_sold"] if data["items_sold"] > 0 else 0,
+            "revenue": row.total_value,
+            "items_sold": row.item_count,
+            "avg_price": row.total_value / row.item_count,
             "conversion_rate": mock_conversion_rate * (1 + (0.1 if brand in ["Hermès", "Chanel"] else -0.1))
         })
     
     # Top performing items (mock data enhanced with real bag data)
+    bags = session.exec(select(Bag).where(Bag.account_id == current_user.id).limit(5)).all()
     top_performers = []
-    for i, bag in enumerate(bags[:5]):
+    for i, bag in enumerate(bags):
         top_performers.append({
             "name": f"{bag.brand} {bag.model}",
             "brand": bag.brand,
@@ -134,38 +109,24 @@ def get_performance_metrics(
     """
     Get detailed performance metrics for scripts and bags.
     """
-    # Get scripts with their bags
-    scripts_stmt = select(Script).join(Bag).where(Bag.account_id == current_user.id)
-    scripts = session.exec(scripts_stmt).all()
+    script_types = get_account_stats(current_user.id, session)[StatDimension.script_type]
     
-    # Calculate metrics by script type
+    # Metrics by script type
     script_metrics = {}
-    for script in scripts:
-        if script.script_type not in script_metrics:
-            script_metrics[script.script_type] = {
-                "count": 0,
-                "total_usage": 0,
-                "total_likes": 0,
-                "avg_usage": 0,
-                "avg_likes": 0
-            }
-        
-        metrics = script_metrics[script.script_type]
-        metrics["count"] += 1
-        metrics["total_usage"] += script.used_count
-        metrics["total_likes"] += script.like_count
-    
-    # Calculate averages
-    for script_type, metrics in script_metrics.items():
-        if metrics["count"] > 0:
-            metrics["avg_usage"] = metrics["total_usage"] / metrics["count"]
-            metrics["avg_likes"] = metrics["total_likes"] / metrics["count"]
+    for script_type, row in script_types.items():
+        script_metrics[script_type] = {
+            "count": row.item_count,
+            "total_usage": row.used_count,
+            "total_likes": row.like_count,
+            "avg_usage": row.used_count / row.item_count,
+            "avg_likes": row.like_count / row.item_count
+        }
     
     return {
         "script_performance": script_metrics,
-        "total_scripts": len(scripts),
-        "total_usage": sum(s.used_count for s in scripts),
-        "total_likes": sum(s.like_count for s in scripts)
+        "total_scripts": sum(row.item_count for row in script_types.values()),
+        "total_usage": sum(row.used_count for row in script_types.values()),
+        "total_likes": sum(row.like_count for row in script_types.values())
     }
 
 
@@ -175,32 +136,30 @@ def export_analytics(
     current_user: Annotated[Account, Depends(get_current_user)],
     format: str = Query("json", description="Export format: json or csv"),
     date_range: str = Query("30d", description="Date range: 7d, 30d, 90d, 1y")
-) -> dict:
+):
     """
-    Export analytics data in various formats.
+    Export the analytics overview as JSON or CSV.
     """
-    # Get analytics data by calling the logic directly
-    days_map = {"7d": 7, "30d": 30, "90d": 90, "1y": 365}
-    days = days_map.get(date_range, 30)
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Get data for current user
-    bags_stmt = select(Bag).where(Bag.account_id == current_user.id)
-    bags = session.exec(bags_stmt).all()
+    brands = get_account_stats(current_user.id, session)[StatDimension.brand]
     
     analytics_data = {
         "overview": {
-            "total_bags": len(bags),
-            "total_revenue": sum(bag.price or 0 for bag in bags),
+            "total_bags": sum(row.item_count for row in brands.values()),
+            "total_revenue": sum(row.total_value for row in brands.values()),
             "date_range": date_range
         }
     }
     
     if format == "csv":
-        # In a real implementation, this would return a CSV file
-        return {
-            "message": "CSV export would be implemented here",
-            "data_preview": analytics_data["overview"]
-        }
+        # Raw rows are exported by /exports/{dataset}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["metric", "value"])
+        writer.writerows(analytics_data["overview"].items())
+        return Response(
+            buffer.getvalue(),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=analytics.csv"}
+        )
     
     return analytics_data 
\ No newline at end of file
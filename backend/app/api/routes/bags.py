@@ -1,18 +1,37 @@
 from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlmodel import Session, func, select
 from pydantic import BaseModel
 
 from app.core.deps import get_db, get_current_admin_user, get_current_streamer_user, get_account_access_filter
-from app.models import Account, Bag, BagRead, BagCreateUser, Script, ScriptRead, ScriptCreate, ScriptType
+from app.core.etags import check_not_modified
+from app.core.executors import run_blocking
+from app.core.pagination import finish_page, keyset_page
+from app.core.responses import read_columns, trusted_json_response
+from app.models import Account, Bag, BagRead, BagCreateUser, Script, ScriptRead, ScriptCreate
+from app.services.bag_delete import delete_bags
+from app.services.bag_import import bulk_import_bags
+from app.services.search import bag_search_condition
+from app.services.default_scripts import default_script_reads
+from app.services.stats import account_revision, bag_revision, compute_bag_stats
+from app.services.websocket_manager import manager
 
 router = APIRouter()
 
+VALID_CONDITIONS = ['excellent', 'very good', 'good', 'fair']
+
+
 class BagImportRequest(BaseModel):
     bags: List[dict]
 
 
+class BagBulkDeleteRequest(BaseModel):
+    bag_ids: Optional[List[int]] = None
+    brand: Optional[str] = None
+    condition: Optional[str] = None
+
+
 @router.post("/bags", response_model=BagRead)
 def create_bag(
     bag_data: BagCreateUser,
@@ -22,6 +41,7 @@ def create_bag(
     """
     Create a new bag with name, brand, color, details, price.
     Converts 'name' field to 'model' for database storage.
+    Its default scripts are listed until it has scripts of its own.
     """
     # Convert user-friendly input to database model
     bag = Bag(
@@ -39,51 +59,34 @@ def create_bag(
     session.commit()
     session.refresh(bag)
     
-    # Auto-generate basic scripts for the new bag
-    script_templates = [
-        (ScriptType.hook, f"Check out this amazing {bag_data.brand} {bag_data.name}!"),
-        (ScriptType.look, f"Look at this beautiful {bag_data.color} color and exquisite craftsmanship!"),
-        (ScriptType.story, f"This {bag_data.brand} piece represents timeless luxury and style."),
-        (ScriptType.value, f"High-quality {bag_data.condition} condition - exceptional value!"),
-        (ScriptType.cta, "Don't miss out on this incredible piece - grab it now!")
-    ]
-    
-    # Create scripts with details if provided
-    if bag_data.details:
-        script_templates[1] = (ScriptType.look, f"Look at these details: {bag_data.details[:100]}...")
-        script_templates[2] = (ScriptType.story, f"{bag_data.details[:150]}...")
-    
-    if bag_data.price:
-        script_templates[3] = (ScriptType.value, f"Amazing value at ${bag_data.price} - {bag_data.condition} condition!")
-    
-    for script_type, content in script_templates:
-        script = Script(
-            content=content,
-            script_type=script_type,
-            bag_id=bag.id
-        )
-        session.add(script)
-    
-    session.commit()
-    
+    # Default scripts are rendered on demand (app.services.default_scripts)
     return bag
 
 
 @router.get("/bags", response_model=List[BagRead])
 def get_bags(
+    request: Request,
+    response: Response,
     session: Annotated[Session, Depends(get_db)],
     current_user: Annotated[Account, Depends(get_current_admin_user)],
     account_filter: Annotated[Optional[int], Depends(get_account_access_filter)],
-    skip: int = Query(0, ge=0, description="Number of bags to skip"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Number of bags to skip (use cursor instead)"),
     limit: int = Query(100, ge=1, le=1000, description="Number of bags to return"),
     brand: Optional[str] = Query(None, description="Filter by brand"),
-    condition: Optional[str] = Query(None, description="Filter by condition")
+    condition: Optional[str] = Query(None, description="Filter by condition"),
+    q: Optional[str] = Query(None, description="Full-text search over brand, model, color and details")
 ) -> List[BagRead]:
     """
-    Get all bags with optional filtering.
+    Get all bags with optional filtering, oldest first.
     Admin users can see all bags, streamers only their own.
+    Paginated by cursor: the next page's cursor is in the X-Next-Cursor header.
+    Answers 304 to an If-None-Match naming the current ETag.
     """
-    statement = select(Bag)
+    check_not_modified(request, response, account_revision(account_filter, session))
+    
+    # Only BagRead's columns, encoded without re-validation
+    statement = select(*read_columns(BagRead, Bag))
     
     # Apply account filter for non-admin users
     if account_filter is not None:
@@ -94,17 +97,23 @@ def get_bags(
         statement = statement.where(Bag.brand.ilike(f"%{brand}%"))
     if condition:
         statement = statement.where(Bag.condition.ilike(f"%{condition}%"))
+    if q:
+        statement = statement.where(bag_search_condition(q, session.get_bind().dialect.name))
     
     # Apply pagination
-    statement = statement.offset(skip).limit(limit)
+    statement = keyset_page(statement, Bag.created_at, Bag.id, cursor, limit)
+    if skip and not cursor:
+        statement = statement.offset(skip)
     
-    bags = session.exec(statement).all()
-    return bags
+    bags = finish_page(session.exec(statement).all(), limit, response)
+    return trusted_json_response([bag._asdict() for bag in bags], response)
 
 
 @router.get("/bag/{bag_id}/scripts", response_model=List[ScriptRead])
 def get_bag_scripts(
     bag_id: int,
+    request: Request,
+    response: Response,
     session: Annotated[Session, Depends(get_db)],
     current_user: Annotated[Account, Depends(get_current_streamer_user)],
     account_filter: Annotated[Optional[int], Depends(get_account_access_filter)]
@@ -112,45 +121,69 @@ def get_bag_scripts(
     """
     Get all scripts for a specific bag.
     Both admin and streamer users can access this endpoint.
+    A bag without scripts lists its default scripts (id null, is_default true).
+    Answers 304 to an If-None-Match naming the current ETag.
     """
     # First verify the bag exists and user has access
-    bag_statement = select(Bag).where(Bag.id == bag_id)
-    if account_filter is not None:
-        bag_statement = bag_statement.where(Bag.account_id == account_filter)
-    
-    bag = session.exec(bag_statement).first()
+    revision = bag_revision(bag_id, account_filter, session)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Bag not found")
+    check_not_modified(request, response, revision)
+    bag = session.get(Bag, bag_id)
     if not bag:
         raise HTTPException(status_code=404, detail="Bag not found")
     
-    # Get scripts for the bag
+    # Get scripts for the bag, or its default scripts if it has none
     scripts_statement = select(Script).where(Script.bag_id == bag_id)
     scripts = session.exec(scripts_statement).all()
     
-    return scripts
+    return scripts or default_script_reads(bag)
 
 
 @router.get("/bag/{bag_id}")
 def get_bag_details(
     bag_id: int,
+    request: Request,
+    response: Response,
     session: Annotated[Session, Depends(get_db)],
     current_user: Annotated[Account, Depends(get_current_streamer_user)],
     account_filter: Annotated[Optional[int], Depends(get_account_access_filter)]
 ) -> dict:
     """
     Get detailed information about a bag including all its scripts.
+    Answers 304 to an If-None-Match naming the current ETag.
     """
-    # Verify bag exists and user has access
-    bag_statement = select(Bag).where(Bag.id == bag_id)
+    revision = bag_revision(bag_id, account_filter, session)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Bag not found")
+    check_not_modified(request, response, revision)
+    
+    # Verify bag exists and user has access; script totals are summed in the same query
+    bag_statement = (
+        select(
+            Bag,
+            func.count(Script.id),
+            func.coalesce(func.sum(Script.used_count), 0),
+            func.coalesce(func.sum(Script.like_count), 0),
+        )
+        .outerjoin(Script)
+        .where(Bag.id == bag_id)
+        .group_by(Bag.id)
+    )
     if account_filter is not None:
         bag_statement = bag_statement.where(Bag.account_id == account_filter)
     
-    bag = session.exec(bag_statement).first()
-    if not bag:
+    row = session.exec(bag_statement).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Bag not found")
+    bag, script_count, total_usage, total_likes = row
     
-    # Get scripts grouped by type
+    # Get scripts grouped by type (the default scripts if the bag has none)
     scripts_statement = select(Script).where(Script.bag_id == bag_id)
     scripts = session.exec(scripts_statement).all()
+    if not scripts:
+        scripts = default_script_reads(bag)
+        script_count = len(scripts)
     
     scripts_by_type = {}
     for script in scripts:
@@ -162,7 +195,8 @@ def get_bag_details(
             "used_count": script.used_count,
             "like_count": script.like_count,
             "created_at": script.created_at,
-            "updated_at": script.updated_at
+            "updated_at": script.updated_at,
+            "is_default": script.id is None
         })
     
     return {
@@ -177,86 +211,58 @@ def get_bag_details(
             "updated_at": bag.updated_at
         },
         "scripts": scripts_by_type,
-        "script_count": len(scripts),
-        "total_usage": sum(script.used_count for script in scripts),
-        "total_likes": sum(script.like_count for script in scripts)
+        "script_count": script_count,
+        "total_usage": total_usage,
+        "total_likes": total_likes
     }
 
 
-@router.post("/bags/import-csv")
+@router.post("/bags/import")
 def import_bags_csv(
     request: BagImportRequest,
     session: Annotated[Session, Depends(get_db)],
     current_user: Annotated[Account, Depends(get_current_streamer_user)]
 ) -> dict:
     """
-    Import multiple bags from CSV/Excel data.
-    Frontend sends array of bag objects after parsing CSV/Excel file.
+    Import multiple bags from CSV/Excel data already parsed into bag objects.
+    Files are uploaded to /bags/import-csv (app.api.routes.csv_upload).
     """
-    imported_count = 0
-    errors = []
-    
-    for idx, bag_data in enumerate(request.bags):
-        try:
-            # Map frontend field 'name' to backend field 'model'
-            bag = Bag(
-                brand=bag_data.get('brand', '').strip(),
-                model=bag_data.get('name', '').strip(),  # Map 'name' to 'model'
-                color=bag_data.get('color', '').strip(),
-                condition=bag_data.get('condition', 'good').strip().lower(),
-                details=bag_data.get('details', '').strip(),
-                price=float(bag_data.get('price', 0)) if bag_data.get('price') else None,
-                authenticity_verified=str(bag_data.get('authenticity_verified', '')).lower() == 'true',
-                account_id=current_user.id
-            )
-            
-            # Validate required fields
-            if not bag.brand or not bag.model:
-                errors.append(f"Row {idx + 1}: Missing required fields (brand and name)")
-                continue
-            
-            # Validate condition
-            valid_conditions = ['excellent', 'very good', 'good', 'fair']
-            if bag.condition not in valid_conditions:
-                bag.condition = 'good'  # Default to 'good' if invalid
-            
-            session.add(bag)
-            imported_count += 1
-            
-            # Auto-generate basic scripts for the imported bag
-            script_templates = [
-                (ScriptType.hook, f"Check out this amazing {bag.brand} {bag.model}!"),
-                (ScriptType.look, f"Look at this beautiful {bag.color} color!"),
-                (ScriptType.story, f"This {bag.brand} piece represents timeless luxury."),
-                (ScriptType.value, f"Exceptional value in {bag.condition} condition!"),
-                (ScriptType.cta, "Don't miss out - grab it now!")
-            ]
-            
-            for script_type, content in script_templates:
-                script = Script(
-                    content=content,
-                    script_type=script_type,
-                    bag_id=bag.id
-                )
-                session.add(script)
-                
-        except Exception as e:
-            errors.append(f"Row {idx + 1}: {str(e)}")
-            continue
-    
-    # Commit all valid bags
-    if imported_count > 0:
-        session.commit()
+    result = bulk_import_bags(
+        ((idx + 1, bag_data) for idx, bag_data in enumerate(request.bags)),
+        parse_import_row,
+        current_user.id,
+        session
+    )
+    imported_count = result["imported"]
     
     return {
         "imported_count": imported_count,
-        "total_rows": len(request.bags),
-        "errors": errors,
+        "inserted": result["inserted"],
+        "updated": result["updated"],
+        "unchanged": result["unchanged"],
+        "total_rows": result["total_rows"],
+        "errors": result["errors"],
         "success": imported_count > 0,
         "message": f"Successfully imported {imported_count} bags" if imported_count > 0 else "No bags imported"
     }
 
 
+def parse_import_row(bag_data: dict) -> dict:
+    """
+    Map a frontend import row to Bag values ('name' is the bag's model).
+    """
+    condition = str(bag_data.get('condition') or 'good').strip().lower()
+    return {
+        "brand": str(bag_data.get('brand') or '').strip(),
+        "model": str(bag_data.get('name') or '').strip(),
+        "color": str(bag_data.get('color') or '').strip(),
+        "condition": condition if condition in VALID_CONDITIONS else 'good',  # Default to 'good' if invalid
+        "details": str(bag_data.get('details') or '').strip(),
+        "price": float(bag_data['price']) if bag_data.get('price') else None,
+        "authenticity_verified": str(bag_data.get('authenticity_verified', '')).lower() == 'true'
+    }
+
+
 @router.put("/bags/{bag_id}", response_model=BagRead)
 def update_bag(
     bag_id: int,
@@ -294,37 +300,64 @@ def update_bag(
 
 
 @router.delete("/bags/{bag_id}")
-def delete_bag(
+async def delete_bag(
     bag_id: int,
     session: Annotated[Session, Depends(get_db)],
     current_user: Annotated[Account, Depends(get_current_admin_user)],
     account_filter: Annotated[Optional[int], Depends(get_account_access_filter)]
 ) -> dict:
     """
-    Delete a bag and all associated scripts.
+    Delete a bag and all associated scripts and feedback.
     """
-    # Get the bag with access control
-    bag_stmt = select(Bag).where(Bag.id == bag_id)
-    if account_filter is not None:
-        bag_stmt = bag_stmt.where(Bag.account_id == account_filter)
-    
-    bag = session.exec(bag_stmt).first()
-    if not bag:
+    if not await delete_bags_where([Bag.id == bag_id], account_filter, session):
         raise HTTPException(status_code=404, detail="Bag not found")
     
-    # Delete associated scripts first
-    scripts_stmt = select(Script).where(Script.bag_id == bag_id)
-    scripts = session.exec(scripts_stmt).all()
-    for script in scripts:
-        session.delete(script)
-    
-    # Delete the bag
-    session.delete(bag)
-    session.commit()
-    
     return {"message": "Bag and associated scripts deleted successfully"}
 
 
+@router.post("/bags/bulk-delete")
+async def bulk_delete_bags(
+    request: BagBulkDeleteRequest,
+    session: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Account, Depends(get_current_admin_user)],
+    account_filter: Annotated[Optional[int], Depends(get_account_access_filter)]
+) -> dict:
+    """
+    Delete many bags, with their scripts and feedback, in one transaction:
+    the bags listed in bag_ids and/or those matching the brand and condition
+    filters (as for GET /bags). At least one criterion is required.
+    """
+    conditions = []
+    if request.bag_ids is not None:
+        conditions.append(Bag.id.in_(request.bag_ids))
+    if request.brand:
+        conditions.append(Bag.brand.ilike(f"%{request.brand}%"))
+    if request.condition:
+        conditions.append(Bag.condition.ilike(f"%{request.condition}%"))
+    if not conditions:
+        raise HTTPException(status_code=400, detail="Give bag_ids or a brand/condition filter")
+    
+    bag_ids = await delete_bags_where(conditions, account_filter, session)
+    
+    return {
+        "deleted_count": len(bag_ids),
+        "bag_ids": bag_ids,
+        "message": f"Deleted {len(bag_ids)} bags and their scripts"
+    }
+
+
+async def delete_bags_where(conditions: list, account_filter: Optional[int], session: Session) -> List[int]:
+    """
+    Delete the accessible bags matching ``conditions`` off the event loop,
+    then forget the teleprompter state kept for them.
+    """
+    if account_filter is not None:
+        conditions = [*conditions, Bag.account_id == account_filter]
+    bag_ids = await run_blocking(delete_bags, conditions, session)
+    manager.forget_bags(bag_ids)
+    return bag_ids
+
+
 @router.get("/bags/stats")
 def get_bags_stats(
     session: Annotated[Session, Depends(get_db)],
@@ -334,38 +367,4 @@ def get_bags_stats(
     """
     Get statistics about bags and scripts.
     """
-    # Count bags
-    bags_statement = select(Bag)
-    if account_filter is not None:
-        bags_statement = bags_statement.where(Bag.account_id == account_filter)
-    bags = session.exec(bags_statement).all()
-    
-    # Count scripts
-    scripts_statement = select(Script).join(Bag)
-    if account_filter is not None:
-        scripts_statement = scripts_statement.where(Bag.account_id == account_filter)
-    scripts = session.exec(scripts_statement).all()
-    
-    # Group by brand
-    brands = {}
-    for bag in bags:
-        if bag.brand not in brands:
-            brands[bag.brand] = 0
-        brands[bag.brand] += 1
-    
-    # Script type distribution
-    script_types = {}
-    for script in scripts:
-        if script.script_type not in script_types:
-            script_types[script.script_type] = 0
-        script_types[script.script_type] += 1
-    
-    return {
-        "total_bags": len(bags),
-        "total_scripts": len(scripts),
-        "brands": brands,
-        "script_types": script_types,
-        "avg_scripts_per_bag": round(len(scripts) / len(bags), 2) if bags else 0,
-        "total_usage": sum(script.used_count for script in scripts),
-        "total_likes": sum(script.like_count for script in scripts)
-    } 
\ No newline at end of file
+    return compute_bag_stats(account_filter, session) 
\ No newline at end of file
@@ -7,8 +7,9 @@ from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
 from app.core.deps import get_db, get_current_user
+from app.core.executors import run_blocking
 from app.models import Account, Bag
-from app.services.csv_import import import_bags_csv, generate_template_excel
+from app.services.csv_import import import_bags_file, generate_template_excel
 
 router = APIRouter()
 
@@ -38,23 +39,17 @@ async def import_bags_csv_endpoint(
         )
     
     try:
-        # Read file content
-        contents = await file.read()
-        
-        # Parse file based on extension
-        if file_ext == 'csv':
-            df = pd.read_csv(io.BytesIO(contents))
-        else:  # Excel
-            df = pd.read_excel(io.BytesIO(contents))
-        
-        # Process the import
-        result = import_bags_csv(df, current_user.id, session)
+        # Stream the spooled upload in chunks on the DB thread pool
+        result = await run_blocking(import_bags_file, file.file, file_ext, current_user.id, session)
         
         return {
             "message": "Import completed successfully",
             "filename": file.filename,
             "total_rows": result["total_rows"],
             "successful": result["successful"],
+            "inserted": result["inserted"],
+            "updated": result["updated"],
+            "unchanged": result["unchanged"],
             "failed": result["failed"],
             "errors": result["errors"]
         }
@@ -0,0 +1,33 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+from app.core.deps import get_db, get_current_streamer_user, get_account_access_filter
+from app.models import Account
+from app.services.exports import MEDIA_TYPES, ExportDataset, ExportFormat, export_chunks
+
+router = APIRouter()
+
+
+@router.get("/exports/{dataset}")
+def export_dataset(
+    dataset: ExportDataset,
+    session: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Account, Depends(get_current_streamer_user)],
+    account_filter: Annotated[Optional[int], Depends(get_account_access_filter)],
+    format: ExportFormat = Query(ExportFormat.ndjson, description="Export format: ndjson, csv or parquet")
+) -> StreamingResponse:
+    """
+    Stream all bags, scripts or feedback as a file, in id order.
+    Admin users export all accounts, streamers only their own.
+    Rows are read and sent in batches, so exports of any size start at once.
+    """
+    return StreamingResponse(
+        export_chunks(dataset, format, account_filter, session.get_bind()),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f"attachment; filename={dataset.value}.{format.value}"
+        }
+    )
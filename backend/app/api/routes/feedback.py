@@ -1,69 +1,71 @@
 from typing import Annotated, List, Optional
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.deps import get_db, get_current_streamer_user, get_current_admin_user, get_account_access_filter
+from app.core.deps import (
+    get_db, get_async_db, get_current_streamer_user_async, get_current_admin_user, get_account_access_filter
+)
+from app.core.pagination import finish_page, keyset_page
+from app.core.responses import read_columns, trusted_json_response
 from app.models import Account, Feedback, FeedbackCreate, FeedbackRead, Script, Bag
+from app.services.script_counters import increment_script_counters, script_accessible
 
 router = APIRouter()
 
 
 @router.post("/feedback", response_model=FeedbackRead)
-def submit_feedback(
+async def submit_feedback(
     feedback: FeedbackCreate,
-    session: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[Account, Depends(get_current_streamer_user)]
+    session: Annotated[AsyncSession, Depends(get_async_db)],
+    current_user: Annotated[Account, Depends(get_current_streamer_user_async)]
 ) -> FeedbackRead:
     """
     Submit feedback (👍/👎) for a script during live streaming.
     """
-    # Verify the script exists and user has access
-    script_statement = select(Script).join(Bag).where(
-        Script.id == feedback.script_id
-    )
-    
-    # Non-admin users can only access their own scripts
-    if current_user.role != "admin" and not current_user.is_superuser:
-        script_statement = script_statement.where(Bag.account_id == current_user.id)
-    
-    script = session.exec(script_statement).first()
-    if not script:
-        raise HTTPException(status_code=404, detail="Script not found or access denied")
-    
-    # Create feedback
+    account_filter = get_account_access_filter(current_user)
     db_feedback = Feedback.model_validate(feedback)
-    session.add(db_feedback)
     
-    # Update script like count
-    if feedback.rating == 1:  # 👍
-        script.like_count += 1
-    elif feedback.rating == -1:  # 👎
-        script.like_count = max(0, script.like_count - 1)  # Don't go below 0
+    def record(sync_session: Session) -> bool:
+        # The like count moves in the UPDATE that also checks the script exists
+        # and the user has access; neutral ratings, and 👎 on a script without
+        # likes, only check
+        counted = feedback.rating and increment_script_counters(
+            feedback.script_id, 0, feedback.rating, account_filter, sync_session
+        )
+        if not counted and not script_accessible(feedback.script_id, account_filter, sync_session):
+            return False
+        sync_session.add(db_feedback)
+        return True
     
-    session.add(script)
-    session.commit()
-    session.refresh(db_feedback)
+    if not await session.run_sync(record):
+        raise HTTPException(status_code=404, detail="Script not found or access denied")
+    await session.commit()
     
     return db_feedback
 
 
 @router.get("/feedback", response_model=List[FeedbackRead])
-def get_feedback(
-    session: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[Account, Depends(get_current_streamer_user)],
-    account_filter: Annotated[Optional[int], Depends(get_account_access_filter)],
+async def get_feedback(
+    response: Response,
+    session: Annotated[AsyncSession, Depends(get_async_db)],
+    current_user: Annotated[Account, Depends(get_current_streamer_user_async)],
     script_id: Optional[int] = Query(None, description="Filter by script ID"),
     rating: Optional[int] = Query(None, ge=-1, le=1, description="Filter by rating (-1, 0, 1)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     limit: int = Query(50, ge=1, le=200, description="Number of feedback entries to return")
 ) -> List[FeedbackRead]:
     """
-    Get feedback entries with optional filtering.
+    Get feedback entries with optional filtering, most recent first.
+    Paginated by cursor: the next page's cursor is in the X-Next-Cursor header.
     """
-    statement = select(Feedback).join(Script).join(Bag)
+    # Only FeedbackRead's columns, encoded without re-validation
+    statement = select(*read_columns(FeedbackRead, Feedback)).join(Script).join(Bag)
     
     # Apply account filter for non-admin users
+    account_filter = get_account_access_filter(current_user)
     if account_filter is not None:
         statement = statement.where(Bag.account_id == account_filter)
     
@@ -73,11 +75,13 @@ def get_feedback(
     if rating is not None:
         statement = statement.where(Feedback.rating == rating)
     
-    # Order by most recent and apply limit
-    statement = statement.order_by(Feedback.live_event_ts.desc()).limit(limit)
+    # Most recent first, continuing after the cursor
+    statement = keyset_page(
+        statement, Feedback.live_event_ts, Feedback.id, cursor, limit, descending=True
+    )
     
-    feedback_entries = session.exec(statement).all()
-    return feedback_entries
+    feedback_entries = finish_page((await session.exec(statement)).all(), limit, response, time_attr="live_event_ts")
+    return trusted_json_response([entry._asdict() for entry in feedback_entries], response)
 
 
 @router.get("/stats/repetition")
@@ -0,0 +1,68 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlmodel import Session, select
+
+from app.core.deps import get_db, get_current_user, get_account_access_filter
+from app.core.executors import run_blocking
+from app.models import Account, ImportJob, ImportJobRead
+from app.services.import_jobs import create_import_job, submit_import_job
+
+router = APIRouter()
+
+
+@router.post("/import-jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_import_job_endpoint(
+    session: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Account, Depends(get_current_user)],
+    file: UploadFile = File(...)
+) -> ImportJobRead:
+    """
+    Import bags from a CSV or Excel file in the background.
+    Required columns: name, brand, price, details, conditions
+
+    Returns the job straight away; poll GET /import-jobs/{id} or listen for
+    "import_progress" WebSocket frames for its progress.
+    """
+    if not file.filename:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No file uploaded"
+        )
+
+    # Check file extension
+    file_ext = file.filename.lower().split('.')[-1]
+    if file_ext not in ['csv', 'xlsx', 'xls']:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be CSV or Excel format"
+        )
+
+    job = await run_blocking(create_import_job, file.file, file.filename, file_ext, current_user.id, session)
+    submit_import_job(job.id, session.get_bind())
+    return job
+
+
+@router.get("/import-jobs/{job_id}")
+def get_import_job(
+    job_id: int,
+    session: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Account, Depends(get_current_user)],
+    account_filter: Annotated[Optional[int], Depends(get_account_access_filter)]
+) -> ImportJobRead:
+    """
+    Get the status and progress of an import job.
+    Admin users can see all jobs, streamers only their own.
+    """
+    statement = select(ImportJob).where(ImportJob.id == job_id)
+    if account_filter is not None:
+        statement = statement.where(ImportJob.account_id == account_filter)
+
+    job = session.exec(statement).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+
+    return job
@@ -1,24 +1,44 @@
-from typing import Annotated, Optional
+import logging
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from rapidfuzz import fuzz, process
-from sqlmodel import Session, select
+from sqlalchemy import Row
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.deps import get_db
-from app.models import Bag
+from app.core.deps import get_async_db, get_optional_current_user_async, get_account_access_filter
+from app.core.executors import ExecutorBusyError, match_executor
+from app.models import Account, Bag
 from app.services.websocket_manager import send_switch_command, send_missing_product_alert
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
-def find_bag_by_title(title: str, session: Session) -> Optional[Bag]:
+def bags_for_matching_statement(account_filter: Optional[int]):
     """
-    Find a bag by matching the product title using fuzzy matching.
+    Query for the bags the caller can match against. Only the columns used for
+    scoring and the response are loaded, as plain rows rather than ORM objects.
+    """
+    statement = select(Bag.id, Bag.account_id, Bag.brand, Bag.model, Bag.color, Bag.condition)
+    if account_filter is not None:
+        statement = statement.where(Bag.account_id == account_filter)
+    return statement
+
+
+async def load_bags_for_matching(account_filter: Optional[int], session: AsyncSession) -> List[Row]:
+    """
+    Load the bags the caller can match against without blocking the event loop.
+    """
+    return (await session.exec(bags_for_matching_statement(account_filter))).all()
+
+
+def best_bag_match(title: str, bags: List[Bag]) -> Optional[Bag]:
+    """
+    Score already-loaded bags against a product title (CPU-bound, no DB access).
     """
-    # Get all bags
-    statement = select(Bag)
-    bags = session.exec(statement).all()
-    
     if not bags:
         return None
     
@@ -58,22 +78,36 @@ def find_bag_by_title(title: str, session: Session) -> Optional[Bag]:
 @router.get("/match")
 async def match_product_title(
     title: str = Query(..., description="Product title to match against bags"),
-    session: Session = Depends(get_db)
+    room: Optional[str] = Query(None, description="Live room the product was seen in"),
+    session: AsyncSession = Depends(get_async_db),
+    current_user: Optional[Account] = Depends(get_optional_current_user_async)
 ) -> dict:
     """
     Match a product title to a bag in the database.
     Returns bag_id if found, 404 if not found.
     Used by the Chrome extension to detect product changes.
+    Authenticated callers only match their own bags and events are routed
+    to their own teleprompters (optionally narrowed to one live room).
     """
     if not title.strip():
         raise HTTPException(status_code=400, detail="Title cannot be empty")
     
-    # Try to find matching bag
-    bag = find_bag_by_title(title.strip(), session)
+    account_filter = get_account_access_filter(current_user) if current_user else None
+    
+    # Load candidates over the async engine and score them on the match pool;
+    # the event loop stays free for WebSocket traffic meanwhile
+    bags = await load_bags_for_matching(account_filter, session)
+    try:
+        bag = await match_executor.run(best_bag_match, title.strip(), bags)
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Matching is busy, please retry shortly"
+        )
     
     if bag:
-        # Found a match - send switch command to teleprompter
-        await send_switch_command(bag.id)
+        # Found a match - send switch command to the bag owner's teleprompters
+        await send_switch_command(bag.id, bag.account_id, room)
         
         return {
             "bag_id": bag.id,
@@ -90,8 +124,11 @@ async def match_product_title(
         }
     
     else:
-        # No match found - send alert
-        await send_missing_product_alert(title)
+        # No match found - alert the caller's teleprompters
+        if current_user:
+            await send_missing_product_alert(title, current_user.id, room)
+        else:
+            logger.warning(f"Unmatched title from anonymous client, alert not routed: {title}")
         
         raise HTTPException(
             status_code=404, 
@@ -104,30 +141,11 @@ async def match_product_title(
         )
 
 
-@router.get("/match/similar")
-def get_similar_bags(
-    title: str = Query(..., description="Product title to find similar bags for"),
-    limit: int = Query(5, ge=1, le=20, description="Number of similar bags to return"),
-    session: Session = Depends(get_db)
-) -> dict:
+def score_similar_bags(title: str, bags: List[Row], limit: int) -> List[dict]:
     """
-    Get similar bags for a product title (for manual matching).
+    The ``limit`` bags most similar to a product title, best first (CPU-bound,
+    no DB access).
     """
-    if not title.strip():
-        raise HTTPException(status_code=400, detail="Title cannot be empty")
-    
-    # Get all bags
-    statement = select(Bag)
-    bags = session.exec(statement).all()
-    
-    if not bags:
-        return {
-            "title": title,
-            "similar_bags": [],
-            "message": "No bags found in database"
-        }
-    
-    # Calculate similarity scores
     similarities = []
     title_lower = title.lower()
     
@@ -147,11 +165,9 @@ def get_similar_bags(
     
     # Sort by similarity and return top results
     similarities.sort(key=lambda x: x[0], reverse=True)
-    top_matches = similarities[:limit]
     
-    similar_bags = []
-    for similarity, bag in top_matches:
-        similar_bags.append({
+    return [
+        {
             "bag_id": bag.id,
             "brand": bag.brand,
             "model": bag.model,
@@ -163,7 +179,40 @@ def get_similar_bags(
                 "Medium" if similarity >= 60 else
                 "Weak"
             )
-        })
+        }
+        for similarity, bag in similarities[:limit]
+    ]
+
+
+@router.get("/match/similar")
+async def get_similar_bags(
+    title: str = Query(..., description="Product title to find similar bags for"),
+    limit: int = Query(5, ge=1, le=20, description="Number of similar bags to return"),
+    session: AsyncSession = Depends(get_async_db)
+) -> dict:
+    """
+    Get similar bags for a product title (for manual matching).
+    """
+    if not title.strip():
+        raise HTTPException(status_code=400, detail="Title cannot be empty")
+    
+    # Loaded and scored like /match, off the event loop
+    bags = await load_bags_for_matching(None, session)
+    
+    if not bags:
+        return {
+            "title": title,
+            "similar_bags": [],
+            "message": "No bags found in database"
+        }
+    
+    try:
+        similar_bags = await match_executor.run(score_similar_bags, title, bags, limit)
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Matching is busy, please retry shortly"
+        )
     
     return {
         "title": title,
@@ -1,85 +1,130 @@
 from typing import Annotated, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import String, case, cast, func
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
 
-from app.core.deps import get_db, get_current_admin_user, get_current_streamer_user, get_account_access_filter
-from app.models import Account, Script, ScriptRead, ScriptCreate, ScriptUpdate, Bag
+from app.core.deps import (
+    get_db, get_async_db, get_current_admin_user, get_current_streamer_user,
+    get_current_streamer_user_async, get_account_access_filter
+)
+from app.core.etags import check_not_modified
+from app.core.pagination import finish_page, keyset_page
+from app.core.responses import trusted_json_response
+from app.models import Account, Script, ScriptRead, ScriptCreate, ScriptUpdate, ScriptType, Bag
+from app.services.default_scripts import materialize_default_script
+from app.services.script_counters import increment_script_counters, toggle_script_favorite
+from app.services.stats import account_revision
 
 router = APIRouter()
 
 
+# Frontend categories to the script type they filter on, and each type's category
+CATEGORY_SCRIPT_TYPES = {
+    'general': 'hook',
+    'opening': 'hook',
+    'product-intro': 'look',
+    'pricing': 'value',
+    'authenticity': 'story',
+    'closing': 'cta',
+    'interaction': 'hook',
+    'special-offer': 'value',
+}
+SCRIPT_TYPE_CATEGORIES = {
+    ScriptType.hook: 'opening',
+    ScriptType.look: 'product-intro',
+    ScriptType.story: 'authenticity',
+    ScriptType.value: 'pricing',
+    ScriptType.cta: 'closing',
+}
+
+# Listing fields, computed in the query; tags are listed from SCRIPT_TAG_COLUMNS
+SCRIPT_LIST_COLUMNS = {
+    "id": Script.id,
+    "title": Bag.brand + " " + Bag.model + " - " + cast(Script.script_type, String),
+    "content": Script.content,
+    "category": case(SCRIPT_TYPE_CATEGORIES, value=Script.script_type, else_='general'),
+    "is_favorite": Script.like_count > 10,  # Consider scripts with >10 likes as favorites
+    "estimated_duration": func.length(Script.content) // 3,  # Rough estimate: 3 chars per second
+    "created_at": Script.created_at,
+    "updated_at": Script.updated_at,
+    "usage_count": Script.used_count,
+    "bag_id": Script.bag_id,
+}
+SCRIPT_TAG_COLUMNS = (Bag.brand, Bag.color, Script.script_type)
+SCRIPT_LIST_FIELDS = [*SCRIPT_LIST_COLUMNS, "tags"]
+
+
+def script_list_fields(fields: Optional[str]) -> List[str]:
+    """
+    The listing fields named in a ``fields=`` parameter (all of them if unset).
+    """
+    if not fields:
+        return SCRIPT_LIST_FIELDS
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCRIPT_LIST_FIELDS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}; choose from {', '.join(SCRIPT_LIST_FIELDS)}"
+        )
+    return [name for name in SCRIPT_LIST_FIELDS if name in names]
+
+
 @router.get("/scripts", response_model=List[dict])
 def get_scripts(
+    request: Request,
+    response: Response,
     session: Annotated[Session, Depends(get_db)],
     current_user: Annotated[Account, Depends(get_current_streamer_user)],
     account_filter: Annotated[Optional[int], Depends(get_account_access_filter)],
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    skip: int = Query(0, ge=0, deprecated=True, description="Number of scripts to skip (use cursor instead)"),
     limit: int = Query(100, ge=1, le=1000),
-    category: Optional[str] = Query(None, description="Filter by category/type")
+    category: Optional[str] = Query(None, description="Filter by category/type"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default all)")
 ) -> List[dict]:
     """
-    Get all scripts with enhanced metadata for the frontend.
+    Get all scripts with enhanced metadata for the frontend, oldest first.
+    Paginated by cursor: the next page's cursor is in the X-Next-Cursor header.
+    Answers 304 to an If-None-Match naming the current ETag.
     """
-    # Get scripts with their associated bags
-    scripts_stmt = select(Script).join(Bag)
+    names = script_list_fields(fields)
+    check_not_modified(request, response, account_revision(account_filter, session))
+    
+    # One query: the requested fields, then the tag columns, then the page key if not requested
+    plain_names = [name for name in names if name != "tags"]
+    columns = [SCRIPT_LIST_COLUMNS[name].label(name) for name in plain_names]
+    with_tags = "tags" in names
+    if with_tags:
+        columns += SCRIPT_TAG_COLUMNS
+    if "id" not in names:
+        columns.append(Script.id.label("id"))
+    if "created_at" not in names:
+        columns.append(Script.created_at.label("created_at"))
+    scripts_stmt = select(*columns).join_from(Script, Bag)
     
     if account_filter is not None:
         scripts_stmt = scripts_stmt.where(Bag.account_id == account_filter)
     
     if category:
-        # Map frontend categories to backend script types
-        category_map = {
-            'general': 'hook',
-            'opening': 'hook',
-            'product-intro': 'look',
-            'pricing': 'value',
-            'authenticity': 'story',
-            'closing': 'cta',
-            'interaction': 'hook',
-            'special-offer': 'value',
-        }
-        script_type = category_map.get(category, category)
+        script_type = CATEGORY_SCRIPT_TYPES.get(category, category)
         scripts_stmt = scripts_stmt.where(Script.script_type == script_type)
     
-    scripts_stmt = scripts_stmt.offset(skip).limit(limit)
-    scripts_with_bags = session.exec(scripts_stmt).all()
-    
-    # Get associated bags
-    bag_ids = {script.bag_id for script in scripts_with_bags}
-    bags_stmt = select(Bag).where(Bag.id.in_(bag_ids))
-    bags = session.exec(bags_stmt).all()
-    bags_dict = {bag.id: bag for bag in bags}
+    scripts_stmt = keyset_page(scripts_stmt, Script.created_at, Script.id, cursor, limit)
+    if skip and not cursor:
+        scripts_stmt = scripts_stmt.offset(skip)
+    rows = finish_page(session.exec(scripts_stmt).all(), limit, response)
     
-    # Format scripts for frontend
-    result = []
-    for script in scripts_with_bags:
-        bag = bags_dict.get(script.bag_id)
-        
-        # Map script types to frontend categories
-        category_reverse_map = {
-            'hook': 'opening',
-            'look': 'product-intro',
-            'story': 'authenticity',
-            'value': 'pricing',
-            'cta': 'closing'
-        }
-        
-        result.append({
-            "id": script.id,
-            "title": f"{bag.brand} {bag.model} - {script.script_type.value}" if bag else f"Script {script.id}",
-            "content": script.content,
-            "category": category_reverse_map.get(script.script_type.value, 'general'),
-            "tags": [bag.brand, bag.color, script.script_type.value] if bag else [script.script_type.value],
-            "is_favorite": script.like_count > 10,  # Consider scripts with >10 likes as favorites
-            "estimated_duration": len(script.content) // 3,  # Rough estimate: 3 chars per second
-            "created_at": script.created_at.isoformat(),
-            "updated_at": script.updated_at.isoformat(),
-            "usage_count": script.used_count,
-            "bag_id": script.bag_id
-        })
+    # Rows are already in response shape; only tags are assembled here
+    if with_tags:
+        tags = slice(len(plain_names), len(plain_names) + len(SCRIPT_TAG_COLUMNS))
+        result = [{**dict(zip(plain_names, row)), "tags": list(row[tags])} for row in rows]
+    else:
+        result = [dict(zip(plain_names, row)) for row in rows]
     
-    return result
+    return trusted_json_response(result, response)
 
 
 @router.post("/scripts", response_model=dict)
@@ -92,18 +137,7 @@ def create_script(
     Create a new script. Accepts frontend format and converts to backend format.
     """
     # Map frontend categories to script types
-    category_map = {
-        'general': 'hook',
-        'opening': 'hook',
-        'product-intro': 'look',
-        'pricing': 'value',
-        'authenticity': 'story',
-        'closing': 'cta',
-        'interaction': 'hook',
-        'special-offer': 'value',
-    }
-    
-    script_type = category_map.get(script_data.get('category', 'general'), 'hook')
+    script_type = CATEGORY_SCRIPT_TYPES.get(script_data.get('category', 'general'), 'hook')
     
     # Find or create a default bag if no bag_id provided
     bag_id = script_data.get('bag_id')
@@ -130,6 +164,11 @@ def create_script(
             session.refresh(default_bag)
             bag_id = default_bag.id
     
+    # A bag's default scripts are kept alongside its first script of its own
+    bag = session.get(Bag, bag_id)
+    if bag:
+        materialize_default_script(bag, ScriptType(script_type), session)
+    
     # Create the script
     script = Script(
         content=script_data.get('content', ''),
@@ -141,9 +180,6 @@ def create_script(
     session.commit()
     session.refresh(script)
     
-    # Get the associated bag for response
-    bag = session.get(Bag, bag_id)
-    
     # Return in frontend format
     return {
         "id": script.id,
@@ -180,22 +216,53 @@ def update_script(
     if not script:
         raise HTTPException(status_code=404, detail="Script not found")
     
+    return _apply_script_update(script, script_data, session)
+
+
+@router.put("/bag/{bag_id}/default-scripts/{script_type}", response_model=dict)
+def update_default_script(
+    bag_id: int,
+    script_type: ScriptType,
+    script_data: dict,
+    session: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Account, Depends(get_current_streamer_user)],
+    account_filter: Annotated[Optional[int], Depends(get_account_access_filter)]
+) -> dict:
+    """
+    Edit one of a bag's default scripts (listed with is_default true).
+    The bag's default scripts are saved first; the response carries the new id.
+    """
+    script = _materialize_default_script(bag_id, script_type, account_filter, session)
+    return _apply_script_update(script, script_data, session)
+
+
+def _materialize_default_script(
+    bag_id: int,
+    script_type: ScriptType,
+    account_filter: Optional[int],
+    session: Session
+) -> Script:
+    bag_stmt = select(Bag).where(Bag.id == bag_id)
+    if account_filter is not None:
+        bag_stmt = bag_stmt.where(Bag.account_id == account_filter)
+    
+    bag = session.exec(bag_stmt).first()
+    if not bag:
+        raise HTTPException(status_code=404, detail="Bag not found")
+    
+    script = materialize_default_script(bag, script_type, session)
+    if script is None:
+        raise HTTPException(status_code=409, detail="Bag has its own scripts; use their ids")
+    return script
+
+
+def _apply_script_update(script: Script, script_data: dict, session: Session) -> dict:
     # Update fields if provided
     if 'content' in script_data:
         script.content = script_data['content']
     
     if 'category' in script_data:
-        category_map = {
-            'general': 'hook',
-            'opening': 'hook',
-            'product-intro': 'look',
-            'pricing': 'value',
-            'authenticity': 'story',
-            'closing': 'cta',
-            'interaction': 'hook',
-            'special-offer': 'value',
-        }
-        script.script_type = category_map.get(script_data['category'], script.script_type)
+        script.script_type = CATEGORY_SCRIPT_TYPES.get(script_data['category'], script.script_type)
     
     # Handle favorite status through like count
     if 'is_favorite' in script_data:
@@ -214,19 +281,11 @@ def update_script(
     bag = session.get(Bag, script.bag_id)
     
     # Return in frontend format
-    category_reverse_map = {
-        'hook': 'opening',
-        'look': 'product-intro',
-        'story': 'authenticity',
-        'value': 'pricing',
-        'cta': 'closing'
-    }
-    
     return {
         "id": script.id,
         "title": script_data.get('title', f"{bag.brand} {bag.model} - {script.script_type.value}"),
         "content": script.content,
-        "category": category_reverse_map.get(script.script_type.value, 'general'),
+        "category": SCRIPT_TYPE_CATEGORIES.get(script.script_type, 'general'),
         "tags": script_data.get('tags', '').split(',') if isinstance(script_data.get('tags'), str) else [bag.brand, bag.color],
         "is_favorite": script.like_count > 10,
         "estimated_duration": script_data.get('estimated_duration', len(script.content) // 3),
@@ -263,23 +322,45 @@ def delete_script(
 
 
 @router.post("/scripts/{script_id}/used")
-def mark_script_used(
+async def mark_script_used(
     script_id: int,
-    session: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[Account, Depends(get_current_streamer_user)]
+    session: Annotated[AsyncSession, Depends(get_async_db)],
+    current_user: Annotated[Account, Depends(get_current_streamer_user_async)]
 ) -> dict:
     """
     Mark a script as used (increment usage counter).
     """
-    script = session.get(Script, script_id)
+    account_filter = get_account_access_filter(current_user)
+    script = await session.run_sync(
+        lambda sync_session: increment_script_counters(script_id, 1, 0, account_filter, sync_session)
+    )
     if not script:
         raise HTTPException(status_code=404, detail="Script not found")
+    await session.commit()
     
+    return {
+        "id": script.id,
+        "used_count": script.used_count,
+        "message": "Script usage recorded"
+    }
+
+
+@router.post("/bag/{bag_id}/default-scripts/{script_type}/used")
+def mark_default_script_used(
+    bag_id: int,
+    script_type: ScriptType,
+    session: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Account, Depends(get_current_streamer_user)],
+    account_filter: Annotated[Optional[int], Depends(get_account_access_filter)]
+) -> dict:
+    """
+    Mark one of a bag's default scripts as used, saving the bag's default scripts.
+    """
+    script = _materialize_default_script(bag_id, script_type, account_filter, session)
     script.used_count += 1
-    script.updated_at = datetime.utcnow()
     
-    session.add(script)
     session.commit()
+    session.refresh(script)
     
     return {
         "id": script.id,
@@ -292,28 +373,20 @@ def mark_script_used(
 def toggle_script_like(
     script_id: int,
     session: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[Account, Depends(get_current_streamer_user)]
+    current_user: Annotated[Account, Depends(get_current_streamer_user)],
+    account_filter: Annotated[Optional[int], Depends(get_account_access_filter)]
 ) -> dict:
     """
     Toggle like status for a script.
     """
-    script = session.get(Script, script_id)
+    # Simple toggle - in production you'd track individual user likes
+    script = toggle_script_favorite(script_id, account_filter, session)
     if not script:
         raise HTTPException(status_code=404, detail="Script not found")
-    
-    # Simple toggle - in production you'd track individual user likes
-    if script.like_count > 10:
-        script.like_count = 5
-    else:
-        script.like_count = 15
-    
-    script.updated_at = datetime.utcnow()
-    
-    session.add(script)
     session.commit()
     
     return {
         "id": script.id,
         "like_count": script.like_count,
         "is_favorite": script.like_count > 10
-    } 
\ No newline at end of file
+    }
\ No newline at end of file
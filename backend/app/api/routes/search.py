@@ -0,0 +1,31 @@
+from typing import Annotated, List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlmodel import Session
+
+from app.core.deps import get_db, get_current_streamer_user, get_account_access_filter
+from app.core.pagination import finish_offset_page, offset_page
+from app.models import Account
+from app.services.search import search
+
+router = APIRouter()
+
+
+@router.get("/search")
+def search_endpoint(
+    response: Response,
+    session: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[Account, Depends(get_current_streamer_user)],
+    account_filter: Annotated[Optional[int], Depends(get_account_access_filter)],
+    q: str = Query(..., min_length=1, description="Words to find; each matches as a prefix"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Number of results to return")
+) -> List[dict]:
+    """
+    Full-text search over bags (brand, model, color, details) and script content, best match first.
+    Admin users search all accounts, streamers only their own.
+    Paginated by cursor: the next page's cursor is in the X-Next-Cursor header.
+    """
+    offset = offset_page(cursor)
+    results = search(q, account_filter, offset, limit + 1, session)
+    return finish_offset_page(results, offset, limit, response)
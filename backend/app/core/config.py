@@ -76,6 +76,23 @@ class Settings(BaseSettings):
                 path=self.POSTGRES_DB or "",
             ))
 
+    # Database engine / connection pool
+    DB_POOL_SIZE: int = 5  # Connections kept open in the pool
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed under burst load
+    DB_POOL_TIMEOUT_SECONDS: int = 30  # Wait for a free connection before erroring
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # PostgreSQL: reconnect before server/proxy idle cutoffs
+    DB_POOL_PRE_PING: bool = True  # PostgreSQL: validate connections on checkout
+
+    # SQL query instrumentation (X-DB-* response headers are only sent when ENVIRONMENT is local)
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 10  # Same statement this often in one request -> N+1 warning
+
+    # SQLite connection pragmas (applied on every new connection)
+    SQLITE_JOURNAL_MODE: Literal["WAL", "DELETE", "TRUNCATE", "MEMORY"] = "WAL"
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait on a locked database instead of failing
+    SQLITE_CACHE_SIZE_KB: int = 64000  # Page cache per connection
+    SQLITE_MMAP_SIZE_BYTES: int = 256 * 1024 * 1024  # Memory-mapped I/O window (0 disables)
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -112,8 +129,39 @@ class Settings(BaseSettings):
             self.FIRST_SUPERUSER_EMAIL = self.FIRST_SUPERUSER
         return self
 
+    # Authenticated-user cache
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30  # How long a verified token skips the Account lookup
+    AUTH_USER_CACHE_SIZE: int = 1024  # Tokens kept (least recently used evicted first)
+
+    # Bulk bag import
+    IMPORT_BATCH_SIZE: int = 1000  # Rows parsed, inserted and committed per chunk
+    IMPORT_READ_CHUNK_SIZE: int = 10000  # Spreadsheet rows read and cleaned (column-wise) at a time
+
+    # Streaming exports
+    EXPORT_BATCH_SIZE: int = 5000  # Rows fetched and encoded at a time (one Parquet row group)
+
+    # Background import jobs
+    IMPORT_JOB_WORKERS: int = 2  # Imports running at once; further jobs wait in the queue
+    IMPORT_JOB_DIR: str = "import_jobs"  # Uploads kept here until their job finishes (for resuming)
+    IMPORT_JOB_MAX_ERRORS: int = 100  # Row error messages stored per job
+    IMPORT_JOB_STOP_TIMEOUT_SECONDS: float = 10  # Shutdown wait for running jobs to stop
+
+    # Blocking work executors
+    MATCH_EXECUTOR_WORKERS: int = 2  # Threads for CPU-bound fuzzy matching
+    MATCH_EXECUTOR_QUEUE_SIZE: int = 32  # Matches allowed to wait before /match returns 503
+    DB_EXECUTOR_WORKERS: int = 8  # Threads for blocking DB calls made from async handlers
+
+    # Event loop monitoring
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1  # How often loop lag is sampled
+    LOOP_LAG_THRESHOLD_SECONDS: float = 0.25  # Blocked longer than this -> log loop stack
+    LOOP_MONITOR_WINDOW: int = 3000  # Lag samples kept for percentiles (~5 min)
+    LOOP_STALL_LOG_COOLDOWN_SECONDS: float = 10.0  # Minimum gap between logged stacks
+
     # WebSocket Configuration
     WS_HOST: str = "localhost:8000"
+    WS_REPLAY_BUFFER_SIZE: int = 256  # Frames kept per channel for resuming clients
+    WS_REPLAY_RETENTION_SECONDS: int = 300  # How long an empty channel keeps its replay state
 
 
 settings = Settings()  # type: ignore 
\ No newline at end of file
@@ -1,16 +1,150 @@
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional, TypeVar
+
+from sqlalchemy import Select, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlmodel import Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+T = TypeVar("T")
+
+# Async drivers used for each backend by the async engine
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """
+    Connection pragmas for SQLite. WAL lets readers run alongside the single
+    writer, and busy_timeout makes writers wait for the lock instead of
+    raising "database is locked". SQLite only enforces foreign keys (and
+    their ON DELETE CASCADE) when asked to, per connection.
+    """
+    return {
+        "foreign_keys": "ON",
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,  # negative = size in KiB
+        "mmap_size": settings.SQLITE_MMAP_SIZE_BYTES,
+        "temp_store": "MEMORY",
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """Run the given pragmas on every new DBAPI connection of ``engine``."""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def engine_options(is_sqlite: bool, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Pool and connect options from ``Settings``, with ``overrides`` applied on top."""
+    options: Dict[str, Any] = {}
+    if "poolclass" not in overrides:
+        options["pool_size"] = settings.DB_POOL_SIZE
+        options["max_overflow"] = settings.DB_MAX_OVERFLOW
+        options["pool_timeout"] = settings.DB_POOL_TIMEOUT_SECONDS
+    if is_sqlite:
+        # Driver-level lock timeout, in seconds; busy_timeout below takes over once set
+        options["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    else:
+        options["pool_pre_ping"] = settings.DB_POOL_PRE_PING
+        options["pool_recycle"] = settings.DB_POOL_RECYCLE_SECONDS
+    options.update(overrides)
+    return options
+
+
+def create_db_engine(url: Optional[str] = None, **overrides: Any) -> Engine:
+    """
+    Create an engine with pool settings from ``Settings``; SQLite engines also
+    get the connection pragmas. ``overrides`` are passed to ``create_engine``.
+    """
+    url = url or str(settings.SQLALCHEMY_DATABASE_URI)
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+
+    engine = create_engine(url, **engine_options(is_sqlite, overrides))
+    if is_sqlite:
+        apply_sqlite_pragmas(engine, sqlite_pragmas())
+    return engine
+
+
+def async_database_url(url: str) -> URL:
+    """Same database as ``url``, addressed through its async driver."""
+    sync_url = make_url(url)
+    return sync_url.set(drivername=ASYNC_DRIVERS[sync_url.get_backend_name()])
+
+
+def create_async_db_engine(url: Optional[str] = None, **overrides: Any) -> AsyncEngine:
+    """
+    Async counterpart of ``create_db_engine`` (aiosqlite / asyncpg), with the
+    same pool settings and SQLite pragmas.
+    """
+    async_url = async_database_url(url or str(settings.SQLALCHEMY_DATABASE_URI))
+    is_sqlite = async_url.get_backend_name() == "sqlite"
+
+    engine = create_async_engine(async_url, **engine_options(is_sqlite, overrides))
+    if is_sqlite:
+        apply_sqlite_pragmas(engine.sync_engine, sqlite_pragmas())
+    return engine
+
+
+engine = create_db_engine()
+async_engine = create_async_db_engine()
+
+# Objects stay usable after commit; async code can't lazy-load expired attributes
+async_session_factory = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 def create_db_and_tables():
-    from app.models import Account, Bag, Script, PhraseMap, Feedback
+    from app.models import Account, Bag, Script, PhraseMap, Feedback, AccountStat, ImportJob
     from sqlmodel import SQLModel
     SQLModel.metadata.create_all(engine)
 
 
 def get_session():
     with Session(engine) as session:
-        yield session 
\ No newline at end of file
+        yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_factory() as session:
+        yield session
+
+
+async def run_in_async_session(func: Callable[..., Awaitable[T]], *args: Any) -> T:
+    """
+    Await ``func(*args, session)`` with a short-lived async session.
+    For async code paths that don't get a request-scoped session.
+    """
+    async with async_session_factory() as session:
+        return await func(*args, session)
+
+
+def lock_for_write(session: Session, *rows: Select) -> None:
+    """
+    Keep other writers out for the rest of ``session``'s transaction, so what
+    it reads next can't change before it writes. SQLite takes its database
+    write lock up front (BEGIN IMMEDIATE; a transaction that has already
+    written holds it); PostgreSQL locks the ``rows`` selected (FOR UPDATE).
+    Also works on the sync session of an AsyncSession (``run_sync``).
+    """
+    connection = session.connection()
+    if connection.dialect.name == "sqlite":
+        if not connection.connection.driver_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        for statement in rows:
+            connection.execute(statement.with_for_update())
@@ -1,17 +1,20 @@
-from typing import Generator, Annotated
+from typing import AsyncGenerator, Generator, Annotated, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
-from app.core.db import get_session
+from app.core.db import get_async_session, get_session
 from app.core.security import ALGORITHM
+from app.core.user_cache import user_cache
 from app.models import Account, UserRole
 
 reusable_oauth2 = HTTPBearer()
+optional_oauth2 = HTTPBearer(auto_error=False)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -19,14 +22,22 @@ def get_db() -> Generator[Session, None, None]:
     yield from get_session()
 
 
-def get_current_user(
-    session: Annotated[Session, Depends(get_db)],
-    token: Annotated[HTTPAuthorizationCredentials, Depends(reusable_oauth2)]
-) -> Account:
-    """Get current authenticated user from JWT token."""
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database dependency for async routes; the request waits on the
+    connection, not on a threadpool thread.
+    """
+    async for session in get_async_session():
+        yield session
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Decode and verify a JWT access token; the payload always has a subject (account id).
+    """
     try:
         payload = jwt.decode(
-            token.credentials, settings.SECRET_KEY, algorithms=[ALGORITHM]
+            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
         )
         user_id: str = payload.get("sub")
         if user_id is None:
@@ -39,9 +50,11 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    
-    statement = select(Account).where(Account.id == user_id)
-    user = session.exec(statement).first()
+    return payload
+
+
+def check_active_user(user: Optional[Account]) -> Account:
+    """Reject missing or deactivated accounts."""
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -49,6 +62,77 @@ def get_current_user(
     return user
 
 
+def get_user_from_token(token: str, session: Session) -> Account:
+    """
+    Resolve an active Account from a raw JWT access token.
+    Shared by the HTTP bearer dependency and the WebSocket handshake.
+    Recently verified tokens are served from the user cache.
+    """
+    user = user_cache.get(token)
+    if user is not None:
+        return user
+    
+    payload = decode_access_token(token)
+    # Read before the SELECT, so a change committed meanwhile isn't cached over
+    generation = user_cache.generation(int(payload["sub"]))
+    statement = select(Account).where(Account.id == payload["sub"])
+    user = check_active_user(session.exec(statement).first())
+    user_cache.put(token, user, payload.get("exp"), generation)
+    return user
+
+
+async def get_user_from_token_async(token: str, session: AsyncSession) -> Account:
+    """
+    Async variant of get_user_from_token for async routes and the WebSocket handshake.
+    """
+    user = user_cache.get(token)
+    if user is not None:
+        return user
+    
+    payload = decode_access_token(token)
+    generation = user_cache.generation(int(payload["sub"]))
+    statement = select(Account).where(Account.id == payload["sub"])
+    user = check_active_user((await session.exec(statement)).first())
+    user_cache.put(token, user, payload.get("exp"), generation)
+    return user
+
+
+def get_current_user(
+    session: Annotated[Session, Depends(get_db)],
+    token: Annotated[HTTPAuthorizationCredentials, Depends(reusable_oauth2)]
+) -> Account:
+    """Get current authenticated user from JWT token."""
+    return get_user_from_token(token.credentials, session)
+
+
+def get_optional_current_user(
+    session: Annotated[Session, Depends(get_db)],
+    token: Annotated[Optional[HTTPAuthorizationCredentials], Depends(optional_oauth2)]
+) -> Optional[Account]:
+    """Get the authenticated user if a bearer token was sent, otherwise None."""
+    if token is None:
+        return None
+    return get_user_from_token(token.credentials, session)
+
+
+async def get_current_user_async(
+    session: Annotated[AsyncSession, Depends(get_async_db)],
+    token: Annotated[HTTPAuthorizationCredentials, Depends(reusable_oauth2)]
+) -> Account:
+    """Get current authenticated user from JWT token (async routes)."""
+    return await get_user_from_token_async(token.credentials, session)
+
+
+async def get_optional_current_user_async(
+    session: Annotated[AsyncSession, Depends(get_async_db)],
+    token: Annotated[Optional[HTTPAuthorizationCredentials], Depends(optional_oauth2)]
+) -> Optional[Account]:
+    """Get the authenticated user if a bearer token was sent, otherwise None (async routes)."""
+    if token is None:
+        return None
+    return await get_user_from_token_async(token.credentials, session)
+
+
 def get_current_active_superuser(
     current_user: Annotated[Account, Depends(get_current_user)]
 ) -> Account:
@@ -85,6 +169,13 @@ def get_current_streamer_user(
     return current_user
 
 
+async def get_current_streamer_user_async(
+    current_user: Annotated[Account, Depends(get_current_user_async)]
+) -> Account:
+    """Ensure current user has streamer role (async routes)."""
+    return get_current_streamer_user(current_user)
+
+
 def get_account_access_filter(
     current_user: Annotated[Account, Depends(get_current_user)]
 ) -> int:
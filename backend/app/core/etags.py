@@ -0,0 +1,41 @@
+"""
+Weak ETags and conditional GETs for the reads clients poll.
+
+A route reads a cheap version of what it is about to list (an account
+revision, see app.services.stats) before running its query and passes it to
+``check_not_modified``. When the request's If-None-Match already names that
+version, a bodiless 304 is raised straight away, skipping the query and the
+serialization; otherwise the ETag is set on the response. Reading the version
+first means a write landing mid-request can only make the ETag older than
+the body, which costs the client a refetch, never a stale page.
+"""
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+
+# Responses are per user; let clients cache them but revalidate every time
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(version: str) -> str:
+    return f'W/"{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of ``etag`` against an If-None-Match header value.
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+def check_not_modified(request: Request, response: Response, version: str):
+    """
+    Raise a 304 if the client already has ``version``, else tag the response with it.
+    """
+    headers = {"ETag": make_etag(version), "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
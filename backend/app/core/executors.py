@@ -0,0 +1,131 @@
+"""
+Executors that keep blocking work off the asyncio event loop.
+
+Execution model for async routes and WebSocket handlers:
+- the event loop only awaits I/O (sockets, WebSocket frames)
+- CPU-heavy work (fuzzy matching) runs on ``match_executor``, whose queue is
+  bounded so a burst of matches is rejected instead of piling up
+- database access uses the async engine (``get_async_db`` /
+  ``run_in_async_session``); code that still needs a sync ``Session`` runs on
+  the DB thread pool via ``run_blocking`` / ``run_in_session``
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional, TypeVar
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.metrics import Metric, registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ExecutorBusyError(Exception):
+    """Raised when a bounded executor's queue is full."""
+    pass
+
+
+class BoundedExecutor:
+    """
+    Thread pool with an optional bound on in-flight jobs (running + queued).
+    A job holds its slot until the pool's future for it is done, even if the
+    coroutine awaiting it is cancelled first (the worker thread keeps
+    running). Slots are released from the pool's threads, hence the lock.
+    The pool is created on first use and again after a shutdown.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: Optional[int] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue if max_queue is not None else None
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _release(self, future: Optional[Future] = None):
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            if self.capacity is not None and self.pending >= self.capacity:
+                raise ExecutorBusyError(f"{self.name} executor is at capacity ({self.capacity} jobs)")
+            self.pending += 1
+
+        try:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            # Carry context variables (e.g. per-request query stats) into the worker
+            context = contextvars.copy_context()
+            future = self._executor.submit(context.run, func, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+# CPU-bound fuzzy matching
+match_executor = BoundedExecutor(
+    "match",
+    max_workers=settings.MATCH_EXECUTOR_WORKERS,
+    max_queue=settings.MATCH_EXECUTOR_QUEUE_SIZE,
+)
+
+# Blocking database calls made from async code (queue is unbounded; the pool caps concurrency)
+db_executor = BoundedExecutor("db", max_workers=settings.DB_EXECUTOR_WORKERS)
+
+# Background bag imports; long-running, so kept apart from request-path DB work
+import_executor = BoundedExecutor("import", max_workers=settings.IMPORT_JOB_WORKERS)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking callable (typically database access) on the DB thread pool.
+    """
+    return await db_executor.run(func, *args, **kwargs)
+
+
+def _call_with_session(func: Callable[..., T], *args: Any) -> T:
+    with Session(engine) as session:
+        return func(*args, session)
+
+
+async def run_in_session(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run ``func(*args, session)`` with a short-lived session on the DB thread pool.
+    For async code paths that don't get a request-scoped session.
+    """
+    return await run_blocking(_call_with_session, func, *args)
+
+
+@registry.register
+def collect_executor_metrics() -> Iterable[Metric]:
+    executors = (match_executor, db_executor, import_executor)
+    yield Metric(
+        "executor_pending_jobs",
+        "gauge",
+        "Jobs running or queued on a blocking-work executor",
+        [({"executor": executor.name}, executor.pending) for executor in executors],
+    )
+
+
+def shutdown_executors():
+    match_executor.shutdown(wait=False)
+    db_executor.shutdown(wait=False)
+    import_executor.shutdown(wait=False)
+    logger.info("Blocking-work executors shut down")
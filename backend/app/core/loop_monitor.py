@@ -0,0 +1,146 @@
+"""
+Event-loop lag monitor and blocking-call detector.
+
+A background task sleeps for a fixed interval and records how late it wakes up
+(scheduling lag). A watchdog thread checks the task's heartbeat; when the loop
+has not ticked for longer than the threshold, it samples the loop thread's
+current stack and logs it, pointing at the callback that is holding the loop.
+
+Cost is one timer wakeup per interval plus a watchdog thread that mostly
+sleeps; stack samples are rate limited, so it is safe to leave on in production.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+from app.core.config import settings
+from app.core.metrics import Metric, percentile, registry
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval: float = settings.LOOP_MONITOR_INTERVAL_SECONDS,
+        threshold: float = settings.LOOP_LAG_THRESHOLD_SECONDS,
+        window: int = settings.LOOP_MONITOR_WINDOW,
+        stack_log_cooldown: float = settings.LOOP_STALL_LOG_COOLDOWN_SECONDS
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_log_cooldown = stack_log_cooldown
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self.stalls = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._heartbeat = time.monotonic()
+        self._last_stack_log = 0.0
+
+    def start(self):
+        """Start monitoring the running event loop (call from within the loop)."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = self._loop.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"Event loop monitor started (interval {self.interval}s, threshold {self.threshold}s)"
+        )
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._watchdog = None
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            self._heartbeat = time.monotonic()
+
+    def _watch(self):
+        stalled_since = None  # heartbeat value of the stall already reported
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.threshold or heartbeat == stalled_since:
+                continue
+
+            stalled_since = heartbeat
+            self.stalls += 1
+            now = time.monotonic()
+            if now - self._last_stack_log < self.stack_log_cooldown:
+                continue
+            self._last_stack_log = now
+            self._log_loop_stack(blocked_for)
+
+    def _log_loop_stack(self, blocked_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+        logger.warning(
+            f"Event loop blocked for {blocked_for * 1000:.0f}ms "
+            f"(threshold {self.threshold * 1000:.0f}ms); loop thread stack:\n{stack}"
+        )
+
+    def percentiles(self) -> Dict[str, float]:
+        """Lag percentiles over the sample window, in seconds."""
+        values = sorted(self.samples)
+        return {
+            "p50": percentile(values, 0.50),
+            "p90": percentile(values, 0.90),
+            "p99": percentile(values, 0.99),
+            "max": values[-1] if values else 0.0,
+        }
+
+
+loop_monitor = LoopLagMonitor()
+
+
+@registry.register
+def collect_loop_metrics() -> Iterable[Metric]:
+    lag = loop_monitor.percentiles()
+    yield Metric(
+        "event_loop_lag_seconds",
+        "summary",
+        "Event loop scheduling lag over the recent sample window",
+        [({"quantile": "0.5"}, lag["p50"]), ({"quantile": "0.9"}, lag["p90"]), ({"quantile": "0.99"}, lag["p99"])],
+    )
+    yield Metric(
+        "event_loop_lag_max_seconds",
+        "gauge",
+        "Largest event loop lag since startup",
+        [({}, loop_monitor.max_lag)],
+    )
+    yield Metric(
+        "event_loop_stalls_total",
+        "counter",
+        "Times the event loop was blocked longer than the threshold",
+        [({}, loop_monitor.stalls)],
+    )
@@ -0,0 +1,64 @@
+"""
+In-process server metrics, exposed in Prometheus text format at /metrics.
+
+Components register a collector: a callable returning ``Metric`` tuples that is
+evaluated on each scrape, so nothing is computed between scrapes.
+"""
+import math
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+
+class Metric(NamedTuple):
+    name: str
+    type: str  # "gauge" | "counter" | "summary"
+    help: str
+    samples: List[Tuple[Dict[str, str], float]]  # (labels, value)
+
+
+Collector = Callable[[], Iterable[Metric]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._collectors: List[Collector] = []
+
+    def register(self, collector: Collector) -> Collector:
+        """Register a collector; usable as a decorator."""
+        self._collectors.append(collector)
+        return collector
+
+    def collect(self) -> List[Metric]:
+        metrics = []
+        for collector in self._collectors:
+            metrics.extend(collector())
+        return metrics
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.collect():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for labels, value in metric.samples:
+                lines.append(f"{metric.name}{_format_labels(labels)} {value:.6g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{key}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+registry = MetricsRegistry()
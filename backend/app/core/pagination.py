@@ -0,0 +1,97 @@
+"""
+Keyset (cursor) pagination on a (timestamp, id) key.
+
+Pages continue from the last row seen instead of skipping N rows, so every
+page is an index range scan and rows inserted mid-listing don't shift pages.
+The cursor of the next page is returned in the ``X-Next-Cursor`` header (the
+body stays a plain list); it is absent on the last page.
+
+Ranked results (search) have no stable key to continue from, so their
+cursor carries an offset instead (``offset_page``).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    payload = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(
+    statement,
+    time_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False
+):
+    """
+    Order ``statement`` by (time_column, id_column), start after ``cursor`` and
+    fetch one extra row so ``finish_page`` can tell whether another page exists.
+    """
+    key = tuple_(time_column, id_column)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        statement = statement.where(key < after if descending else key > after)
+    if descending:
+        statement = statement.order_by(time_column.desc(), id_column.desc())
+    else:
+        statement = statement.order_by(time_column, id_column)
+    return statement.limit(limit + 1)
+
+
+def finish_page(rows: Sequence[T], limit: int, response: Response, time_attr: str = "created_at") -> List[T]:
+    """
+    Trim the look-ahead row and, if there is a next page, set its cursor header.
+    """
+    page = list(rows[:limit])
+    if len(rows) > limit:
+        last = page[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, time_attr), last.id)
+    return page
+
+
+def offset_page(cursor: Optional[str]) -> int:
+    """
+    Offset a ranked listing continues from (0 without a cursor).
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded))["offset"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(offset)
+        return offset
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def finish_offset_page(rows: Sequence[T], offset: int, limit: int, response: Response) -> List[T]:
+    """
+    Like ``finish_page``, for a listing fetched with ``offset`` and ``limit + 1``.
+    """
+    page = list(rows[:limit])
+    if len(rows) > limit:
+        payload = json.dumps({"offset": offset + limit}, separators=(",", ":"))
+        response.headers[NEXT_CURSOR_HEADER] = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    return page
@@ -0,0 +1,112 @@
+"""
+Per-request SQL statement counting and N+1 detection.
+
+Cursor-level hooks on every Engine (sync and async) add each statement's count
+and duration to the ``QueryStats`` of the current request, a context variable
+set by ``QueryStatsMiddleware``. Statements run outside a request are ignored.
+"""
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import Metric, registry
+
+current_query_stats: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()  # SQL text -> executions
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least ``threshold`` times (likely N+1 loops)."""
+        return [
+            (statement, executions)
+            for statement, executions in self.statements.most_common()
+            if executions >= threshold
+        ]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements executed in this context (and tasks/threads it spawns)."""
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+class RouteQueryTotals:
+    """Running per-route totals exported at /metrics."""
+
+    def __init__(self):
+        # route -> [requests, statements, seconds, N+1 detections]
+        self.totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0, 0.0, 0])
+
+    def add(self, route: str, stats: QueryStats, n_plus_one: bool):
+        totals = self.totals[route]
+        totals[0] += 1
+        totals[1] += stats.count
+        totals[2] += stats.duration
+        totals[3] += int(n_plus_one)
+
+
+route_query_totals = RouteQueryTotals()
+
+
+@registry.register
+def collect_query_metrics() -> Iterable[Metric]:
+    routes = sorted(route_query_totals.totals.items())
+    yield Metric(
+        "db_requests_total",
+        "counter",
+        "HTTP requests observed by query tracking",
+        [({"route": route}, totals[0]) for route, totals in routes],
+    )
+    yield Metric(
+        "db_queries_total",
+        "counter",
+        "SQL statements executed while serving requests",
+        [({"route": route}, totals[1]) for route, totals in routes],
+    )
+    yield Metric(
+        "db_query_seconds_total",
+        "counter",
+        "Time spent executing SQL statements while serving requests",
+        [({"route": route}, totals[2]) for route, totals in routes],
+    )
+    yield Metric(
+        "db_n_plus_one_total",
+        "counter",
+        "Requests that repeated one statement past the N+1 threshold",
+        [({"route": route}, totals[3]) for route, totals in routes],
+    )
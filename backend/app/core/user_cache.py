@@ -0,0 +1,130 @@
+"""
+Short-lived cache of authenticated accounts, keyed by verified access token.
+
+A hit skips both JWT decoding and the Account lookup. Entries expire after
+AUTH_USER_CACHE_TTL_SECONDS (or when the token does, if sooner) and are
+dropped when this process flushes a change to the account and again when that
+change commits, since a request reading between the two still sees the old
+row. Each account also has a generation, bumped on every invalidation: a
+request reads it before loading the account and only caches what it loaded
+if the generation is unchanged. In a multi-process deployment the TTL bounds
+how long another worker may still serve the old snapshot.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models import Account
+
+
+class UserCache:
+    def __init__(
+        self,
+        maxsize: int = settings.AUTH_USER_CACHE_SIZE,
+        ttl: float = settings.AUTH_USER_CACHE_TTL_SECONDS
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()  # token -> (expires_at, snapshot)
+        self._tokens_by_account: Dict[int, Set[str]] = {}
+        self._generations: Dict[int, int] = {}  # account id -> invalidation count
+        self._lock = threading.Lock()  # sync dependencies run on the threadpool
+
+    def get(self, token: str) -> Optional[Account]:
+        """
+        A fresh, detached Account built from the cached snapshot, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.time():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+        return Account(**snapshot)
+
+    def generation(self, account_id: int) -> int:
+        """Read before loading an account, and pass the value on to ``put``."""
+        with self._lock:
+            return self._generations.get(account_id, 0)
+
+    def put(
+        self,
+        token: str,
+        account: Account,
+        token_expires_at: Optional[float] = None,
+        generation: Optional[int] = None
+    ):
+        """
+        Cache ``account`` for ``token``, unless the account was invalidated
+        since ``generation`` was read (the loaded row may predate the change).
+        """
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        snapshot = account.model_dump()
+
+        with self._lock:
+            if generation is not None and self._generations.get(account.id, 0) != generation:
+                return
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (expires_at, snapshot)
+            self._tokens_by_account.setdefault(account.id, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_account(self, account_id: int):
+        """Drop every cached token of an account."""
+        with self._lock:
+            self._generations[account_id] = self._generations.get(account_id, 0) + 1
+            for token in list(self._tokens_by_account.get(account_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_account.clear()
+
+    def _remove(self, token: str):
+        _, snapshot = self._entries.pop(token)
+        tokens = self._tokens_by_account.get(snapshot["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_account[snapshot["id"]]
+
+
+user_cache = UserCache()
+
+
+_INVALIDATED_ACCOUNTS = "invalidated_account_ids"
+
+
+@event.listens_for(Account, "after_update")
+@event.listens_for(Account, "after_delete")
+def invalidate_cached_account(mapper, connection, account: Account):
+    # Deactivation, role changes and password changes all take effect on the next request
+    user_cache.invalidate_account(account.id)
+    session = object_session(account)
+    if session is not None:
+        session.info.setdefault(_INVALIDATED_ACCOUNTS, set()).add(account.id)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_accounts(session: Session):
+    # Requests between the flush and the commit may have cached the old row
+    for account_id in session.info.pop(_INVALIDATED_ACCOUNTS, ()):
+        user_cache.invalidate_account(account_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_accounts(session: Session):
+    session.info.pop(_INVALIDATED_ACCOUNTS, None)
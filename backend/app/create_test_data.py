@@ -6,6 +6,8 @@ import sys
 from sqlmodel import Session, select
 from app.core.db import engine
 from app.models import Account, Bag, Script, ScriptType, PhraseMap
+import app.services.bag_import  # noqa: F401  (registers the bag import key listeners)
+import app.services.stats  # noqa: F401  (registers the account stats rollup listeners)
 
 
 def create_test_data():
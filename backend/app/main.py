@@ -1,12 +1,23 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
+from typing import Optional
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 import logging
 
 from app.core.config import settings
-from app.core.db import create_db_and_tables
-from app.api.routes import auth, csv_upload, bags, phrase_map, match, feedback, analytics, scripts, phrase_mappings
+from app.core.db import async_engine, create_db_and_tables
+from app.core.deps import get_async_db, get_user_from_token_async
+from app.core.executors import shutdown_executors
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import registry as metrics_registry
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.api.routes import auth, csv_upload, import_jobs, bags, phrase_map, match, feedback, analytics, scripts, phrase_mappings, search, exports
+from app.services.import_jobs import resume_import_jobs, stop_import_jobs
 from app.services.websocket_manager import websocket_endpoint
 from app.middleware.security import RateLimitMiddleware, InputValidationMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +28,7 @@ app = FastAPI(
     version="1.0.0",
     description="TikTok Luxury Resale Livestream Helper API",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
 )
 
 # Set all CORS enabled origins
@@ -29,11 +41,17 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
 # Add security middleware
 app.add_middleware(RateLimitMiddleware, calls=100, period=60)  # 100 calls per minute
 app.add_middleware(InputValidationMiddleware)
+app.add_middleware(
+    QueryStatsMiddleware,
+    headers=settings.ENVIRONMENT == "local",
+    n_plus_one_threshold=settings.QUERY_N_PLUS_ONE_THRESHOLD
+)
 
 
 @app.on_event("startup")
@@ -43,6 +61,29 @@ def on_startup():
     logger.info("Database tables created successfully")
 
 
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Start measuring event loop lag on the server's loop."""
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+
+@app.on_event("startup")
+async def start_import_jobs():
+    """Resume background imports interrupted by the last shutdown."""
+    await resume_import_jobs()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stop background monitoring and imports, the blocking-work thread pools and async DB connections."""
+    await loop_monitor.stop()
+    await stop_import_jobs()
+    shutdown_executors()
+    # Pooled async connections belong to this event loop
+    await async_engine.dispose()
+
+
 # Health check endpoint
 @app.get("/")
 def read_root():
@@ -60,26 +101,57 @@ def health_check():
     return {"status": "healthy", "service": "tiktok-streamer-backend"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Server metrics in Prometheus text format."""
+    return metrics_registry.render()
+
+
 # WebSocket endpoint for real-time script streaming
 @app.websocket("/ws/render")
-async def websocket_render_endpoint(websocket: WebSocket, bag_id: int = None):
+async def websocket_render_endpoint(
+    websocket: WebSocket,
+    session: AsyncSession = Depends(get_async_db),
+    token: Optional[str] = None,
+    room: Optional[str] = None,
+    bag_id: int = None
+):
     """
     WebSocket endpoint for teleprompter real-time script streaming.
     
     Query Parameters:
+    - token: JWT access token; the connection is bound to its account
+    - room: Optional live room ID to also receive events for that room
     - bag_id: Optional bag ID to subscribe to specific bag updates
     
     Message Format:
     {
-        "type": "subscribe|unsubscribe|ping|script_used",
+        "type": "subscribe|unsubscribe|resume|ping|script_used",
         "data": {...}
     }
+    
+    Frames broadcast on a channel carry "channel" and "seq"; a reconnecting
+    client sends {"type": "resume", "data": {"epoch": ..., "channels": {channel: seq}}}
+    to receive only the frames it missed. "script_used" takes {"script_id": ...},
+    or {"bag_id": ..., "script_type": ...} for a bag's default scripts.
     """
+    try:
+        if not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        account = await get_user_from_token_async(token, session)
+    except HTTPException as e:
+        logger.warning(f"Rejected WebSocket connection: {e.detail}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        # Don't pin a pooled connection for the lifetime of the socket
+        await session.close()
+    
     connection_id = f"teleprompter_{id(websocket)}"
     if bag_id:
         connection_id += f"_bag_{bag_id}"
     
-    await websocket_endpoint(websocket, connection_id)
+    await websocket_endpoint(websocket, account, connection_id, room=room)
 
 
 # Include API routes
@@ -95,6 +167,12 @@ app.include_router(
     tags=["csv-import"]
 )
 
+app.include_router(
+    import_jobs.router,
+    prefix=settings.API_V1_STR,
+    tags=["csv-import"]
+)
+
 app.include_router(
     bags.router,
     prefix=settings.API_V1_STR,
@@ -137,6 +215,18 @@ app.include_router(
     tags=["scripts"]
 )
 
+app.include_router(
+    search.router,
+    prefix=settings.API_V1_STR,
+    tags=["search"]
+)
+
+app.include_router(
+    exports.router,
+    prefix=settings.API_V1_STR,
+    tags=["exports"]
+)
+
 
 
 
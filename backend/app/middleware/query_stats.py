@@ -0,0 +1,43 @@
+"""
+Middleware reporting SQL statements and DB time per request
+"""
+import logging
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.query_stats import route_query_totals, track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """
+    Count SQL statements per request. Totals are exported at /metrics; with
+    ``headers`` (local development) they are also returned as X-DB-* headers.
+    A statement repeated ``n_plus_one_threshold`` times is logged as a likely N+1.
+    """
+    def __init__(self, app, headers: bool = False, n_plus_one_threshold: int = 10):
+        super().__init__(app)
+        self.headers = headers
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def dispatch(self, request: Request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+
+        repeated = stats.repeated_statements(self.n_plus_one_threshold)
+        for statement, executions in repeated:
+            logger.warning(
+                f"Possible N+1 in {request.method} {route_path}: statement ran "
+                f"{executions} times in one request: {statement[:200]}"
+            )
+        route_query_totals.add(f"{request.method} {route_path}", stats, bool(repeated))
+
+        if self.headers:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Query-Time-Ms"] = f"{stats.duration * 1000:.1f}"
+        return response
@@ -26,7 +26,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         client_ip = request.client.host if request.client else "unknown"
         
         # Skip rate limiting for health checks
-        if request.url.path in ["/", "/health", "/docs", "/openapi.json"]:
+        if request.url.path in ["/", "/health", "/metrics", "/docs", "/openapi.json"]:
             return await call_next(request)
         
         # Clean old entries
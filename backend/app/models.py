@@ -1,7 +1,8 @@
 import enum
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
+from sqlalchemy import DDL, JSON, BigInteger, Column, ColumnElement, ForeignKey, Index, Integer, Table, event, func, literal
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -30,6 +31,8 @@ class Account(AccountBase, table=True):
     hashed_password: str
     is_active: bool = Field(default=True)
     is_superuser: bool = Field(default=False)
+    # Bumped with every write to the account's bags and scripts (ETags)
+    revision: int = Field(default=0)
     
     # Relationships
     bags: list["Bag"] = Relationship(back_populates="account")
@@ -66,14 +69,27 @@ class BagBase(SQLModel):
 
 
 class Bag(BagBase, table=True):
+    # Nearly every bag query is scoped to one account; listings page on (created_at, id);
+    # imports look bags up by import key
+    __table_args__ = (
+        Index("ix_bag_account_id_created_at_id", "account_id", "created_at", "id"),
+        Index("ix_bag_created_at_id", "created_at", "id"),
+        Index("ix_bag_import_key_account_id", "import_key", "account_id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     account_id: int = Field(foreign_key="account.id")
+    # 64-bit hash of brand, model, color and details; re-imports match bags
+    # on it (set by app.services.bag_import)
+    import_key: Optional[int] = Field(default=None, sa_type=BigInteger)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
     account: Account = Relationship(back_populates="bags")
-    scripts: list["Script"] = Relationship(back_populates="bag")
+    # ORM deletes go through each script so the stats rollup sees them;
+    # bulk deletes (app.services.bag_delete) rely on ON DELETE CASCADE
+    scripts: list["Script"] = Relationship(back_populates="bag", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
 
 
 class BagCreate(BagBase):
@@ -117,14 +133,24 @@ class ScriptBase(SQLModel):
 
 
 class Script(ScriptBase, table=True):
+    # Scripts are loaded per bag (and grouped by type for the teleprompter);
+    # listings page on (created_at, id)
+    __table_args__ = (
+        Index("ix_script_bag_id_script_type", "bag_id", "script_type"),
+        Index("ix_script_created_at_id", "created_at", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
-    bag_id: int = Field(foreign_key="bag.id")
+    # Deleting a bag in SQL deletes its scripts, and theirs their feedback
+    bag_id: int = Field(sa_column=Column(Integer, ForeignKey("bag.id", ondelete="CASCADE"), nullable=False))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
     bag: Bag = Relationship(back_populates="scripts")
-    feedbacks: list["Feedback"] = Relationship(back_populates="script")
+    feedbacks: list["Feedback"] = Relationship(
+        back_populates="script", sa_relationship_kwargs={"passive_deletes": True}
+    )
 
 
 class ScriptCreate(ScriptBase):
@@ -132,10 +158,11 @@ class ScriptCreate(ScriptBase):
 
 
 class ScriptRead(ScriptBase):
-    id: int
+    id: Optional[int]  # None for a bag's default scripts until one is edited or used
     bag_id: int
     created_at: datetime
     updated_at: datetime
+    is_default: bool = False
 
 
 class ScriptUpdate(SQLModel):
@@ -153,6 +180,11 @@ class PhraseMapBase(SQLModel):
 
 
 class PhraseMap(PhraseMapBase, table=True):
+    # Phrase mapping loads an account's active mappings
+    __table_args__ = (
+        Index("ix_phrasemap_account_id_active", "account_id", "active"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     account_id: int = Field(foreign_key="account.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -187,8 +219,15 @@ class FeedbackBase(SQLModel):
 
 
 class Feedback(FeedbackBase, table=True):
+    # Per-script history in event order, plus date-range scans for analytics
+    __table_args__ = (
+        Index("ix_feedback_script_id_live_event_ts", "script_id", "live_event_ts"),
+        Index("ix_feedback_live_event_ts_id", "live_event_ts", "id"),
+        Index("ix_feedback_created_at", "created_at"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
-    script_id: int = Field(foreign_key="script.id")
+    script_id: int = Field(sa_column=Column(Integer, ForeignKey("script.id", ondelete="CASCADE"), nullable=False))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
@@ -205,6 +244,111 @@ class FeedbackRead(FeedbackBase):
     created_at: datetime
 
 
+# AccountStat model - Per-account rollup of inventory and script counters
+class StatDimension(str, enum.Enum):
+    brand = "brand"
+    script_type = "script_type"
+
+
+class AccountStat(SQLModel, table=True):
+    # One counter row per (account, brand) and (account, script type), kept
+    # current by app.services.stats; dashboards read an account's rows by primary key
+    account_id: int = Field(foreign_key="account.id", primary_key=True)
+    dimension: StatDimension = Field(primary_key=True)
+    name: str = Field(max_length=100, primary_key=True)
+    item_count: int = Field(default=0)
+    used_count: int = Field(default=0)
+    like_count: int = Field(default=0)
+    total_value: float = Field(default=0)
+
+
+# ImportJob model - Background bag imports
+class ImportJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class ImportJobBase(SQLModel):
+    filename: str = Field(max_length=255)
+    status: ImportJobStatus = Field(default=ImportJobStatus.pending)
+    rows_processed: int = Field(default=0)  # Rows read so far (imported or rejected)
+    rows_imported: int = Field(default=0)  # Inserted, updated or unchanged
+    rows_inserted: int = Field(default=0)
+    rows_updated: int = Field(default=0)
+    rows_unchanged: int = Field(default=0)
+    rows_failed: int = Field(default=0)
+    errors: List[str] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+    error: Optional[str] = Field(default=None, max_length=1000)  # Why the job failed
+
+
+class ImportJob(ImportJobBase, table=True):
+    # Unfinished jobs are looked up on startup to be resumed
+    __table_args__ = (
+        Index("ix_importjob_status", "status"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    account_id: int = Field(foreign_key="account.id")
+    file_ext: str = Field(max_length=10)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+class ImportJobRead(ImportJobBase):
+    id: int
+    account_id: int
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+# Full-text search over bags and scripts (queried by app.services.search).
+# SQLite: external-content FTS5 tables kept in sync by triggers, so bulk
+# inserts and cascaded deletes are indexed too. Postgres: GIN indexes on the
+# same tsvector expressions the search queries use.
+SEARCH_COLUMNS = {"bag": ("brand", "model", "color", "details"), "script": ("content",)}
+
+
+def search_vector(table: Table) -> ColumnElement:
+    """
+    Postgres tsvector of a table's searchable columns. Strings are literal SQL
+    so the GIN index expression and the queries' expression are identical.
+    """
+    text = None
+    for column in SEARCH_COLUMNS[table.name]:
+        value = func.coalesce(table.c[column], literal("", literal_execute=True))
+        text = value if text is None else text.op("||")(literal(" ", literal_execute=True)).op("||")(value)
+    return func.to_tsvector(literal("simple", literal_execute=True), text)
+
+
+def fts5_ddl(table: str) -> List[str]:
+    """SQLite statements creating ``<table>_fts`` and the triggers syncing it."""
+    columns = SEARCH_COLUMNS[table]
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    delete = f"INSERT INTO {table}_fts({table}_fts, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {table}_fts(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE {table}_fts USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER {table}_fts_update AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+for _model in (Bag, Script):
+    _table = _model.__table__
+    Index(f"ix_{_table.name}_search", search_vector(_table), postgresql_using="gin").ddl_if(dialect="postgresql")
+    for _statement in fts5_ddl(_table.name):
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    event.listen(_table, "before_drop", DDL(f"DROP TABLE IF EXISTS {_table.name}_fts").execute_if(dialect="sqlite"))
+
+
 # WebSocket message models
 class WSMessage(SQLModel):
     type: str
@@ -0,0 +1,20 @@
+import logging
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.stats import rebuild_account_stats
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logger.info("Rebuilding account stats")
+    with Session(engine) as session:
+        rows = rebuild_account_stats(session)
+    logger.info(f"Account stats rebuilt ({rows} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Set-based bag deletes.
+
+Bags are removed with a single DELETE; their scripts and those scripts'
+feedback go with them through the ON DELETE CASCADE foreign keys. Mapper
+events don't see these rows, so the stats rollup is decremented, in the
+same transaction, from two aggregate queries run just before the delete.
+The write lock is taken before those queries, so a usage or like counted
+meanwhile (app.services.script_counters) can't slip between the two.
+"""
+from typing import Dict, List
+
+from sqlalchemy import ColumnElement, delete
+from sqlmodel import Session, func, select
+
+from app.core.db import lock_for_write
+from app.models import Bag, Script, ScriptType, StatDimension
+from app.services.stats import apply_account_stat_increments
+
+
+def delete_bags(conditions: List[ColumnElement], session: Session) -> List[int]:
+    """
+    Delete the bags matching all ``conditions`` (on Bag columns), with their
+    scripts and feedback, and commit. Returns the deleted bag ids.
+    """
+    lock_for_write(
+        session,
+        select(Bag.id).where(*conditions),
+        select(Script.id).join(Bag).where(*conditions)
+    )
+    increments: Dict[tuple, List[float]] = {}
+    for account_id, brand, count, value in session.exec(
+        select(Bag.account_id, Bag.brand, func.count(Bag.id), func.coalesce(func.sum(Bag.price), 0))
+        .where(*conditions)
+        .group_by(Bag.account_id, Bag.brand)
+    ).all():
+        increments[(account_id, StatDimension.brand, brand)] = [-count, 0, 0, -value]
+    for account_id, script_type, count, used, likes in session.exec(
+        select(
+            Bag.account_id,
+            Script.script_type,
+            func.count(Script.id),
+            func.coalesce(func.sum(Script.used_count), 0),
+            func.coalesce(func.sum(Script.like_count), 0),
+        )
+        .join(Bag)
+        .where(*conditions)
+        .group_by(Bag.account_id, Script.script_type)
+    ).all():
+        increments[(account_id, StatDimension.script_type, ScriptType(script_type).value)] = [-count, -used, -likes, 0]
+
+    bag_ids = session.scalars(
+        delete(Bag).where(*conditions).returning(Bag.id).execution_options(synchronize_session=False)
+    ).all()
+    apply_account_stat_increments(session.connection(), increments)
+    session.commit()
+    return bag_ids
@@ -0,0 +1,253 @@
+"""
+Bulk bag import shared by the JSON (/bags/import) and file upload (/bags/import-csv) routes.
+
+Rows are validated one at a time (or in bulk by the caller, see
+``import_bag_batches``) and written in batches. Imports are idempotent: each
+bag carries an ``import_key`` (a 64-bit hash of brand, model, color and details), and
+a batch looks up its keys in one query. Rows matching a bag of the account
+with the same condition, price and authenticity are left alone, rows whose
+values changed update that bag in place (one executemany) and only the rest
+are inserted with a Core executemany. No script rows are written; imported
+bags list their default scripts (app.services.default_scripts) until they
+have their own. Each batch is committed together with its rollup counters.
+No ORM objects are built, so memory stays flat however long the sheet is.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, select
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import Bag, StatDimension
+from app.services.stats import apply_account_stat_increments
+
+BAG_COLUMNS = ("brand", "model", "color", "condition", "details", "price", "authenticity_verified")
+REQUIRED_COLUMNS = {"model": "name", "brand": "brand"}  # column -> name shown in errors
+KEY_COLUMNS = ("brand", "model", "color", "details")  # Identify a bag across imports
+UPDATE_COLUMNS = ("condition", "price", "authenticity_verified")  # Updated in place on re-import
+# From the model's max_length constraints (the column types don't carry them)
+MAX_LENGTHS = {
+    column: constraint.max_length
+    for column in BAG_COLUMNS
+    for constraint in Bag.model_fields[column].metadata
+    if getattr(constraint, "max_length", None)
+}
+
+
+def bag_import_key(values: Dict[str, Any]) -> int:
+    """
+    Stable hash of a bag's natural key, matched (per account) by later imports.
+    64 bits keeps the index small; a collision needs billions of bags per account.
+    """
+    key = "\x1f".join([str(value) if value else "" for value in map(values.get, KEY_COLUMNS)])
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+@event.listens_for(Bag, "before_insert")
+@event.listens_for(Bag, "before_update")
+def _set_import_key(mapper, connection, bag: Bag):
+    # Bags created or edited outside imports are matched by imports too
+    bag.import_key = bag_import_key({column: getattr(bag, column) for column in KEY_COLUMNS})
+
+
+def validate_bag_values(values: Dict[str, Any]):
+    """
+    Raise ValueError if a parsed row can't be stored as a Bag.
+    """
+    for column, label in REQUIRED_COLUMNS.items():
+        if not values.get(column):
+            raise ValueError(f"{label.capitalize()} is required")
+    if values.get("price") is not None and values["price"] < 0:
+        raise ValueError("Price cannot be negative")
+    for column, max_length in MAX_LENGTHS.items():
+        if isinstance(values.get(column), str) and len(values[column]) > max_length:
+            raise ValueError(f"{column} is longer than {max_length} characters")
+
+
+def bulk_import_bags(
+    rows: Iterable[Tuple[int, Any]],
+    parse_row: Callable[[Any], Dict[str, Any]],
+    account_id: int,
+    session: Session,
+    batch_size: Optional[int] = None,
+    max_errors: Optional[int] = None,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Import ``rows`` of (row number, raw row) for an account. ``parse_row`` maps a
+    raw row to Bag column values and raises ValueError (or TypeError) if it is
+    invalid; such rows are skipped and reported as "Row N: reason". Each batch
+    (``batch_size``, default IMPORT_BATCH_SIZE) is committed before the next
+    row is read, so ``rows`` can be a stream and memory stays bounded; at most
+    ``max_errors`` messages are kept. ``on_batch`` is called with the running
+    totals inside each batch's transaction, just before it commits, so callers
+    can record progress atomically with the rows.
+    """
+    return import_bag_batches(
+        _parsed_batches(rows, parse_row, batch_size or settings.IMPORT_BATCH_SIZE, max_errors),
+        account_id, session, max_errors, on_batch
+    )
+
+
+def import_bag_batches(
+    batches: Iterable[Tuple[int, List[Dict[str, Any]], List[str]]],
+    account_id: int,
+    session: Session,
+    max_errors: Optional[int] = None,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Import already validated ``batches`` of (rows read, valid Bag values,
+    error messages), committing each one; for callers that validate rows in
+    bulk. Options as for ``bulk_import_bags``.
+    """
+    total_rows = 0
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    errors = []
+
+    for rows_read, values, batch_errors in batches:
+        total_rows += rows_read
+        if max_errors is None:
+            errors.extend(batch_errors)
+        else:
+            errors.extend(batch_errors[:max_errors - len(errors)])
+        if values:
+            for name, count in _import_batch(values, account_id, session).items():
+                counts[name] += count
+            _commit_batch(_progress(total_rows, counts, errors), on_batch, session)
+
+    return _progress(total_rows, counts, errors)
+
+
+def _parsed_batches(
+    rows: Iterable[Tuple[int, Any]],
+    parse_row: Callable[[Any], Dict[str, Any]],
+    batch_size: int,
+    max_errors: Optional[int]
+) -> Iterator[Tuple[int, List[Dict[str, Any]], List[str]]]:
+    rows_read = 0
+    batch = []
+    errors = []
+    errors_kept = 0
+
+    for row_number, raw in rows:
+        rows_read += 1
+        try:
+            values = parse_row(raw)
+            validate_bag_values(values)
+        except (ValueError, TypeError) as e:
+            if max_errors is None or errors_kept < max_errors:
+                errors.append(f"Row {row_number}: {e}")
+                errors_kept += 1
+            continue
+
+        batch.append({column: values.get(column) for column in BAG_COLUMNS})
+        if len(batch) >= batch_size:
+            yield rows_read, batch, errors
+            rows_read, batch, errors = 0, [], []
+
+    if rows_read:
+        yield rows_read, batch, errors
+
+
+def _progress(total_rows: int, counts: Dict[str, int], errors: List[str]) -> Dict[str, Any]:
+    imported = sum(counts.values())
+    return {
+        "total_rows": total_rows,
+        "imported": imported,  # Valid rows: inserted, updated or unchanged
+        **counts,
+        "failed": total_rows - imported,
+        "errors": errors
+    }
+
+
+def _commit_batch(
+    progress: Dict[str, Any],
+    on_batch: Optional[Callable[[Dict[str, Any]], None]],
+    session: Session
+):
+    if on_batch is not None:
+        on_batch(progress)
+    session.commit()
+
+
+def _import_batch(
+    batch: List[Dict[str, Any]],
+    account_id: int,
+    session: Session
+) -> Dict[str, int]:
+    bag_table = Bag.__table__
+    for bag in batch:
+        bag["account_id"] = account_id
+        bag["import_key"] = bag_import_key(bag)
+
+    # Current values of the account's bags with these keys (the oldest, if
+    # duplicates predate keyed imports); rows added below join them so a key
+    # repeated within the batch updates its first row
+    current: Dict[str, Dict[str, Any]] = {}
+    for row in session.execute(
+        select(bag_table.c.id, bag_table.c.import_key, *(bag_table.c[column] for column in UPDATE_COLUMNS))
+        .where(
+            bag_table.c.account_id == account_id,
+            bag_table.c.import_key.in_(bindparam("keys", expanding=True))
+        )
+        .order_by(bag_table.c.id.desc())
+    , {"keys": list({bag["import_key"] for bag in batch})}).mappings():
+        current[row["import_key"]] = dict(row)
+
+    increments: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0, 0, 0])
+    inserts = []
+    updates = []
+    unchanged = 0
+    updated = 0
+    for bag in batch:
+        existing = current.get(bag["import_key"])
+        if existing is None:
+            inserts.append(bag)
+            current[bag["import_key"]] = bag
+        elif all(existing[column] == bag[column] for column in UPDATE_COLUMNS):
+            unchanged += 1
+        else:
+            updated += 1
+            if existing.get("id") is None:
+                # Not inserted yet; the pending row takes the new values
+                existing.update({column: bag[column] for column in UPDATE_COLUMNS})
+                continue
+            increments[(account_id, StatDimension.brand, bag["brand"])][3] += (
+                (bag["price"] or 0) - (existing["price"] or 0)
+            )
+            existing.update({column: bag[column] for column in UPDATE_COLUMNS})
+            updates.append({"bag_id": existing["id"], **{f"new_{column}": bag[column] for column in UPDATE_COLUMNS}})
+
+    if updates:
+        session.execute(
+            bag_table.update()
+            .where(bag_table.c.id == bindparam("bag_id"))
+            .values(
+                updated_at=datetime.utcnow(),
+                **{column: bindparam(f"new_{column}") for column in UPDATE_COLUMNS}
+            ),
+            updates
+        )
+    inserted = _insert_batch(inserts, increments, session) if inserts else 0
+    apply_account_stat_increments(session.connection(), increments)
+    return {"inserted": inserted, "updated": updated, "unchanged": unchanged}
+
+
+def _insert_batch(
+    batch: List[Dict[str, Any]],
+    increments: Dict[tuple, List[float]],
+    session: Session
+) -> int:
+    now = datetime.utcnow()
+    for bag in batch:
+        bag["created_at"] = bag["updated_at"] = now
+        brand = increments[(bag["account_id"], StatDimension.brand, bag["brand"])]
+        brand[0] += 1
+        brand[3] += bag["price"] or 0
+
+    session.execute(Bag.__table__.insert(), batch)
+    return len(batch)
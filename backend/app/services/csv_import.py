@@ -1,16 +1,53 @@
+import numpy as np
 import pandas as pd
 import io
-from typing import Dict, Any, List
-from sqlmodel import Session, select
-from datetime import datetime
+import itertools
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from openpyxl import load_workbook
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
 
-from app.models import Bag, BagCreate
+from app.core.config import settings
+from app.services.bag_import import (
+    BAG_COLUMNS, MAX_LENGTHS, REQUIRED_COLUMNS as BAG_REQUIRED_COLUMNS, import_bag_batches
+)
+
+REQUIRED_COLUMNS = ['name', 'brand', 'price', 'details', 'conditions']
 
 
 class CSVImportError(Exception):
     pass
 
 
+def import_bags_file(
+    file: BinaryIO,
+    file_ext: str,
+    account_id: int,
+    session: Session
+) -> Dict[str, Any]:
+    """
+    Stream bags from an uploaded CSV or Excel file (the upload is already
+    spooled to disk). Rows are read and validated in IMPORT_READ_CHUNK_SIZE
+    chunks, then inserted and committed IMPORT_BATCH_SIZE rows at a time.
+    """
+    columns, frames = read_bag_frames(file, file_ext)
+    return import_bag_frames(columns, frames, account_id, session)
+
+
+def read_bag_frames(file: BinaryIO, file_ext: str) -> Tuple[List[str], Iterator[pd.DataFrame]]:
+    """
+    Column names and a lazy iterator of row-numbered DataFrame chunks over a
+    CSV or Excel file.
+    """
+    if file_ext == 'csv':
+        return read_csv_chunks(file)
+    if file_ext == 'xlsx':
+        return read_xlsx_chunks(file)
+    # Legacy .xls has no streaming reader
+    df = pd.read_excel(file)
+    return list(df.columns), iter([number_rows(df, 2)])
+
+
 def import_bags_csv(
     df: pd.DataFrame,
     account_id: int,
@@ -19,79 +56,191 @@ def import_bags_csv(
     """
     Import bags from a DataFrame with columns: name, brand, price, details, conditions
     """
+    # Header is row 1, so data rows are numbered from 2
+    return import_bag_frames(list(df.columns), iter([number_rows(df, 2)]), account_id, session)
+
+
+def import_bag_frames(
+    columns: List[str],
+    frames: Iterable[pd.DataFrame],
+    account_id: int,
+    session: Session,
+    max_errors: int = 10,
+    on_batch: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Import row-numbered DataFrame chunks with columns: name, brand, price,
+    details, conditions. Each chunk is cleaned and validated column-wise and
+    only its valid rows reach the insert.
+    """
     # Validate required columns
-    required_columns = ['name', 'brand', 'price', 'details', 'conditions']
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
     
     if missing_columns:
         raise CSVImportError(f"Missing required columns: {', '.join(missing_columns)}")
     
-    # Initialize counters and lists
-    total_rows = len(df)
-    successful = 0
-    failed = 0
-    errors = []
+    try:
+        batches = itertools.chain.from_iterable(
+            bag_batches(frame, settings.IMPORT_BATCH_SIZE) for frame in frames
+        )
+        result = import_bag_batches(batches, account_id, session, max_errors=max_errors, on_batch=on_batch)
+    except SQLAlchemyError as e:
+        session.rollback()
+        raise CSVImportError(f"Database error: {str(e)}")
+    
+    return {
+        "total_rows": result["total_rows"],
+        "successful": result["imported"],
+        "inserted": result["inserted"],
+        "updated": result["updated"],
+        "unchanged": result["unchanged"],
+        "failed": result["failed"],
+        "errors": result["errors"]  # Limited to the first max_errors
+    }
+
+
+def number_rows(df: pd.DataFrame, first_row_number: int) -> pd.DataFrame:
+    """Index a chunk by spreadsheet row number."""
+    return df.set_axis(pd.RangeIndex(first_row_number, first_row_number + len(df)))
+
+
+def read_csv_chunks(file: BinaryIO) -> Tuple[List[str], Iterator[pd.DataFrame]]:
+    """
+    Column names and a lazy iterator of IMPORT_READ_CHUNK_SIZE-row DataFrames
+    over a CSV file, indexed by row number.
+    """
+    reader = pd.read_csv(file, chunksize=settings.IMPORT_READ_CHUNK_SIZE)
+    first_chunk = next(reader, None)
+    if first_chunk is None:
+        return [], iter(())
+    
+    def chunks():
+        row_number = 2  # Header is row 1
+        for chunk in itertools.chain([first_chunk], reader):
+            yield number_rows(chunk, row_number)
+            row_number += len(chunk)
+    
+    return list(first_chunk.columns), chunks()
+
+
+def read_xlsx_chunks(file: BinaryIO) -> Tuple[List[str], Iterator[pd.DataFrame]]:
+    """
+    Column names and a lazy iterator of IMPORT_READ_CHUNK_SIZE-row DataFrames
+    over the first sheet of an XLSX workbook, read row by row (openpyxl read-only
+    mode) and indexed by row number.
+    """
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    sheet_rows = workbook.active.iter_rows(values_only=True)
+    header = next(sheet_rows, None)
+    if header is None:
+        workbook.close()
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    columns = [str(name).strip() if name is not None else '' for name in header]
     
-    # Process each row
-    for idx, row in df.iterrows():
+    def chunks():
         try:
-            # Clean and validate data
-            name = str(row['name']).strip() if pd.notna(row['name']) else ''
-            brand = str(row['brand']).strip() if pd.notna(row['brand']) else ''
-            price = float(row['price']) if pd.notna(row['price']) else 0.0
-            details = str(row['details']).strip() if pd.notna(row['details']) else ''
-            conditions = str(row['conditions']).strip() if pd.notna(row['conditions']) else 'Good'
-            
-            # Validate required fields
-            if not name:
-                errors.append(f"Row {idx + 2}: Name is required")
-                failed += 1
-                continue
-                
-            if not brand:
-                errors.append(f"Row {idx + 2}: Brand is required")
-                failed += 1
-                continue
-            
-            # Create bag object
-            # Note: 'model' field in database is populated with 'name' value
-            bag = Bag(
-                brand=brand,
-                model=name,  # Using 'name' for the model field
-                color="N/A",  # Default color as it's not in the new format
-                condition=conditions,
-                details=details,
-                price=price,
-                authenticity_verified=False,  # Default value
-                account_id=account_id,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
+            numbered = (
+                (row_number, values)
+                for row_number, values in enumerate(sheet_rows, start=2)
+                if not all(value is None for value in values)  # Blank rows, as pandas skips them
             )
-            
-            session.add(bag)
-            successful += 1
-            
-        except ValueError as e:
-            errors.append(f"Row {idx + 2}: Invalid price value - {str(e)}")
-            failed += 1
-        except Exception as e:
-            errors.append(f"Row {idx + 2}: {str(e)}")
-            failed += 1
+            while True:
+                batch = list(itertools.islice(numbered, settings.IMPORT_READ_CHUNK_SIZE))
+                if not batch:
+                    break
+                row_numbers, values = zip(*batch)
+                yield pd.DataFrame.from_records(
+                    [row[:len(columns)] for row in values], columns=columns, index=row_numbers
+                )
+        finally:
+            workbook.close()
     
-    # Commit if there were successful imports
-    if successful > 0:
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise CSVImportError(f"Database error: {str(e)}")
+    return columns, chunks()
+
+
+def skip_rows(frames: Iterable[pd.DataFrame], count: int) -> Iterator[pd.DataFrame]:
+    """Drop the first ``count`` rows of a stream of chunks."""
+    for frame in frames:
+        if count >= len(frame):
+            count -= len(frame)
+            continue
+        yield frame.iloc[count:]
+        count = 0
+
+
+def bag_batches(
+    frame: pd.DataFrame,
+    batch_size: int
+) -> Iterator[Tuple[int, List[Dict[str, Any]], List[str]]]:
+    """
+    Clean and validate a chunk in one pass, then split it into batches of
+    ``batch_size`` rows: (rows read, valid Bag values, "Row N: reason" errors),
+    as taken by ``import_bag_batches``.
+    """
+    cleaned = clean_bag_frame(frame)
+    row_numbers = cleaned.index.tolist()
+    row_errors = cleaned["error"].tolist()
+    # Column-wise tolist() is far cheaper than to_dict("records")
+    rows = list(zip(*(cleaned[column].tolist() for column in BAG_COLUMNS)))
     
-    return {
-        "total_rows": total_rows,
-        "successful": successful,
-        "failed": failed,
-        "errors": errors[:10]  # Limit errors to first 10
-    }
+    for start in range(0, len(rows), batch_size):
+        values = []
+        errors = []
+        for row_number, error, row in zip(
+            row_numbers[start:start + batch_size],
+            row_errors[start:start + batch_size],
+            rows[start:start + batch_size]
+        ):
+            if isinstance(error, str):
+                errors.append(f"Row {row_number}: {error}")
+            else:
+                values.append(dict(zip(BAG_COLUMNS, row)))
+        yield min(batch_size, len(rows) - start), values, errors
+
+
+def _text_column(column: pd.Series, default: str) -> pd.Series:
+    present = column.notna()
+    return column.astype(str).str.strip().where(present, default)
+
+
+def clean_bag_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map spreadsheet rows to Bag values, a whole chunk at a time; the 'name'
+    column populates 'model'. Adds an 'error' column holding the first
+    problem with each row (null for valid rows).
+    """
+    raw_price = df['price']
+    price = pd.to_numeric(raw_price, errors='coerce')
+    
+    values = pd.DataFrame({
+        "brand": _text_column(df['brand'], ''),
+        "model": _text_column(df['name'], ''),
+        "color": "N/A",  # Default color as it's not in the new format
+        "condition": _text_column(df['conditions'], 'Good'),
+        "details": _text_column(df['details'], ''),
+        "price": price.fillna(0.0).astype(float),
+        "authenticity_verified": False
+    }, index=df.index)
+    
+    # Same checks (and messages) as validate_bag_values, first failing check wins
+    checks = [
+        (raw_price.notna() & price.isna(), "Invalid price value - '" + raw_price.astype(str) + "' is not a number"),
+        *[
+            (values[column] == '', f"{label.capitalize()} is required")
+            for column, label in BAG_REQUIRED_COLUMNS.items()
+        ],
+        (values["price"] < 0, "Price cannot be negative"),
+        *[
+            (values[column].str.len() > max_length, f"{column} is longer than {max_length} characters")
+            for column, max_length in MAX_LENGTHS.items()
+        ],
+    ]
+    values["error"] = np.select(
+        [failed.to_numpy() for failed, _ in checks],
+        [message.to_numpy() if isinstance(message, pd.Series) else message for _, message in checks],
+        default=None
+    )
+    return values
 
 
 def generate_template_excel() -> bytes:
@@ -0,0 +1,112 @@
+"""
+Default (starter) scripts for bags without scripts of their own.
+
+Creating or importing a bag writes no Script rows. Instead, while a bag has
+none, its five default scripts are rendered on demand from
+``DEFAULT_SCRIPT_TEMPLATES`` (compiled once, at import) by the script
+listings and the teleprompter payload. They are persisted, all five at once
+so the bag keeps its full set, only when one of them is edited or used.
+Saving holds the database write lock from the "no scripts yet" check to the
+commit, so two devices using a default script at once save one set.
+"""
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.core.db import lock_for_write
+from app.models import Bag, Script, ScriptRead, ScriptType
+
+# Per type, the first template whose fields are all set on the bag is used;
+# the last one is the fallback, rendered with missing fields left empty
+DEFAULT_SCRIPT_TEMPLATES: Dict[ScriptType, List[str]] = {
+    ScriptType.hook: ["Check out this amazing {brand} {model}!"],
+    ScriptType.look: [
+        "Look at these details: {details:.100}...",
+        "Look at this beautiful {color} color and exquisite craftsmanship!",
+    ],
+    ScriptType.story: [
+        "{details:.150}...",
+        "This {brand} piece represents timeless luxury and style.",
+    ],
+    ScriptType.value: [
+        "Amazing value at ${price} - {condition} condition!",
+        "High-quality {condition} condition - exceptional value!",
+    ],
+    ScriptType.cta: ["Don't miss out on this incredible piece - grab it now!"],
+}
+
+# (literal text, bag field or None, format spec) pieces of one template
+CompiledTemplate = List[Tuple[str, Optional[str], str]]
+
+
+def _compile(template: str) -> Tuple[Tuple[str, ...], CompiledTemplate]:
+    parts = [(literal, field, spec) for literal, field, spec, _ in Formatter().parse(template)]
+    return tuple(field for _, field, _ in parts if field), parts
+
+
+_COMPILED_TEMPLATES = {
+    script_type: [_compile(template) for template in templates]
+    for script_type, templates in DEFAULT_SCRIPT_TEMPLATES.items()
+}
+
+
+def _render(parts: CompiledTemplate, bag: Bag) -> str:
+    return "".join(
+        literal + (format(getattr(bag, field) or "", spec) if field else "")
+        for literal, field, spec in parts
+    )
+
+
+def render_default_scripts(bag: Bag) -> List[Tuple[ScriptType, str]]:
+    """
+    (type, content) of a bag's default scripts, in ScriptType order.
+    """
+    rendered = []
+    for script_type, templates in _COMPILED_TEMPLATES.items():
+        _, parts = next(
+            (template for template in templates if all(getattr(bag, field) for field in template[0])),
+            templates[-1]
+        )
+        rendered.append((script_type, _render(parts, bag)))
+    return rendered
+
+
+def default_scripts(bag: Bag) -> List[Script]:
+    """
+    Unsaved Script rows for a bag's default scripts.
+    """
+    return [
+        Script(bag_id=bag.id, script_type=script_type, content=content)
+        for script_type, content in render_default_scripts(bag)
+    ]
+
+
+def default_script_reads(bag: Bag) -> List[ScriptRead]:
+    """
+    A bag's default scripts as listed by the API: not persisted, so without
+    an id; edit or use them through /bag/{bag_id}/default-scripts/{type}.
+    """
+    return [
+        ScriptRead(
+            id=None, bag_id=bag.id, script_type=script_type, content=content,
+            created_at=bag.created_at, updated_at=bag.created_at, is_default=True
+        )
+        for script_type, content in render_default_scripts(bag)
+    ]
+
+
+def materialize_default_script(bag: Bag, script_type: ScriptType, session: Session) -> Optional[Script]:
+    """
+    Persist (without committing) a bag's default scripts and return the one
+    of ``script_type``, or None if the bag already has scripts of its own (or
+    no default of that type). Holds the write lock until the caller commits.
+    """
+    lock_for_write(session, select(Bag.id).where(Bag.id == bag.id))
+    if session.exec(select(Script.id).where(Script.bag_id == bag.id).limit(1)).first() is not None:
+        return None
+
+    scripts = default_scripts(bag)
+    session.add_all(scripts)
+    return next((script for script in scripts if script.script_type == script_type), None)
+
@@ -0,0 +1,194 @@
+"""
+Streaming exports of bags, scripts and feedback as NDJSON, CSV or Parquet.
+
+Rows are read through a server-side cursor (``yield_per``) in batches of
+EXPORT_BATCH_SIZE and each batch is encoded and handed on before the next
+is fetched, so memory stays flat however many rows an account has: NDJSON
+and CSV yield the batch's lines, Parquet writes it as one row group and
+yields the bytes written so far (the footer comes last). The response body
+is produced after the route returns, so exports read in their own session
+on the request's engine.
+"""
+import csv
+import enum
+import io
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Select
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.responses import read_columns
+from app.models import Bag, BagRead, Feedback, FeedbackRead, Script
+
+
+class ExportDataset(str, enum.Enum):
+    bags = "bags"
+    scripts = "scripts"
+    feedback = "feedback"
+
+
+class ExportFormat(str, enum.Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+    parquet = "parquet"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+}
+
+SCRIPT_EXPORT_COLUMNS = [
+    Script.id, Script.bag_id, Script.script_type, Script.content,
+    Script.used_count, Script.like_count, Script.created_at, Script.updated_at,
+]
+
+ARROW_TYPES = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(), datetime: pa.timestamp("us")}
+
+
+def export_statement(dataset: ExportDataset, account_filter: Optional[int]) -> Select:
+    """
+    The dataset's columns, in id order, for one account or (``None``) all of them.
+    """
+    if dataset == ExportDataset.bags:
+        statement = select(*read_columns(BagRead, Bag))
+        order = Bag.id
+    elif dataset == ExportDataset.scripts:
+        statement = select(*SCRIPT_EXPORT_COLUMNS).join(Bag)
+        order = Script.id
+    else:
+        statement = select(*read_columns(FeedbackRead, Feedback)).join(Script).join(Bag)
+        order = Feedback.id
+    if account_filter is not None:
+        statement = statement.where(Bag.account_id == account_filter)
+    return statement.order_by(order)
+
+
+def export_chunks(
+    dataset: ExportDataset,
+    export_format: ExportFormat,
+    account_filter: Optional[int],
+    bind: Engine,
+    batch_size: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    The encoded export, one chunk per batch of rows (a StreamingResponse body).
+    """
+    statement = export_statement(dataset, account_filter)
+    columns = list(statement.selected_columns)
+    with Session(bind) as session:
+        result = session.execute(statement.execution_options(yield_per=batch_size or settings.EXPORT_BATCH_SIZE))
+        batches = result.partitions()
+        if export_format == ExportFormat.ndjson:
+            yield from _ndjson_chunks(columns, batches)
+        elif export_format == ExportFormat.csv:
+            yield from _csv_chunks(columns, batches)
+        else:
+            yield from _parquet_chunks(columns, batches)
+
+
+def _python_type(column) -> type:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return str  # SQLModel's AutoString
+
+
+def _converters(columns: List[Any], iso_datetimes: bool) -> List[Optional[Callable[[Any], Any]]]:
+    """
+    Per column, the conversion to a plain value (enum members to their values,
+    datetimes optionally to ISO strings) or None where values pass as they are.
+    """
+    converters = []
+    for column in columns:
+        python_type = _python_type(column)
+        if issubclass(python_type, enum.Enum):
+            converters.append(lambda value: None if value is None else value.value)
+        elif iso_datetimes and python_type is datetime:
+            converters.append(lambda value: None if value is None else value.isoformat())
+        else:
+            converters.append(None)
+    return converters
+
+
+def _plain_rows(rows: Sequence[Sequence[Any]], converters: List[Optional[Callable[[Any], Any]]]) -> Iterable:
+    if not any(converters):
+        return rows
+    return (
+        [value if convert is None else convert(value) for value, convert in zip(row, converters)]
+        for row in rows
+    )
+
+
+def _ndjson_chunks(columns: List[Any], batches: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    # orjson writes datetimes and enums itself
+    names = [column.name for column in columns]
+    for rows in batches:
+        yield b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in rows)
+
+
+def _csv_chunks(columns: List[Any], batches: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    converters = _converters(columns, iso_datetimes=True)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in columns])
+    for rows in batches:
+        writer.writerows(_plain_rows(rows, converters))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # header of an empty export
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file collecting what the Parquet writer writes until taken;
+    ``tell`` keeps counting from the start of the file for the footer offsets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self.chunks.append(chunk)
+        self.position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self.position
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _parquet_chunks(columns: List[Any], batches: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    schema = pa.schema([
+        (column.name, ARROW_TYPES.get(_python_type(column), pa.string())) for column in columns
+    ])
+    converters = _converters(columns, iso_datetimes=False)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in batches:
+            values = list(zip(*_plain_rows(rows, converters)))
+            writer.write_batch(pa.record_batch(
+                [pa.array(column_values, type=field.type) for column_values, field in zip(values, schema)],
+                schema=schema
+            ))
+            yield sink.take()
+    yield sink.take()
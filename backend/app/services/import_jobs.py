@@ -0,0 +1,216 @@
+"""
+Background bag imports.
+
+An upload is saved under IMPORT_JOB_DIR and recorded as an ``ImportJob``;
+the request returns straight away and the import runs on ``import_executor``.
+Progress is stored on the job in the same transaction as each committed
+batch, so after a restart (or a crash) the job resumes from the first row
+that wasn't committed. Every update is pushed to the account's WebSocket
+clients as an ``import_progress`` frame.
+
+Jobs run in the server process, like the WebSocket manager, so this assumes
+a single server process per database.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.executors import import_executor, run_in_session
+from app.models import ImportJob, ImportJobRead, ImportJobStatus
+from app.services.csv_import import import_bag_frames, read_bag_frames, skip_rows
+from app.services.websocket_manager import send_import_progress
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED_STATUSES = (ImportJobStatus.pending, ImportJobStatus.running)
+PROGRESS_COUNTS = ("imported", "inserted", "updated", "unchanged")  # Kept on the job as rows_<name>
+
+# Set on shutdown; running jobs stop before their next chunk and resume on startup
+_stopping = threading.Event()
+# Keeps submitted jobs' tasks referenced until they finish
+_tasks: Set[asyncio.Task] = set()
+
+
+class ImportInterrupted(Exception):
+    """Raised inside a job when the server is shutting down."""
+    pass
+
+
+def job_file_path(job: ImportJob) -> str:
+    return os.path.join(settings.IMPORT_JOB_DIR, f"{job.id}.{job.file_ext}")
+
+
+def create_import_job(
+    upload: BinaryIO,
+    filename: str,
+    file_ext: str,
+    account_id: int,
+    session: Session
+) -> ImportJob:
+    """
+    Record a pending job and keep a copy of the upload for it to read.
+    """
+    job = ImportJob(filename=filename[:255], file_ext=file_ext, account_id=account_id)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+
+    try:
+        os.makedirs(settings.IMPORT_JOB_DIR, exist_ok=True)
+        with open(job_file_path(job), "wb") as destination:
+            shutil.copyfileobj(upload, destination)
+    except OSError:
+        session.delete(job)
+        session.commit()
+        raise
+
+    return job
+
+
+def submit_import_job(job_id: int, bind: Engine):
+    """
+    Queue a job on the import executor. Must be called from the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    task = loop.create_task(import_executor.run(run_import_job, job_id, bind, loop))
+    _tasks.add(task)
+    task.add_done_callback(_job_done)
+
+
+def _job_done(task: asyncio.Task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Import job crashed: {task.exception()}")
+
+
+def _snapshot(job: ImportJob) -> Dict[str, Any]:
+    return ImportJobRead.model_validate(job).model_dump(mode="json")
+
+
+def _publish(job: Dict[str, Any], loop: asyncio.AbstractEventLoop):
+    if not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(send_import_progress(job["account_id"], job), loop)
+
+
+def _save(job: ImportJob, loop: asyncio.AbstractEventLoop, session: Session):
+    job.updated_at = datetime.utcnow()
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    _publish(_snapshot(job), loop)
+
+
+def _interruptible(frames: Iterator) -> Iterator:
+    for frame in frames:
+        if _stopping.is_set():
+            raise ImportInterrupted()
+        yield frame
+
+
+def run_import_job(job_id: int, bind: Engine, loop: asyncio.AbstractEventLoop):
+    """
+    Run (or resume) a job to completion on the calling thread.
+    """
+    if _stopping.is_set():
+        return  # Queued when the server began shutting down; resumed on startup
+
+    with Session(bind) as session:
+        job = session.get(ImportJob, job_id)
+        if job is None or job.status not in UNFINISHED_STATUSES:
+            return
+
+        path = job_file_path(job)
+        if not os.path.exists(path):
+            job.status = ImportJobStatus.failed
+            job.error = "Uploaded file is no longer available"
+            job.finished_at = datetime.utcnow()
+            _save(job, loop, session)
+            return
+
+        job.status = ImportJobStatus.running
+        _save(job, loop, session)
+
+        # Counters already committed by an earlier run of this job
+        skip = job.rows_processed
+        base_counts = {name: getattr(job, f"rows_{name}") for name in PROGRESS_COUNTS}
+        base_errors = list(job.errors)
+        snapshot: Dict[str, Any] = {}
+
+        def record_progress(progress: Dict[str, Any]):
+            # Runs inside the batch's transaction, so the counters commit with the rows
+            job.rows_processed = skip + progress["total_rows"]
+            for name, base in base_counts.items():
+                setattr(job, f"rows_{name}", base + progress[name])
+            job.rows_failed = job.rows_processed - job.rows_imported
+            job.errors = (base_errors + progress["errors"])[:settings.IMPORT_JOB_MAX_ERRORS]
+            job.updated_at = datetime.utcnow()
+            session.add(job)
+            session.flush()
+            snapshot["job"] = _snapshot(job)
+
+        @event.listens_for(session, "after_commit")
+        def publish_progress(session):
+            if "job" in snapshot:
+                _publish(snapshot.pop("job"), loop)
+
+        try:
+            with open(path, "rb") as file:
+                columns, frames = read_bag_frames(file, job.file_ext)
+                import_bag_frames(
+                    columns, _interruptible(skip_rows(frames, skip)), job.account_id, session,
+                    max_errors=settings.IMPORT_JOB_MAX_ERRORS, on_batch=record_progress
+                )
+        except ImportInterrupted:
+            session.rollback()
+            logger.info(f"Import job {job_id} interrupted at row {job.rows_processed}; it resumes on startup")
+            return
+        except Exception as e:
+            session.rollback()
+            job.status = ImportJobStatus.failed
+            job.error = str(e)[:1000] or type(e).__name__
+        else:
+            job.status = ImportJobStatus.completed
+        finally:
+            event.remove(session, "after_commit", publish_progress)
+
+        job.finished_at = datetime.utcnow()
+        _save(job, loop, session)
+        os.remove(path)
+
+
+def _unfinished_job_ids(session: Session) -> list:
+    return session.exec(
+        select(ImportJob.id).where(ImportJob.status.in_(UNFINISHED_STATUSES)).order_by(ImportJob.id)
+    ).all()
+
+
+async def resume_import_jobs():
+    """
+    Requeue jobs left pending or running by the previous server process.
+    """
+    _stopping.clear()
+    job_ids = await run_in_session(_unfinished_job_ids)
+    for job_id in job_ids:
+        submit_import_job(job_id, engine)
+    if job_ids:
+        logger.info(f"Resumed {len(job_ids)} import job(s)")
+
+
+async def stop_import_jobs():
+    """
+    Ask running jobs to stop after their current chunk and wait for them to
+    roll back; their committed progress is kept for the next startup.
+    """
+    _stopping.set()
+    if _tasks:
+        await asyncio.wait(list(_tasks), timeout=settings.IMPORT_JOB_STOP_TIMEOUT_SECONDS)
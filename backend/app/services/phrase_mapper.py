@@ -22,21 +22,34 @@ BANNED_TERMS = [
 ]
 
 
-def apply_phrase_map(text: str, account_id: int, session: Session) -> tuple[str, List[str]]:
+def get_active_phrase_maps(account_id: int, session: Session) -> List[PhraseMap]:
+    """
+    Active phrase mapping rules of an account.
+    """
+    statement = select(PhraseMap).where(
+        PhraseMap.account_id == account_id,
+        PhraseMap.active == True
+    )
+    return session.exec(statement).all()
+
+
+def apply_phrase_map(
+    text: str,
+    account_id: int,
+    session: Session,
+    phrase_maps: Optional[List[PhraseMap]] = None
+) -> tuple[str, List[str]]:
     """
     Apply phrase mapping rules to text and check for banned terms.
+    Pass ``phrase_maps`` when processing many texts to load the rules only once.
     
     Returns:
         tuple: (processed_text, warnings)
     """
     warnings = []
     
-    # Get active phrase maps for the account
-    statement = select(PhraseMap).where(
-        PhraseMap.account_id == account_id,
-        PhraseMap.active == True
-    )
-    phrase_maps = session.exec(statement).all()
+    if phrase_maps is None:
+        phrase_maps = get_active_phrase_maps(account_id, session)
     
     # Apply phrase replacements
     processed_text = text
@@ -68,13 +81,14 @@ def apply_phrase_map_to_script_content(
     content: str, 
     script_type: str,
     account_id: int, 
-    session: Session
+    session: Session,
+    phrase_maps: Optional[List[PhraseMap]] = None
 ) -> tuple[str, List[str]]:
     """
     Apply phrase mapping specifically to script content with type-specific rules.
     """
     # Apply general phrase mapping
-    processed_content, warnings = apply_phrase_map(content, account_id, session)
+    processed_content, warnings = apply_phrase_map(content, account_id, session, phrase_maps)
     
     # Add type-specific processing if needed
     if script_type == "hook":
@@ -101,6 +115,7 @@ def bulk_apply_phrase_map(account_id: int, session: Session) -> dict:
     # Get all scripts for the account
     statement = select(Script).join(Bag).where(Bag.account_id == account_id)
     scripts = session.exec(statement).all()
+    phrase_maps = get_active_phrase_maps(account_id, session)
     
     updated_count = 0
     total_warnings = []
@@ -111,7 +126,8 @@ def bulk_apply_phrase_map(account_id: int, session: Session) -> dict:
             original_content, 
             script.script_type,
             account_id, 
-            session
+            session,
+            phrase_maps
         )
         
         if processed_content != original_content:
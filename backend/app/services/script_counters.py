@@ -0,0 +1,100 @@
+"""
+Atomic writes of script counters (used_count, like_count).
+
+Each write is one UPDATE that computes the new value in SQL and returns it
+(UPDATE ... RETURNING), with the account check in its WHERE clause: there is
+no SELECT before it, and concurrent writes from several devices queue on the
+row instead of overwriting each other's increments. The statements bypass
+the ORM's flush, so they add their change to the accountstat rollup and bump
+the account's revision themselves (see app.services.stats), in the caller's
+transaction; the caller commits.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, case, cast, update
+from sqlalchemy.engine import Row
+from sqlmodel import Session, select
+
+from app.models import AccountStat, Bag, Script, ScriptType, StatDimension
+from app.services.stats import apply_account_stat_increments, bump_account_revisions
+
+
+def _script_conditions(script_id: int, account_filter: Optional[int]) -> list:
+    conditions = [Script.id == script_id]
+    if account_filter is not None:
+        conditions.append(Script.bag_id.in_(select(Bag.id).where(Bag.account_id == account_filter)))
+    return conditions
+
+
+def _returning(statement):
+    owner = select(Bag.account_id).where(Bag.id == Script.bag_id).scalar_subquery()
+    return statement.returning(
+        Script.id, Script.script_type, Script.used_count, Script.like_count, owner.label("account_id")
+    )
+
+
+def script_accessible(script_id: int, account_filter: Optional[int], session: Session) -> bool:
+    """
+    Whether the script exists and is within ``account_filter``.
+    """
+    return session.exec(select(Script.id).where(*_script_conditions(script_id, account_filter))).first() is not None
+
+
+def increment_script_counters(
+    script_id: int,
+    used: int,
+    likes: int,
+    account_filter: Optional[int],
+    session: Session
+) -> Optional[Row]:
+    """
+    Add ``used`` and ``likes`` to a script's counters. Returns the script's id,
+    script_type, used_count, like_count and account_id after the write, or
+    None if it doesn't exist, is outside ``account_filter``, or has fewer
+    likes than ``likes`` takes away (counters don't go below 0).
+    """
+    conditions = _script_conditions(script_id, account_filter)
+    if likes < 0:
+        conditions.append(Script.like_count >= -likes)
+    row = session.execute(_returning(
+        update(Script).where(*conditions).values(
+            used_count=Script.used_count + used,
+            like_count=Script.like_count + likes,
+            updated_at=datetime.utcnow()
+        )
+    )).first()
+    if row is not None:
+        apply_account_stat_increments(session.connection(), {
+            (row.account_id, StatDimension.script_type, ScriptType(row.script_type).value): [0, used, likes, 0]
+        })
+    return row
+
+
+def toggle_script_favorite(script_id: int, account_filter: Optional[int], session: Session) -> Optional[Row]:
+    """
+    Flip a script between favorite (15 likes) and not (5). Returns the same
+    row as ``increment_script_counters``, or None if the script doesn't exist
+    or is outside ``account_filter``.
+    """
+    conditions = _script_conditions(script_id, account_filter)
+    toggled = case((Script.like_count > 10, 5), else_=15)
+    # The new count doesn't tell what the old one was, so the rollup takes the
+    # difference first, reading (and on PostgreSQL locking) the script row in
+    # the same statement; the script UPDATE then sees the same count
+    difference = select(toggled - Script.like_count).where(*conditions).with_for_update().scalar_subquery()
+    owner = select(Bag.account_id).join(Script).where(*conditions).scalar_subquery()
+    script_type = select(cast(Script.script_type, String)).where(*conditions).scalar_subquery()
+    session.execute(
+        update(AccountStat).where(
+            AccountStat.account_id == owner,
+            AccountStat.dimension == StatDimension.script_type,
+            AccountStat.name == script_type
+        ).values(like_count=AccountStat.like_count + difference)
+    )
+    row = session.execute(_returning(
+        update(Script).where(*conditions).values(like_count=toggled, updated_at=datetime.utcnow())
+    )).first()
+    if row is not None:
+        bump_account_revisions(session.connection(), {row.account_id})
+    return row
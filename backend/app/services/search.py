@@ -0,0 +1,113 @@
+"""
+Full-text search over bags (brand, model, color, details) and script content.
+
+On SQLite the queries MATCH the FTS5 tables created with the bag and script
+tables (see ``fts5_ddl`` in app.models) and rank by bm25; on Postgres they
+match the GIN-indexed ``search_vector`` expressions and rank by ts_rank.
+Queries are reduced to their words, each matched as a prefix, so partial
+words typed mid-stream already match and user input can't break the syntax.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import ColumnElement, column, func, literal, literal_column, select, table, union_all
+from sqlmodel import Session
+
+from app.models import Bag, Script, search_vector
+
+WORD = re.compile(r"\w+")
+
+_fts_tables = {name: table(f"{name}_fts", column("rowid")) for name in ("bag", "script")}
+
+
+def search_words(query: str) -> List[str]:
+    return WORD.findall(query.lower())
+
+
+def _match(name: str, words: List[str], dialect: str):
+    """
+    (condition, rank, extra FROM) matching the ``name`` table's rows against
+    ``words``; lower rank is better.
+    """
+    if dialect == "postgresql":
+        model = Bag if name == "bag" else Script
+        vector = search_vector(model.__table__)
+        query = func.to_tsquery(literal("simple", literal_execute=True), " & ".join(f"{word}:*" for word in words))
+        return vector.op("@@")(query), -func.ts_rank(vector, query), None
+
+    fts = _fts_tables[name]
+    expression = " ".join(f'"{word}"*' for word in words)
+    return (
+        literal_column(f"{name}_fts").op("MATCH")(expression),
+        literal_column(f"bm25({name}_fts)"),
+        fts
+    )
+
+
+def bag_search_condition(query: str, dialect: str) -> ColumnElement:
+    """
+    Condition on Bag selecting the bags whose text matches ``query``.
+    """
+    words = search_words(query)
+    if not words:
+        return Bag.id.is_(None)
+    condition, _, fts = _match("bag", words, dialect)
+    if fts is None:
+        return condition
+    return Bag.id.in_(select(fts.c.rowid).where(condition))
+
+
+def search(
+    query: str,
+    account_filter: Optional[int],
+    offset: int,
+    limit: int,
+    session: Session
+) -> List[Dict[str, Any]]:
+    """
+    Bags and scripts matching ``query``, best first: ``limit`` results after
+    skipping ``offset``. Each has its type ("bag" or "script"), id, bag_id,
+    title (the bag's brand and model), content and rank.
+    """
+    words = search_words(query)
+    if not words:
+        return []
+    dialect = session.get_bind().dialect.name
+
+    bag_condition, bag_rank, bag_fts = _match("bag", words, dialect)
+    bags = select(
+        literal("bag").label("type"),
+        Bag.id.label("id"),
+        Bag.id.label("bag_id"),
+        (Bag.brand + " " + Bag.model).label("title"),
+        Bag.details.label("content"),
+        bag_rank.label("rank"),
+    ).where(bag_condition)
+    if bag_fts is not None:
+        bags = bags.select_from(bag_fts).join(Bag, Bag.id == bag_fts.c.rowid)
+
+    script_condition, script_rank, script_fts = _match("script", words, dialect)
+    scripts = select(
+        literal("script").label("type"),
+        Script.id.label("id"),
+        Script.bag_id.label("bag_id"),
+        (Bag.brand + " " + Bag.model).label("title"),
+        Script.content.label("content"),
+        script_rank.label("rank"),
+    ).where(script_condition)
+    if script_fts is not None:
+        scripts = scripts.select_from(script_fts).join(Script, Script.id == script_fts.c.rowid)
+    scripts = scripts.join(Bag, Bag.id == Script.bag_id)
+
+    if account_filter is not None:
+        bags = bags.where(Bag.account_id == account_filter)
+        scripts = scripts.where(Bag.account_id == account_filter)
+
+    results = union_all(bags, scripts).subquery()
+    statement = (
+        select(results)
+        .order_by(results.c.rank, results.c.type, results.c.id)
+        .offset(offset)
+        .limit(limit)
+    )
+    return [dict(row) for row in session.execute(statement).mappings()]
@@ -0,0 +1,331 @@
+"""
+Per-account rollup of inventory and script counters (the ``accountstat`` table).
+
+Bag and Script writes queue counter deltas from mapper events; after each
+flush the deltas are applied as one batched upsert on the flushing
+connection, so the rollup commits or rolls back with the rows it describes.
+Bulk writes that bypass the ORM call ``apply_account_stat_increments``
+themselves (the bag importer does); anything else (raw SQL, other tools) is
+not seen, and drift is repaired with ``python -m app.rebuild_stats``.
+
+The same deltas bump ``Account.revision`` for every account whose bags or
+scripts were written, including edits that move no counter, so the revision
+changes whenever anything listed under the account does (see app.core.etags).
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, event, inspect, or_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session as OrmSession, object_session
+from sqlmodel import Session, func, select
+
+from app.models import Account, AccountStat, Bag, Script, ScriptType, StatDimension
+
+COUNTER_COLUMNS = ("item_count", "used_count", "like_count", "total_value")
+
+# session.info key holding deltas queued during the current flush:
+# (account_id or None, bag_id, dimension, name, item_count, used_count, like_count, total_value)
+_DELTAS_KEY = "account_stat_deltas"
+
+
+def _bag_counters(account_id: int, brand: str, price: Optional[float]) -> tuple:
+    return (account_id, None, StatDimension.brand, brand, 1, 0, 0, price or 0)
+
+
+def _script_counters(bag_id: int, script_type, used_count: int, like_count: int) -> tuple:
+    return (None, bag_id, StatDimension.script_type, ScriptType(script_type).value, 1, used_count, like_count, 0)
+
+
+def _queue(target, counters: tuple, sign: int):
+    session = object_session(target)
+    account_id, bag_id, dimension, name, *values = counters
+    if account_id is None:
+        # Scripts count towards their bag's account; use the bag if this session
+        # has it loaded (an expired one would be refreshed row by row)
+        bag = session.identity_map.get(inspect(Bag).identity_key_from_primary_key((bag_id,)))
+        if bag is not None:
+            account_id = inspect(bag).dict.get("account_id")
+    session.info.setdefault(_DELTAS_KEY, []).append(
+        (account_id, bag_id, dimension, name, *(sign * value for value in values))
+    )
+
+
+def _previous_values(target, attributes: Tuple[str, ...]) -> Optional[list]:
+    """
+    Values of ``attributes`` before this flush, or None if none of them changed.
+    """
+    state = inspect(target)
+    histories = [state.attrs[attribute].history for attribute in attributes]
+    if not any(history.has_changes() for history in histories):
+        return None
+    return [
+        history.deleted[0] if history.deleted else getattr(target, attribute)
+        for attribute, history in zip(attributes, histories)
+    ]
+
+
+def _edited(target) -> bool:
+    """
+    Whether a flushed update changed any column (after_update also runs for
+    objects that were only marked dirty). Such edits queue zero deltas, which
+    move no counter but still bump the account's revision.
+    """
+    state = inspect(target)
+    return any(state.attrs[column.key].history.has_changes() for column in state.mapper.column_attrs)
+
+
+def _load_replaced_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Overwriting an expired attribute would otherwise leave no old value in its
+# history; active_history loads it first so the delta is still known
+for _attribute in (
+    Bag.account_id, Bag.brand, Bag.price,
+    Script.bag_id, Script.script_type, Script.used_count, Script.like_count
+):
+    event.listen(_attribute, "set", _load_replaced_value, active_history=True)
+
+
+@event.listens_for(Bag, "after_insert")
+def _bag_inserted(mapper, connection, bag: Bag):
+    _queue(bag, _bag_counters(bag.account_id, bag.brand, bag.price), 1)
+
+
+@event.listens_for(Bag, "after_update")
+def _bag_updated(mapper, connection, bag: Bag):
+    previous = _previous_values(bag, ("account_id", "brand", "price"))
+    if previous is not None:
+        _queue(bag, _bag_counters(*previous), -1)
+        _queue(bag, _bag_counters(bag.account_id, bag.brand, bag.price), 1)
+    elif _edited(bag):
+        _queue(bag, _bag_counters(bag.account_id, bag.brand, bag.price), 0)
+
+
+@event.listens_for(Bag, "after_delete")
+def _bag_deleted(mapper, connection, bag: Bag):
+    _queue(bag, _bag_counters(bag.account_id, bag.brand, bag.price), -1)
+
+
+@event.listens_for(Script, "after_insert")
+def _script_inserted(mapper, connection, script: Script):
+    _queue(script, _script_counters(script.bag_id, script.script_type, script.used_count, script.like_count), 1)
+
+
+@event.listens_for(Script, "after_update")
+def _script_updated(mapper, connection, script: Script):
+    previous = _previous_values(script, ("bag_id", "script_type", "used_count", "like_count"))
+    if previous is not None:
+        _queue(script, _script_counters(*previous), -1)
+        _queue(script, _script_counters(script.bag_id, script.script_type, script.used_count, script.like_count), 1)
+    elif _edited(script):
+        _queue(script, _script_counters(script.bag_id, script.script_type, script.used_count, script.like_count), 0)
+
+
+@event.listens_for(Script, "after_delete")
+def _script_deleted(mapper, connection, script: Script):
+    _queue(script, _script_counters(script.bag_id, script.script_type, script.used_count, script.like_count), -1)
+
+
+def _upsert_statement(dialect_name: str):
+    table = AccountStat.__table__
+    insert = postgresql_insert if dialect_name == "postgresql" else sqlite_insert
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.account_id, table.c.dimension, table.c.name],
+        set_={column: table.c[column] + statement.excluded[column] for column in COUNTER_COLUMNS},
+    )
+
+
+def apply_account_stat_increments(connection, totals: Dict[tuple, List[float]]):
+    """
+    Add counters to the rollup in one batched upsert and bump the revision of
+    every account in ``totals``, even where all its increments are zero.
+    ``totals`` maps (account_id, dimension, name) to item_count, used_count,
+    like_count and total_value increments. For writes that bypass the ORM
+    (bulk inserts).
+    """
+    _upsert_account_stats(connection, totals)
+    bump_account_revisions(connection, {account_id for account_id, _, _ in totals})
+
+
+def _upsert_account_stats(connection, totals: Dict[tuple, List[float]]):
+    rows = [
+        {"account_id": account_id, "dimension": dimension, "name": name, **dict(zip(COUNTER_COLUMNS, values))}
+        for (account_id, dimension, name), values in totals.items()
+        if any(values)
+    ]
+    if rows:
+        connection.execute(_upsert_statement(connection.dialect.name), rows)
+
+
+def bump_account_revisions(connection, account_ids, bag_ids=()):
+    """
+    Mark the bags and scripts of ``account_ids`` and of the accounts owning
+    ``bag_ids`` as changed (new ETags for their reads), in one UPDATE.
+    """
+    account = Account.__table__
+    conditions = []
+    if account_ids:
+        conditions.append(account.c.id.in_(sorted(account_ids)))
+    if bag_ids:
+        conditions.append(account.c.id.in_(select(Bag.account_id).where(Bag.id.in_(sorted(bag_ids)))))
+    if conditions:
+        connection.execute(update(account).where(or_(*conditions)).values(revision=account.c.revision + 1))
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _apply_account_stat_deltas(session: OrmSession, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if not deltas:
+        return
+    connection = session.connection()
+
+    # Zero deltas of scripts only need their account's revision bumped, which
+    # the UPDATE resolves by itself
+    touched_bags = {
+        bag_id for account_id, bag_id, _, _, *values in deltas if account_id is None and not any(values)
+    }
+    unresolved = {
+        bag_id for account_id, bag_id, _, _, *values in deltas if account_id is None and any(values)
+    }
+    bag_accounts = {}
+    if unresolved:
+        bag_accounts = dict(connection.execute(
+            select(Bag.id, Bag.account_id).where(Bag.id.in_(unresolved))
+        ).all())
+
+    totals: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0, 0, 0])
+    for account_id, bag_id, dimension, name, *values in deltas:
+        if account_id is None:
+            if not any(values):
+                continue  # in touched_bags
+            account_id = bag_accounts.get(bag_id)
+            if account_id is None:
+                continue  # bag already gone; left for rebuild_stats
+        row = totals[(account_id, dimension, name)]
+        for index, value in enumerate(values):
+            row[index] += value
+
+    _upsert_account_stats(connection, totals)
+    bump_account_revisions(connection, {account_id for account_id, _, _ in totals}, touched_bags)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_account_stat_deltas(session: OrmSession):
+    session.info.pop(_DELTAS_KEY, None)
+
+
+def account_revision(account_filter: Optional[int], session: Session) -> str:
+    """
+    Version of the bags and scripts of one account or (``None``) all of them;
+    it changes whenever any of them is written.
+    """
+    if account_filter is not None:
+        revision = session.exec(select(Account.revision).where(Account.id == account_filter)).first()
+        return f"{account_filter}.{revision}"
+    total, accounts = session.exec(select(func.coalesce(func.sum(Account.revision), 0), func.count(Account.id))).one()
+    return f"all.{total}.{accounts}"
+
+
+def bag_revision(bag_id: int, account_filter: Optional[int], session: Session) -> Optional[str]:
+    """
+    Version of a bag's account, or None if the bag doesn't exist or is outside
+    ``account_filter``.
+    """
+    statement = select(Bag.account_id, Account.revision).join(Account).where(Bag.id == bag_id)
+    if account_filter is not None:
+        statement = statement.where(Bag.account_id == account_filter)
+    row = session.exec(statement).first()
+    return None if row is None else f"{row[0]}.{row[1]}"
+
+
+def get_account_stats(account_filter: Optional[int], session: Session) -> Dict[StatDimension, Dict[str, Row]]:
+    """
+    Rollup counters by dimension and name, for one account or (``None``) all of them.
+    Each row has item_count, used_count, like_count and total_value.
+    """
+    statement = (
+        select(
+            AccountStat.dimension,
+            AccountStat.name,
+            func.sum(AccountStat.item_count).label("item_count"),
+            func.sum(AccountStat.used_count).label("used_count"),
+            func.sum(AccountStat.like_count).label("like_count"),
+            func.sum(AccountStat.total_value).label("total_value"),
+        )
+        .group_by(AccountStat.dimension, AccountStat.name)
+        .having(func.sum(AccountStat.item_count) > 0)
+    )
+    if account_filter is not None:
+        statement = statement.where(AccountStat.account_id == account_filter)
+
+    stats = {dimension: {} for dimension in StatDimension}
+    for row in session.exec(statement).all():
+        stats[row.dimension][row.name] = row
+    return stats
+
+
+def compute_bag_stats(account_filter: Optional[int], session: Session) -> dict:
+    """
+    Inventory and script statistics, read from the rollup table.
+    """
+    stats = get_account_stats(account_filter, session)
+    brands = stats[StatDimension.brand]
+    script_types = stats[StatDimension.script_type]
+
+    total_bags = sum(row.item_count for row in brands.values())
+    total_scripts = sum(row.item_count for row in script_types.values())
+
+    return {
+        "total_bags": total_bags,
+        "total_scripts": total_scripts,
+        "brands": {brand: row.item_count for brand, row in brands.items()},
+        "script_types": {script_type: row.item_count for script_type, row in script_types.items()},
+        "avg_scripts_per_bag": round(total_scripts / total_bags, 2) if total_bags else 0,
+        "total_usage": sum(row.used_count for row in script_types.values()),
+        "total_likes": sum(row.like_count for row in script_types.values())
+    }
+
+
+def rebuild_account_stats(session: Session) -> int:
+    """
+    Recompute every rollup row from the bag and script tables.
+    Returns the number of rows written.
+    """
+    brand_rows = session.exec(
+        select(Bag.account_id, Bag.brand, func.count(Bag.id), func.coalesce(func.sum(Bag.price), 0))
+        .group_by(Bag.account_id, Bag.brand)
+    ).all()
+    type_rows = session.exec(
+        select(
+            Bag.account_id,
+            Script.script_type,
+            func.count(Script.id),
+            func.coalesce(func.sum(Script.used_count), 0),
+            func.coalesce(func.sum(Script.like_count), 0),
+        )
+        .join(Bag)
+        .group_by(Bag.account_id, Script.script_type)
+    ).all()
+
+    session.execute(delete(AccountStat))
+    rows = [
+        AccountStat(
+            account_id=account_id, dimension=StatDimension.brand, name=brand,
+            item_count=count, total_value=value
+        )
+        for account_id, brand, count, value in brand_rows
+    ] + [
+        AccountStat(
+            account_id=account_id, dimension=StatDimension.script_type, name=ScriptType(script_type).value,
+            item_count=count, used_count=used, like_count=likes
+        )
+        for account_id, script_type, count, used, likes in type_rows
+    ]
+    session.add_all(rows)
+    session.commit()
+    return len(rows)
@@ -1,36 +1,154 @@
 import json
 import logging
+import secrets
+import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Set
+from typing import Deque, Dict, Iterable, List, Optional, Set
 from fastapi import WebSocket, WebSocketDisconnect
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.models import Bag, Script, ScriptType, WSMessage, WSScriptMessage, ScriptBlock
-from app.core.db import get_session
+from app.models import Account, Bag, Script, ScriptType, WSMessage, WSScriptMessage, ScriptBlock
+from app.core.config import settings
+from app.core.deps import get_account_access_filter
+from app.core.db import run_in_async_session
+from app.core.metrics import Metric, registry
+from app.services.default_scripts import materialize_default_script, render_default_scripts
+from app.services.script_counters import increment_script_counters
 
 logger = logging.getLogger(__name__)
 
 
+# Frame types that describe current state; only these are kept for snapshots.
+# Transient alerts (e.g. missing_product) are replayed but never re-shown from a snapshot.
+SNAPSHOT_FRAME_TYPES = {"switch", "scripts"}
+
+
+def account_channel(account_id: int) -> str:
+    """Channel every authenticated device of an account joins on connect."""
+    return f"account:{account_id}"
+
+
+def room_channel(account_id: int, room: str) -> str:
+    """Channel scoped to a single live room of an account."""
+    return f"room:{account_id}:{room}"
+
+
+def bag_channel(bag_id: int) -> str:
+    """Channel for clients subscribed to script updates of one bag."""
+    return f"bag:{bag_id}"
+
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(
+        self,
+        replay_buffer_size: int = settings.WS_REPLAY_BUFFER_SIZE,
+        replay_retention_seconds: int = settings.WS_REPLAY_RETENTION_SECONDS
+    ):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.bag_subscriptions: Dict[int, Set[str]] = {}  # bag_id -> set of connection_ids
+        self.connection_accounts: Dict[str, int] = {}  # connection_id -> account_id
+        self.connection_access: Dict[str, Optional[int]] = {}  # connection_id -> account filter (None = all)
+        self.channels: Dict[str, Set[str]] = {}  # channel -> set of connection_ids
+        self.connection_channels: Dict[str, Set[str]] = {}  # connection_id -> set of channels
+        
+        # Replay state: sequence numbers are only meaningful within one epoch (process lifetime)
+        self.epoch = secrets.token_hex(8)
+        self.replay_buffer_size = replay_buffer_size
+        self.replay_retention_seconds = replay_retention_seconds
+        self.channel_seq: Dict[str, int] = {}  # channel -> last sequence number sent
+        self.replay_buffers: Dict[str, Deque[dict]] = {}  # channel -> recent frames
+        self.channel_snapshots: Dict[str, Dict[str, dict]] = {}  # channel -> latest frame per type
+        self.channel_last_active: Dict[str, float] = {}  # channel -> monotonic time of last activity
+        self._last_prune = time.monotonic()
     
-    async def connect(self, websocket: WebSocket, connection_id: str):
+    async def connect(
+        self,
+        websocket: WebSocket,
+        connection_id: str,
+        account_id: int,
+        account_filter: Optional[int] = None,
+        room: Optional[str] = None
+    ):
         await websocket.accept()
         self.active_connections[connection_id] = websocket
-        logger.info(f"WebSocket connection established: {connection_id}")
+        self.connection_accounts[connection_id] = account_id
+        self.connection_access[connection_id] = account_filter
+        
+        # Every device hears account-wide events; room devices also get room events
+        self.join(connection_id, account_channel(account_id))
+        if room:
+            self.join(connection_id, room_channel(account_id, room))
+        
+        logger.info(f"WebSocket connection established: {connection_id} (account {account_id})")
+        
+        # Tell the client where each of its channels currently stands
+        await self.send_personal_message({
+            "type": "hello",
+            "data": {
+                "connection_id": connection_id,
+                "epoch": self.epoch,
+                "channels": {
+                    channel: self.channel_seq.get(channel, 0)
+                    for channel in self.connection_channels.get(connection_id, ())
+                }
+            }
+        }, connection_id)
     
     def disconnect(self, connection_id: str):
         if connection_id in self.active_connections:
             del self.active_connections[connection_id]
+        self.connection_accounts.pop(connection_id, None)
+        self.connection_access.pop(connection_id, None)
         
-        # Remove from all bag subscriptions
-        for bag_id, subscribers in self.bag_subscriptions.items():
-            subscribers.discard(connection_id)
+        # Remove from all joined channels
+        for channel in list(self.connection_channels.get(connection_id, ())):
+            self.leave(connection_id, channel)
+        self.connection_channels.pop(connection_id, None)
+        self.prune_idle_channels()
         
         logger.info(f"WebSocket connection closed: {connection_id}")
     
+    def join(self, connection_id: str, channel: str):
+        self.channels.setdefault(channel, set()).add(connection_id)
+        self.connection_channels.setdefault(connection_id, set()).add(channel)
+    
+    def leave(self, connection_id: str, channel: str):
+        subscribers = self.channels.get(channel)
+        if subscribers is not None:
+            subscribers.discard(connection_id)
+            if not subscribers:
+                del self.channels[channel]
+        joined = self.connection_channels.get(connection_id)
+        if joined is not None:
+            joined.discard(channel)
+        self.channel_last_active[channel] = time.monotonic()
+    
+    def prune_idle_channels(self, force: bool = False):
+        """
+        Drop replay state of channels nobody has joined for the retention window.
+        Runs at most once per retention period unless forced.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_prune < self.replay_retention_seconds:
+            return
+        self._last_prune = now
+        
+        cutoff = now - self.replay_retention_seconds
+        for channel in list(self.channel_last_active):
+            if channel in self.channels or self.channel_last_active[channel] > cutoff:
+                continue
+            self.channel_last_active.pop(channel, None)
+            self.channel_seq.pop(channel, None)
+            self.replay_buffers.pop(channel, None)
+            self.channel_snapshots.pop(channel, None)
+    
+    def can_access_account(self, connection_id: str, account_id: int) -> bool:
+        if connection_id not in self.connection_access:
+            return False
+        account_filter = self.connection_access[connection_id]
+        return account_filter is None or account_filter == account_id
+    
     async def send_personal_message(self, message: dict, connection_id: str):
         if connection_id in self.active_connections:
             websocket = self.active_connections[connection_id]
@@ -40,34 +158,129 @@ class ConnectionManager:
                 logger.error(f"Error sending message to {connection_id}: {e}")
                 self.disconnect(connection_id)
     
+    def record_frame(self, message: dict, channel: str) -> dict:
+        """
+        Stamp a frame with its channel sequence number and keep it for replay.
+        """
+        seq = self.channel_seq.get(channel, 0) + 1
+        self.channel_seq[channel] = seq
+        frame = {**message, "channel": channel, "seq": seq}
+        
+        buffer = self.replay_buffers.get(channel)
+        if buffer is None:
+            buffer = self.replay_buffers[channel] = deque(maxlen=self.replay_buffer_size)
+        buffer.append(frame)
+        if frame["type"] in SNAPSHOT_FRAME_TYPES:
+            self.channel_snapshots.setdefault(channel, {})[frame["type"]] = frame
+        self.channel_last_active[channel] = time.monotonic()
+        return frame
+    
+    async def send_to_channel(self, message: dict, channel: str):
+        # Frames are recorded even with no listeners so a briefly offline device can catch up
+        frame = self.record_frame(message, channel)
+        subscribers = self.channels.get(channel)
+        if not subscribers:
+            return
+        for connection_id in list(subscribers):  # Copy to avoid modification during iteration
+            await self.send_personal_message(frame, connection_id)
+    
+    def frames_since(self, channel: str, last_seq: int, epoch: Optional[str] = None) -> Optional[List[dict]]:
+        """
+        Frames of a channel newer than last_seq, or None if the client has fallen
+        outside the replay buffer (or comes from another epoch) and needs a snapshot.
+        """
+        current_seq = self.channel_seq.get(channel, 0)
+        if epoch != self.epoch or last_seq > current_seq:
+            return None
+        if last_seq == current_seq:
+            return []
+        
+        buffer = self.replay_buffers.get(channel)
+        if not buffer or buffer[0]["seq"] > last_seq + 1:
+            return None
+        return [frame for frame in buffer if frame["seq"] > last_seq]
+    
+    def snapshot_frame(self, channel: str) -> dict:
+        """
+        Compact catch-up frame: the latest frame of each type on the channel.
+        """
+        return {
+            "type": "snapshot",
+            "channel": channel,
+            "seq": self.channel_seq.get(channel, 0),
+            "data": {
+                "epoch": self.epoch,
+                "frames": sorted(
+                    self.channel_snapshots.get(channel, {}).values(),
+                    key=lambda frame: frame["seq"]
+                )
+            }
+        }
+    
     async def send_to_bag_subscribers(self, message: dict, bag_id: int):
-        if bag_id in self.bag_subscriptions:
-            subscribers = list(self.bag_subscriptions[bag_id])  # Copy to avoid modification during iteration
-            for connection_id in subscribers:
-                await self.send_personal_message(message, connection_id)
+        await self.send_to_channel(message, bag_channel(bag_id))
     
     def subscribe_to_bag(self, connection_id: str, bag_id: int):
-        if bag_id not in self.bag_subscriptions:
-            self.bag_subscriptions[bag_id] = set()
-        self.bag_subscriptions[bag_id].add(connection_id)
+        self.join(connection_id, bag_channel(bag_id))
         logger.info(f"Connection {connection_id} subscribed to bag {bag_id}")
     
     def unsubscribe_from_bag(self, connection_id: str, bag_id: int):
-        if bag_id in self.bag_subscriptions:
-            self.bag_subscriptions[bag_id].discard(connection_id)
-            if not self.bag_subscriptions[bag_id]:
-                del self.bag_subscriptions[bag_id]
+        self.leave(connection_id, bag_channel(bag_id))
+    
+    def forget_bags(self, bag_ids: Iterable[int]):
+        """
+        Drop everything kept for deleted bags: their channels (subscriptions,
+        replay buffers, snapshots) and "switch" frames to them in other
+        channels' snapshots, so no reconnecting device is sent back to them.
+        """
+        bag_ids = set(bag_ids)
+        for bag_id in bag_ids:
+            channel = bag_channel(bag_id)
+            for connection_id in list(self.channels.get(channel, ())):
+                self.leave(connection_id, channel)
+            self.channel_last_active.pop(channel, None)
+            self.channel_seq.pop(channel, None)
+            self.replay_buffers.pop(channel, None)
+            self.channel_snapshots.pop(channel, None)
+        for snapshots in self.channel_snapshots.values():
+            if snapshots.get("switch", {}).get("data", {}).get("bag_id") in bag_ids:
+                del snapshots["switch"]
 
 
 manager = ConnectionManager()
 
 
-def get_scripts_for_bag(bag_id: int, session: Session) -> List[ScriptBlock]:
+@registry.register
+def collect_websocket_metrics() -> Iterable[Metric]:
+    yield Metric(
+        "websocket_connections",
+        "gauge",
+        "Open teleprompter WebSocket connections",
+        [({}, len(manager.active_connections))],
+    )
+    yield Metric(
+        "websocket_channels",
+        "gauge",
+        "Channels with at least one joined connection",
+        [({}, len(manager.channels))],
+    )
+
+
+async def get_scripts_for_bag(bag_id: int, session: AsyncSession) -> List[ScriptBlock]:
     """
     Get all scripts for a bag organized into ScriptBlock format.
     """
     statement = select(Script).where(Script.bag_id == bag_id)
-    scripts = session.exec(statement).all()
+    scripts = (await session.exec(statement)).all()
+    if not scripts:
+        # A bag without scripts of its own gets one block of its default scripts
+        bag = await session.get(Bag, bag_id)
+        if bag is None:
+            return []
+        block = ScriptBlock(id=1)
+        for script_type, content in render_default_scripts(bag):
+            setattr(block, script_type.value, content)
+        return [block]
     
     # Group scripts by type
     script_groups = {}
@@ -96,22 +309,79 @@ def get_scripts_for_bag(bag_id: int, session: Session) -> List[ScriptBlock]:
     return script_blocks
 
 
-async def send_scripts_to_teleprompter(bag_id: int, session: Session):
+async def build_scripts_message(bag_id: int, session: AsyncSession) -> dict:
+    """
+    Build the "scripts" frame for a bag.
+    """
+    script_blocks = await get_scripts_for_bag(bag_id, session)
+    
+    message = WSScriptMessage(
+        bag_id=bag_id,
+        scripts=script_blocks
+    )
+    
+    return {
+        "type": "scripts",
+        "data": message.model_dump()
+    }
+
+
+async def get_bag_account_id(bag_id: int, session: AsyncSession) -> Optional[int]:
+    """
+    Owner account of a bag, or None if it doesn't exist.
+    """
+    return (await session.exec(select(Bag.account_id).where(Bag.id == bag_id))).first()
+
+
+async def record_script_usage(script_id: int, account_filter: Optional[int], session: AsyncSession):
+    """
+    Increment the usage counter of a script the connection's account can access.
+    """
+    if await session.run_sync(
+        lambda sync_session: increment_script_counters(script_id, 1, 0, account_filter, sync_session)
+    ):
+        await session.commit()
+
+
+def _use_default_script(
+    bag_id: int,
+    script_type: ScriptType,
+    account_filter: Optional[int],
+    session: Session
+) -> bool:
+    statement = select(Bag).where(Bag.id == bag_id)
+    if account_filter is not None:
+        statement = statement.where(Bag.account_id == account_filter)
+    bag = session.exec(statement).first()
+    script = bag and materialize_default_script(bag, script_type, session)
+    if not script:
+        return False
+    script.used_count += 1
+    return True
+
+
+async def record_default_script_usage(
+    bag_id: int,
+    script_type: ScriptType,
+    account_filter: Optional[int],
+    session: AsyncSession
+):
+    """
+    Record use of one of a bag's default scripts, saving the bag's default
+    scripts first (unless it has scripts of its own by now).
+    """
+    if await session.run_sync(
+        lambda sync_session: _use_default_script(bag_id, script_type, account_filter, sync_session)
+    ):
+        await session.commit()
+
+
+async def send_scripts_to_teleprompter(bag_id: int):
     """
     Send scripts for a specific bag to all subscribed teleprompter clients.
     """
     try:
-        script_blocks = get_scripts_for_bag(bag_id, session)
-        
-        message = WSScriptMessage(
-            bag_id=bag_id,
-            scripts=script_blocks
-        )
-        
-        ws_message = {
-            "type": "scripts",
-            "data": message.model_dump()
-        }
+        ws_message = await run_in_async_session(build_scripts_message, bag_id)
         
         await manager.send_to_bag_subscribers(ws_message, bag_id)
         logger.info(f"Sent scripts for bag {bag_id} to teleprompter clients")
@@ -120,9 +390,73 @@ async def send_scripts_to_teleprompter(bag_id: int, session: Session):
         logger.error(f"Error sending scripts for bag {bag_id}: {e}")
 
 
-async def send_missing_product_alert(product_title: str):
+async def current_scripts_frame(bag_id: int) -> dict:
+    """
+    Fresh "scripts" frame for one device, tagged with the bag channel's
+    current sequence number so the device can resume from it later.
     """
-    Send missing product alert to all connected teleprompter clients.
+    message = await run_in_async_session(build_scripts_message, bag_id)
+    channel = bag_channel(bag_id)
+    return {
+        **message,
+        "channel": channel,
+        "seq": manager.channel_seq.get(channel, 0)
+    }
+
+
+async def resume_channels(data: dict, connection_id: str):
+    """
+    Catch a reconnecting device up on the channels it was following.
+    
+    Expects {"epoch": "...", "channels": {"<channel>": <last seen seq>, ...}}.
+    Missed frames are replayed from the buffer; a device that fell outside
+    the buffer (or reconnects after a server restart) gets a snapshot instead.
+    """
+    epoch = data.get("epoch")
+    for channel, last_seq in (data.get("channels") or {}).items():
+        bag_id = None
+        if channel.startswith("bag:"):
+            try:
+                bag_id = int(channel.split(":", 1)[1])
+            except ValueError:
+                continue
+            owner_id = await run_in_async_session(get_bag_account_id, bag_id)
+            if owner_id is None or not manager.can_access_account(connection_id, owner_id):
+                continue
+            manager.subscribe_to_bag(connection_id, bag_id)
+        elif channel not in manager.connection_channels.get(connection_id, ()):
+            # Account and room channels are bound at connect time only
+            continue
+        
+        try:
+            frames = manager.frames_since(channel, int(last_seq), epoch)
+        except (TypeError, ValueError):
+            frames = None
+        
+        if frames is not None:
+            for frame in frames:
+                await manager.send_personal_message(frame, connection_id)
+            continue
+        
+        snapshot = manager.snapshot_frame(channel)
+        if bag_id is not None and "scripts" not in {frame["type"] for frame in snapshot["data"]["frames"]}:
+            snapshot["data"]["frames"].append(await current_scripts_frame(bag_id))
+        await manager.send_personal_message(snapshot, connection_id)
+
+
+def event_channel(account_id: int, room: Optional[str] = None) -> str:
+    """
+    Pick the channel an account-level event is routed to.
+    Events tagged with a live room only reach devices joined to that room.
+    """
+    if room:
+        return room_channel(account_id, room)
+    return account_channel(account_id)
+
+
+async def send_missing_product_alert(product_title: str, account_id: int, room: Optional[str] = None):
+    """
+    Send missing product alert to the teleprompter clients of one account (or live room).
     """
     try:
         message = {
@@ -134,9 +468,7 @@ async def send_missing_product_alert(product_title: str):
             }
         }
         
-        # Send to all active connections
-        for connection_id in list(manager.active_connections.keys()):
-            await manager.send_personal_message(message, connection_id)
+        await manager.send_to_channel(message, event_channel(account_id, room))
         
         logger.info(f"Sent missing product alert for: {product_title}")
         
@@ -144,9 +476,25 @@ async def send_missing_product_alert(product_title: str):
         logger.error(f"Error sending missing product alert: {e}")
 
 
-async def send_switch_command(bag_id: int):
+async def send_import_progress(account_id: int, job: dict):
     """
-    Send switch command to teleprompter to change to specific bag.
+    Send a background import job's status and counters to the clients of its account.
+    """
+    try:
+        message = {
+            "type": "import_progress",
+            "data": job
+        }
+        
+        await manager.send_to_channel(message, account_channel(account_id))
+        
+    except Exception as e:
+        logger.error(f"Error sending import progress: {e}")
+
+
+async def send_switch_command(bag_id: int, account_id: int, room: Optional[str] = None):
+    """
+    Send switch command to the teleprompters of the bag's account to change to a specific bag.
     """
     try:
         message = {
@@ -157,12 +505,11 @@ async def send_switch_command(bag_id: int):
             }
         }
         
-        # Send to all bag subscribers
-        await manager.send_to_bag_subscribers(message, bag_id)
+        # Teleprompters of this account (or live room) switch and subscribe to the bag
+        await manager.send_to_channel(message, event_channel(account_id, room))
         
-        # Also send scripts immediately
-        session = next(get_session())
-        await send_scripts_to_teleprompter(bag_id, session)
+        # Also refresh scripts for devices already subscribed to the bag
+        await send_scripts_to_teleprompter(bag_id)
         
         logger.info(f"Sent switch command for bag {bag_id}")
         
@@ -170,9 +517,10 @@ async def send_switch_command(bag_id: int):
         logger.error(f"Error sending switch command for bag {bag_id}: {e}")
 
 
-async def handle_websocket_message(message_data: dict, connection_id: str, session: Session):
+async def handle_websocket_message(message_data: dict, connection_id: str):
     """
     Handle incoming WebSocket messages from teleprompter or other clients.
+    Database access goes through the async engine; this coroutine only awaits I/O.
     """
     try:
         message_type = message_data.get("type")
@@ -181,10 +529,23 @@ async def handle_websocket_message(message_data: dict, connection_id: str, sessi
         if message_type == "subscribe":
             bag_id = data.get("bag_id")
             if bag_id:
+                owner_id = await run_in_async_session(get_bag_account_id, bag_id)
+                if owner_id is None or not manager.can_access_account(connection_id, owner_id):
+                    await manager.send_personal_message(
+                        {"type": "error", "data": {"message": "Bag not found", "bag_id": bag_id}},
+                        connection_id
+                    )
+                    return
+                
                 manager.subscribe_to_bag(connection_id, bag_id)
                 
-                # Send current scripts immediately
-                await send_scripts_to_teleprompter(bag_id, session)
+                # Send current scripts immediately, only to the subscribing device
+                await manager.send_personal_message(
+                    await current_scripts_frame(bag_id), connection_id
+                )
+        
+        elif message_type == "resume":
+            await resume_channels(data, connection_id)
         
         elif message_type == "unsubscribe":
             bag_id = data.get("bag_id")
@@ -203,12 +564,15 @@ async def handle_websocket_message(message_data: dict, connection_id: str, sessi
             # Track script usage
             script_id = data.get("script_id")
             if script_id:
-                statement = select(Script).where(Script.id == script_id)
-                script = session.exec(statement).first()
-                if script:
-                    script.used_count += 1
-                    session.add(script)
-                    session.commit()
+                await run_in_async_session(
+                    record_script_usage, script_id, manager.connection_access.get(connection_id)
+                )
+            elif data.get("bag_id") and data.get("script_type") in ScriptType.__members__:
+                # A default script (sent without an id) is saved on first use
+                await run_in_async_session(
+                    record_default_script_usage, data["bag_id"], ScriptType(data["script_type"]),
+                    manager.connection_access.get(connection_id)
+                )
         
         else:
             logger.warning(f"Unknown message type: {message_type}")
@@ -217,25 +581,35 @@ async def handle_websocket_message(message_data: dict, connection_id: str, sessi
         logger.error(f"Error handling WebSocket message: {e}")
 
 
-async def websocket_endpoint(websocket: WebSocket, connection_id: str = None):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    account: Account,
+    connection_id: str = None,
+    room: Optional[str] = None
+):
     """
-    Main WebSocket endpoint handler.
+    Main WebSocket endpoint handler for an authenticated account.
     """
     if not connection_id:
         connection_id = f"conn_{id(websocket)}"
     
-    await manager.connect(websocket, connection_id)
+    await manager.connect(
+        websocket,
+        connection_id,
+        account_id=account.id,
+        account_filter=get_account_access_filter(account),
+        room=room
+    )
     
     try:
         while True:
             data = await websocket.receive_text()
             message_data = json.loads(data)
             
-            session = next(get_session())
-            await handle_websocket_message(message_data, connection_id, session)
+            await handle_websocket_message(message_data, connection_id)
             
     except WebSocketDisconnect:
         manager.disconnect(connection_id)
     except Exception as e:
         logger.error(f"WebSocket error for {connection_id}: {e}")
-        manager.disconnect(connection_id) 
\ No newline at end of file
+        manager.disconnect(connection_id)
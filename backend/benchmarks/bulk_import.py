@@ -0,0 +1,70 @@
+"""
+Benchmark the bulk bag import engine.
+
+Imports generated rows through ``app.services.bag_import.bulk_import_bags``
+into a fresh SQLite database and reports rows per second (and, with --trace-memory, peak Python memory).
+
+Usage (from backend/):
+    python -m benchmarks.bulk_import --rows 100000 --batch-size 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlmodel import Session, SQLModel
+
+from app.api.routes.bags import parse_import_row
+from app.core.db import create_db_engine
+from app.models import Account
+from app.services.bag_import import bulk_import_bags
+
+
+def generate_rows(count: int):
+    for i in range(count):
+        yield i + 1, {
+            "name": f"Model {i}",
+            "brand": f"Brand{i % 50}",
+            "color": "Black",
+            "condition": "good",
+            "details": "Imported from benchmark sheet",
+            "price": str(1000 + i % 500),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--trace-memory", action="store_true", help="report peak Python memory (slows the run)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            account = Account(email="bench@example.com", name="Bench", hashed_password="x")
+            session.add(account)
+            session.commit()
+
+            if args.trace_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            result = bulk_import_bags(
+                generate_rows(args.rows), parse_import_row, account.id, session, batch_size=args.batch_size
+            )
+            elapsed = time.perf_counter() - started
+            if args.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        engine.dispose()
+
+    print(f"{result['imported']} bags in {elapsed:.2f}s "
+          f"({result['imported'] / elapsed:,.0f} rows/s)")
+    if args.trace_memory:
+        print(f"peak Python memory {peak / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
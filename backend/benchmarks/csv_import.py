@@ -0,0 +1,65 @@
+"""
+Benchmark the spreadsheet import path.
+
+Writes a generated CSV (every tenth row invalid) and imports it through
+``app.services.csv_import.import_bags_file`` into a fresh SQLite database,
+reporting rows per second for the whole path (read, clean, validate, insert).
+With --reimport the same file is imported again, as daily re-uploads are;
+every row then matches an existing bag and nothing is inserted.
+
+Usage (from backend/):
+    python -m benchmarks.csv_import --rows 100000 [--reimport]
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel
+
+from app.core.db import create_db_engine
+from app.models import Account
+from app.services.csv_import import import_bags_file
+
+
+def write_csv(path: str, count: int):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "brand", "price", "details", "conditions"])
+        for i in range(count):
+            if i % 10 == 9:
+                writer.writerow(["", f"Brand{i % 50}", "n/a", "", ""])
+            else:
+                writer.writerow([f" Model {i} ", f"Brand{i % 50}", 1000 + i % 500, "Imported from benchmark", "Good"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--reimport", action="store_true", help="also time a second import of the same file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bags.csv")
+        write_csv(path, args.rows)
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            account = Account(email="bench@example.com", name="Bench", hashed_password="x")
+            session.add(account)
+            session.commit()
+
+            for label in ("import", "reimport") if args.reimport else ("import",):
+                started = time.perf_counter()
+                with open(path, "rb") as file:
+                    result = import_bags_file(file, "csv", account.id, session)
+                elapsed = time.perf_counter() - started
+                print(f"{label}: {result['total_rows']} rows ({result['inserted']} inserted, "
+                      f"{result['updated']} updated, {result['unchanged']} unchanged, {result['failed']} rejected) "
+                      f"in {elapsed:.2f}s ({result['total_rows'] / elapsed:,.0f} rows/s)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
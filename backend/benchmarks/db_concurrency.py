@@ -0,0 +1,139 @@
+"""
+Benchmark SQLite throughput under concurrent reads and feedback writes.
+
+Compares a bare ``create_engine`` (rollback journal, default pool) with the
+engine from ``app.core.db.create_db_engine`` (WAL, busy_timeout, pragmas).
+Each run uses a fresh database file in a temporary directory.
+
+Usage (from backend/):
+    python -m benchmarks.db_concurrency --readers 8 --writers 4 --duration 10
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.db import create_db_engine
+from app.models import Account, Bag, Feedback, Script
+
+BAGS = 500
+SCRIPTS_PER_BAG = 4
+
+
+def seed(engine: Engine) -> List[int]:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        account = Account(email="bench@example.com", name="Bench", hashed_password="x")
+        session.add(account)
+        session.commit()
+        session.refresh(account)
+
+        bags = [
+            Bag(brand=f"Brand{i % 20}", model=f"Model {i}", color="Black",
+                condition="good", account_id=account.id)
+            for i in range(BAGS)
+        ]
+        session.add_all(bags)
+        session.commit()
+
+        scripts = [
+            Script(content=f"Script {n} for bag {bag.id}", bag_id=bag.id)
+            for bag in bags for n in range(SCRIPTS_PER_BAG)
+        ]
+        session.add_all(scripts)
+        session.commit()
+        return [script.id for script in scripts]
+
+
+def run_load(engine: Engine, script_ids: List[int], readers: int, writers: int, duration: float) -> Dict:
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {"reads": [], "writes": [], "errors": 0}
+
+    def timed(kind: str, operation: Callable[[Session, int], None]):
+        n = 0
+        while not stop.is_set():
+            n += 1
+            started = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    operation(session, n)
+            except OperationalError:
+                with lock:
+                    results["errors"] += 1
+                continue
+            with lock:
+                results[kind].append(time.perf_counter() - started)
+
+    def read(session: Session, n: int):
+        # Bag list with per-bag feedback totals, as the dashboard loads it
+        session.exec(
+            select(Bag.id, func.count(Feedback.id))
+            .join(Script, Script.bag_id == Bag.id)
+            .join(Feedback, Feedback.script_id == Script.id, isouter=True)
+            .where(Bag.brand == f"Brand{n % 20}")
+            .group_by(Bag.id)
+        ).all()
+
+    def write(session: Session, n: int):
+        session.add(Feedback(rating=1, script_id=script_ids[n % len(script_ids)]))
+        session.commit()
+
+    threads = [threading.Thread(target=timed, args=("reads", read)) for _ in range(readers)]
+    threads += [threading.Thread(target=timed, args=("writes", write)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(name: str, results: Dict, duration: float):
+    print(f"\n{name}")
+    for kind in ("reads", "writes"):
+        latencies = sorted(results[kind])
+        if not latencies:
+            print(f"  {kind:6}: none completed")
+            continue
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        print(
+            f"  {kind:6}: {len(latencies) / duration:8.1f} ops/s   "
+            f"p50 {statistics.median(latencies) * 1000:7.1f}ms   p95 {p95 * 1000:7.1f}ms"
+        )
+    print(f"  errors: {results['errors']} (database is locked)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    engines = {
+        "bare create_engine (rollback journal)": lambda url: create_engine(url),
+        "create_db_engine (WAL + pragmas)": lambda url: create_db_engine(url),
+    }
+    print(f"{args.readers} readers, {args.writers} writers, {args.duration:.0f}s per run")
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (name, build) in enumerate(engines.items()):
+            url = f"sqlite:///{os.path.join(directory, f'bench_{index}.db')}"
+            engine = build(url)
+            script_ids = seed(engine)
+            results = run_load(engine, script_ids, args.readers, args.writers, args.duration)
+            summarize(name, results, args.duration)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
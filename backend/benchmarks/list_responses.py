@@ -0,0 +1,130 @@
+"""
+Benchmark encoding the largest list pages (1000 bags, 1000 scripts).
+
+Compares FastAPI's standard response path (response_model validation of the
+rows, then jsonable serialization and the stdlib JSONResponse) with the one
+the listing routes now take (app.core.responses: a column projection of the
+read model encoded by orjson without re-validation). The bags timings
+include the page query, since the projection is part of the change; the
+scripts page is fetched once through GET /scripts and only its encoding is
+timed (the rows are dicts the route builds either way).
+
+Usage (from backend/):
+    python -m benchmarks.list_responses --rows 1000 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlmodel import Session, SQLModel, select
+
+from app.core.db import create_db_engine
+from app.core.deps import get_db
+from app.core.responses import read_columns, trusted_json_response
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Account, Bag, BagRead, Script, ScriptType
+
+
+def seed(session: Session, rows: int) -> Account:
+    account = Account(email="bench@example.com", name="Bench", hashed_password="x", role="admin", is_superuser=True)
+    session.add(account)
+    session.commit()
+    bags = [
+        Bag(
+            brand=f"Brand{i % 20}", model=f"Model {i}", color="Black", condition="good",
+            details=f"Details of bag {i} " * 4, price=100 + i, account_id=account.id
+        )
+        for i in range(rows)
+    ]
+    session.add_all(bags)
+    session.commit()
+    session.add_all([
+        Script(content=f"Script for bag {bag.id}: " + "x" * 200, script_type=ScriptType.hook, bag_id=bag.id)
+        for bag in bags
+    ])
+    session.commit()
+    session.refresh(account)
+    return account
+
+
+def timed(operation: Callable[[], bytes], repeat: int) -> float:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies)
+
+
+def standard_response(adapter: TypeAdapter, content) -> bytes:
+    # What FastAPI does for a route with a response_model and the default JSONResponse
+    value = adapter.validate_python(content, from_attributes=True)
+    return JSONResponse(adapter.dump_python(value, mode="json")).body
+
+
+def compare(name: str, before: Callable[[], bytes], after: Callable[[], bytes], repeat: int):
+    assert orjson.loads(before()) == orjson.loads(after()), f"{name}: responses differ"
+    before_time, after_time = timed(before, repeat), timed(after, repeat)
+    print(
+        f"{name:28} response_model + json {before_time * 1000:7.1f}ms   "
+        f"trusted + orjson {after_time * 1000:7.1f}ms   ({before_time / after_time:.1f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Bags (and scripts) per page")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            account = seed(session, args.rows)
+
+            bag_order = (Bag.created_at, Bag.id)
+            bag_adapter = TypeAdapter(List[BagRead])
+            compare(
+                f"GET /bags ({args.rows} rows)",
+                lambda: standard_response(
+                    bag_adapter, session.exec(select(Bag).order_by(*bag_order).limit(args.rows)).all()
+                ),
+                lambda: trusted_json_response(
+                    [row._asdict() for row in session.exec(
+                        select(*read_columns(BagRead, Bag)).order_by(*bag_order).limit(args.rows)
+                    ).all()],
+                    Response()
+                ).body,
+                args.repeat
+            )
+
+            app.dependency_overrides[get_db] = lambda: session
+            try:
+                scripts = TestClient(app).get(
+                    "/api/v1/scripts", params={"limit": args.rows},
+                    headers={"Authorization": f"Bearer {create_access_token(account.id)}"}
+                ).json()
+            finally:
+                app.dependency_overrides.clear()
+            script_adapter = TypeAdapter(List[dict])
+            compare(
+                f"GET /scripts ({len(scripts)} rows)",
+                lambda: standard_response(script_adapter, scripts),
+                lambda: trusted_json_response(scripts, Response()).body,
+                args.repeat
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,56 @@
 """
 Test configuration and fixtures for backend tests
 """
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel
 
 from app.main import app
+from app.core.db import async_engine, async_session_factory, create_async_db_engine, create_db_engine
 from app.core.deps import get_db
+from app.core.user_cache import user_cache
 from app.models import Account
-from app.core.security import get_password_hash
+from app.core.security import create_access_token, get_password_hash
+
+
+@pytest.fixture(name="database_url")
+def database_url_fixture(tmp_path):
+    """Per-test SQLite file, shared by the sync and async engines"""
+    return f"sqlite:///{tmp_path / 'test.db'}"
 
 
 @pytest.fixture(name="session")
-def session_fixture():
+def session_fixture(database_url: str):
     """Create a test database session"""
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+    engine = create_db_engine(database_url)
     SQLModel.metadata.create_all(engine)
     with Session(engine) as session:
         yield session
+    engine.dispose()
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(session: Session, database_url: str):
     """Create a test client with overridden dependencies"""
     def get_session_override():
         return session
     
     app.dependency_overrides[get_db] = get_session_override
+    # Each test has a fresh database, so cached accounts from earlier tests are stale
+    user_cache.clear()
+    # Async routes and WebSocket handlers open sessions on the test database;
+    # NullPool keeps no connection tied to the TestClient's event loop
+    async_session_factory.configure(bind=create_async_db_engine(database_url, poolclass=NullPool))
     
     with TestClient(app) as client:
         yield client
     
+    async_session_factory.configure(bind=async_engine)
     app.dependency_overrides.clear()
 
 
@@ -76,20 +91,40 @@ def test_streamer_fixture(session: Session):
 @pytest.fixture(name="auth_headers_admin")
 def auth_headers_admin_fixture(client: TestClient, test_admin: Account):
     """Get authentication headers for admin user"""
-    response = client.post(
-        "/api/v1/auth/login",
-        json={"username": test_admin.email, "password": "testpassword"}
-    )
-    token = response.json()["access_token"]
+    token = create_access_token(test_admin.id)
     return {"Authorization": f"Bearer {token}"}
 
 
 @pytest.fixture(name="auth_headers_streamer")
 def auth_headers_streamer_fixture(client: TestClient, test_streamer: Account):
     """Get authentication headers for streamer user"""
-    response = client.post(
-        "/api/v1/auth/login",
-        json={"username": test_streamer.email, "password": "testpassword"}
-    )
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"} 
\ No newline at end of file
+    token = create_access_token(test_streamer.id)
+    return {"Authorization": f"Bearer {token}"} 
+
+
+@pytest.fixture(name="query_budget")
+def query_budget_fixture():
+    """
+    Fail the test when a block runs more SQL statements than its budget:
+
+        with query_budget(3):
+            client.get("/api/v1/scripts", headers=auth_headers)
+    """
+    @contextmanager
+    def query_budget(limit: int):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "after_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "after_cursor_execute", record)
+        if len(statements) > limit:
+            pytest.fail(
+                f"{len(statements)} SQL statements, budget is {limit}:\n" + "\n".join(statements)
+            )
+
+    return query_budget
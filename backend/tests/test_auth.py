@@ -5,6 +5,9 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app.core.deps import get_user_from_token
+from app.core.security import create_access_token
+from app.core.user_cache import user_cache
 from app.models import Account
 
 
@@ -54,4 +57,74 @@ def test_get_current_user_unauthorized(client: TestClient):
     """Test getting current user without auth"""
     response = client.get("/api/v1/auth/me")
     assert response.status_code == 401
-    assert response.json()["detail"] == "Not authenticated" 
\ No newline at end of file
+    assert response.json()["detail"] == "Not authenticated" 
+
+
+def test_current_user_cached(client: TestClient, auth_headers_admin: dict, query_budget):
+    """Test that repeat requests with the same token skip the account lookup"""
+    # One account lookup (shared by the admin and account-filter dependencies) + the ETag
+    # revision + the bag list
+    with query_budget(3):
+        assert client.get("/api/v1/bags", headers=auth_headers_admin).status_code == 200
+        assert client.get("/api/v1/auth/me", headers=auth_headers_admin).status_code == 200
+        assert client.get("/api/v1/auth/me", headers=auth_headers_admin).status_code == 200
+
+
+def test_deactivated_user_rejected_despite_cache(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_admin: dict
+):
+    """Test that deactivating an account evicts it from the user cache"""
+    assert client.get("/api/v1/auth/me", headers=auth_headers_admin).status_code == 200
+
+    test_admin.is_active = False
+    session.add(test_admin)
+    session.commit()
+
+    response = client.get("/api/v1/auth/me", headers=auth_headers_admin)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_account_read_before_commit_not_left_in_cache(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_admin: dict
+):
+    """Test that an account cached between an update's flush and its commit is evicted on commit"""
+    token = auth_headers_admin["Authorization"].split(" ", 1)[1]
+
+    test_admin.is_active = False
+    session.add(test_admin)
+    session.flush()
+
+    # Another request reads the account after the flush but before the commit
+    stale = Account(**{**test_admin.model_dump(), "is_active": True})
+    user_cache.put(token, stale, generation=user_cache.generation(test_admin.id))
+    assert user_cache.get(token) is not None
+
+    session.commit()
+    assert user_cache.get(token) is None
+
+
+def test_account_loaded_before_invalidation_not_cached(session: Session, test_admin: Account):
+    """Test that an account loaded while it was being changed is not put in the cache"""
+    token = "token-read-during-update"
+    generation = user_cache.generation(test_admin.id)
+    loaded = Account(**test_admin.model_dump())
+
+    # The change is flushed and committed before the reader fills the cache
+    test_admin.role = "streamer"
+    session.add(test_admin)
+    session.commit()
+
+    user_cache.put(token, loaded, generation=generation)
+    assert user_cache.get(token) is None
+
+    # A lookup that starts after the change is cached as usual
+    token = create_access_token(test_admin.id)
+    assert get_user_from_token(token, session).role == "streamer"
+    assert user_cache.get(token).role == "streamer"
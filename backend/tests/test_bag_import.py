@@ -0,0 +1,166 @@
+"""
+Test bulk bag import
+"""
+import io
+
+from fastapi.testclient import TestClient
+import pandas as pd
+from openpyxl import Workbook
+from sqlmodel import Session, func, select
+
+from app.api.routes.bags import parse_import_row
+from app.core.db import create_db_engine
+from app.models import Account, AccountStat, Bag, Script
+from app.services.bag_import import bulk_import_bags
+from app.services.csv_import import bag_batches, number_rows
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def test_bulk_import_reports_bad_rows(session: Session, test_streamer: Account):
+    """Test batched import stores valid rows (without script rows) and reports bad ones"""
+    rows = [
+        {"name": "Neverfull MM", "brand": "Louis Vuitton", "color": "Damier Ebene", "price": 1500},
+        {"name": "", "brand": "Gucci", "color": "Pink"},
+        {"name": "Marmont Small", "brand": "Gucci", "color": "Pink", "price": "abc"},
+        {"name": "Marmont Mini", "brand": "Gucci", "color": "Red", "condition": "Excellent", "price": "900"},
+        {"name": "Speedy 25", "brand": "Louis Vuitton", "color": "Monogram"},
+    ]
+
+    result = bulk_import_bags(
+        enumerate(rows, start=1), parse_import_row, test_streamer.id, session, batch_size=2
+    )
+
+    assert result["imported"] == 3
+    assert result["failed"] == 2
+    assert result["errors"][0] == "Row 2: Name is required"
+    assert result["errors"][1].startswith("Row 3: ")
+
+    bags = session.exec(select(Bag).order_by(Bag.id)).all()
+    assert [bag.model for bag in bags] == ["Neverfull MM", "Marmont Mini", "Speedy 25"]
+    assert bags[1].condition == "excellent"
+    assert session.exec(select(func.count(Script.id))).one() == 0  # Default scripts are rendered on demand
+
+    stats = {row.name: row.item_count for row in session.exec(select(AccountStat)).all()}
+    assert stats == {"Louis Vuitton": 2, "Gucci": 1}
+
+
+def test_reimport_updates_changed_rows_only(session: Session, test_streamer: Account):
+    """Test re-importing a sheet skips unchanged rows, updates changed ones and inserts new ones"""
+    session.add(Bag(brand="Chanel", model="Classic Flap", color="Black", condition="good", account_id=test_streamer.id))
+    session.commit()
+    rows = [
+        {"name": "Classic Flap", "brand": "Chanel", "color": "Black"},
+        {"name": "Neverfull MM", "brand": "Louis Vuitton", "color": "Damier Ebene", "price": 1500},
+    ]
+
+    first = bulk_import_bags(enumerate(rows, start=1), parse_import_row, test_streamer.id, session)
+    assert (first["inserted"], first["updated"], first["unchanged"]) == (1, 0, 1)
+
+    rows[1]["price"] = 1800
+    rows.append({"name": "Speedy 25", "brand": "Louis Vuitton", "color": "Monogram", "price": 900})
+    rows.append({"name": "Speedy 25", "brand": "Louis Vuitton", "color": "Monogram", "price": 950})
+    second = bulk_import_bags(enumerate(rows, start=1), parse_import_row, test_streamer.id, session)
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (1, 2, 1)
+    assert second["imported"] == 4
+
+    bags = session.exec(select(Bag).order_by(Bag.id)).all()
+    assert [(bag.model, bag.price) for bag in bags] == [
+        ("Classic Flap", None), ("Neverfull MM", 1800), ("Speedy 25", 950)
+    ]
+    stats = {row.name: row for row in session.exec(select(AccountStat)).all()}
+    assert stats["Louis Vuitton"].item_count == 2
+    assert stats["Louis Vuitton"].total_value == 2750
+
+
+def test_bag_batches_validate_column_wise():
+    """Test a chunk is cleaned and validated in bulk and split into insert batches"""
+    frame = number_rows(pd.DataFrame({
+        "name": ["  Classic Flap ", "Birkin 30", None, "Kelly 28", "x" * 101],
+        "brand": ["Chanel", None, "Dior", "Hermès", "Fendi"],
+        "price": ["7500", 15000, None, "n/a", -1],
+        "details": [None, "Togo", "", "Epsom", ""],
+        "conditions": ["Excellent", "Like New", None, "Good", "Good"],
+    }), 2)
+
+    batches = list(bag_batches(frame, 3))
+
+    assert [rows_read for rows_read, _, _ in batches] == [3, 2]
+    values = [bag for _, batch, _ in batches for bag in batch]
+    assert values == [{
+        "brand": "Chanel", "model": "Classic Flap", "color": "N/A", "condition": "Excellent",
+        "details": "", "price": 7500.0, "authenticity_verified": False
+    }]
+    errors = [error for _, _, batch_errors in batches for error in batch_errors]
+    assert errors == [
+        "Row 3: Brand is required",
+        "Row 4: Name is required",
+        "Row 5: Invalid price value - 'n/a' is not a number",
+        "Row 6: Price cannot be negative",
+    ]
+
+
+def test_upload_csv_file(client: TestClient, session: Session, auth_headers_streamer: dict):
+    """Test the file upload route imports through the bulk engine"""
+    csv_content = (
+        "name,brand,price,details,conditions\n"
+        "Classic Flap,Chanel,7500,Caviar leather,Excellent\n"
+        ",Hermès,15000,Togo leather,Like New\n"
+        "Lady Dior,Dior,5500,Cannage lambskin,Very Good\n"
+    )
+
+    response = client.post(
+        "/api/v1/bags/import-csv",
+        files={"file": ("bags.csv", csv_content, "text/csv")},
+        headers=auth_headers_streamer
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_rows"] == 3
+    assert data["successful"] == 2
+    assert data["errors"] == ["Row 3: Name is required"]
+    assert session.exec(select(func.count(Bag.id))).one() == 2
+
+
+def test_bulk_import_commits_each_batch(session: Session, test_streamer: Account, database_url: str):
+    """Test that a batch is committed before the next rows are read"""
+    committed_before_third_row = []
+
+    def rows():
+        for row_number in range(1, 5):
+            if row_number == 3:
+                with Session(create_db_engine(database_url)) as other:
+                    committed_before_third_row.append(other.exec(select(func.count(Bag.id))).one())
+            yield row_number, {"name": f"Baguette {row_number}", "brand": "Fendi", "color": "Pink"}
+
+    result = bulk_import_bags(rows(), parse_import_row, test_streamer.id, session, batch_size=2)
+
+    assert result["imported"] == 4
+    assert committed_before_third_row == [2]
+
+
+def test_upload_xlsx_file_streams_rows(client: TestClient, session: Session, auth_headers_streamer: dict):
+    """Test importing an XLSX upload read row by row"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["name", "brand", "price", "details", "conditions"])
+    sheet.append(["Birkin 30", "Hermès", 15000, "Togo leather", "Like New"])
+    sheet.append([None, None, None, None, None])
+    sheet.append(["Kelly 28", "Hermès", "not a price", "Epsom", "Excellent"])
+    sheet.append(["Peekaboo", "Fendi", 4200, "Selleria", "Good"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    response = client.post(
+        "/api/v1/bags/import-csv",
+        files={"file": ("bags.xlsx", buffer.getvalue(), XLSX_TYPE)},
+        headers=auth_headers_streamer
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_rows"] == 3
+    assert data["successful"] == 2
+    assert len(data["errors"]) == 1 and data["errors"][0].startswith("Row 4: Invalid price value")
+    assert [bag.model for bag in session.exec(select(Bag).order_by(Bag.id)).all()] == ["Birkin 30", "Peekaboo"]
@@ -1,11 +1,17 @@
 """
 Test bags endpoints
 """
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, func, select
 
-from app.models import Account, Bag
+from app.api.routes.bags import parse_import_row
+from app.models import Account, AccountStat, Bag, Feedback, Script, ScriptType
+from app.services.bag_import import bulk_import_bags
+from app.services.default_scripts import materialize_default_script
 
 
 def test_create_bag(client: TestClient, auth_headers_admin: dict):
@@ -33,6 +39,103 @@ def test_create_bag(client: TestClient, auth_headers_admin: dict):
     assert data["price"] == bag_data["price"]
 
 
+def test_new_bag_lists_default_scripts(client: TestClient, session: Session, auth_headers_streamer: dict):
+    """Test a new bag writes no scripts but lists its default scripts"""
+    bag_data = {"name": "Lady Dior", "brand": "Dior", "color": "Black", "condition": "good", "price": 5500}
+    response = client.post("/api/v1/bags", json=bag_data, headers=auth_headers_streamer)
+    assert response.status_code == 200
+    bag_id = response.json()["id"]
+    assert session.exec(select(func.count(Script.id))).one() == 0
+
+    response = client.get(f"/api/v1/bag/{bag_id}/scripts", headers=auth_headers_streamer)
+    assert response.status_code == 200
+    scripts = response.json()
+    assert [script["script_type"] for script in scripts] == ["hook", "look", "story", "value", "cta"]
+    assert all(script["id"] is None and script["is_default"] for script in scripts)
+    assert scripts[0]["content"] == "Check out this amazing Dior Lady Dior!"
+    assert scripts[3]["content"] == "Amazing value at $5500.0 - good condition!"
+
+
+def test_default_scripts_without_bag_fields(client: TestClient, auth_headers_streamer: dict):
+    """Test a bag with empty color and condition still has all five default scripts"""
+    bag_data = {"name": "Speedy", "brand": "Louis Vuitton", "color": "", "condition": ""}
+    response = client.post("/api/v1/bags", json=bag_data, headers=auth_headers_streamer)
+    bag_id = response.json()["id"]
+
+    response = client.get(f"/api/v1/bag/{bag_id}/scripts", headers=auth_headers_streamer)
+    scripts = {script["script_type"]: script["content"] for script in response.json()}
+    assert list(scripts) == ["hook", "look", "story", "value", "cta"]
+    assert scripts["look"] == "Look at this beautiful  color and exquisite craftsmanship!"
+
+    response = client.put(
+        f"/api/v1/bag/{bag_id}/default-scripts/look",
+        json={"content": "Look at the monogram!"},
+        headers=auth_headers_streamer
+    )
+    assert response.status_code == 200
+
+
+def test_default_scripts_saved_once_by_concurrent_uses(session: Session, test_streamer: Account):
+    """Test two devices using a default script at the same time save one set of scripts"""
+    bag = Bag(brand="Dior", model="Saddle", color="Blue", condition="good", account_id=test_streamer.id)
+    session.add(bag)
+    session.commit()
+    both_checking = threading.Barrier(2)
+
+    def use_default_script(_) -> bool:
+        with Session(session.get_bind()) as device_session:
+            device_bag = device_session.get(Bag, bag.id)
+            both_checking.wait()
+            script = materialize_default_script(device_bag, ScriptType.hook, device_session)
+            if script:
+                script.used_count += 1
+                device_session.commit()
+            return script is not None
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert sorted(pool.map(use_default_script, range(2))) == [False, True]
+
+    scripts = session.exec(select(Script).where(Script.bag_id == bag.id)).all()
+    assert len(scripts) == 5
+    assert sum(script.used_count for script in scripts) == 1
+
+
+def test_default_scripts_saved_on_edit(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test editing a default script saves all of the bag's default scripts once"""
+    bag = Bag(
+        brand="Chanel", model="Classic Flap", color="Black", condition="good",
+        details="Caviar leather", account_id=test_streamer.id
+    )
+    session.add(bag)
+    session.commit()
+    session.refresh(bag)
+
+    response = client.put(
+        f"/api/v1/bag/{bag.id}/default-scripts/hook",
+        json={"content": "Ladies, look at this flap!"},
+        headers=auth_headers_streamer
+    )
+    assert response.status_code == 200
+    script_id = response.json()["id"]
+    assert response.json()["content"] == "Ladies, look at this flap!"
+
+    # Now the bag has scripts of its own
+    response = client.post(f"/api/v1/bag/{bag.id}/default-scripts/look/used", headers=auth_headers_streamer)
+    assert response.status_code == 409
+
+    response = client.get(f"/api/v1/bag/{bag.id}/scripts", headers=auth_headers_streamer)
+    scripts = {script["script_type"]: script for script in response.json()}
+    assert len(scripts) == 5
+    assert not any(script["is_default"] for script in scripts.values())
+    assert scripts["hook"]["id"] == script_id
+    assert scripts["look"]["content"] == "Look at these details: Caviar leather..."
+
+
 def test_get_bags(client: TestClient, session: Session, test_admin: Account, auth_headers_admin: dict):
     """Test getting list of bags"""
     # Create test bags
@@ -91,7 +194,7 @@ def test_import_bags_csv(client: TestClient, auth_headers_admin: dict):
     }
     
     response = client.post(
-        "/api/v1/bags/import-csv",
+        "/api/v1/bags/import",
         json=import_data,
         headers=auth_headers_admin
     )
@@ -131,4 +234,148 @@ def test_unauthorized_access(client: TestClient):
     """Test accessing bags without authentication"""
     response = client.get("/api/v1/bags")
     assert response.status_code == 401
-    assert response.json()["detail"] == "Not authenticated" 
\ No newline at end of file
+    assert response.json()["detail"] == "Not authenticated" 
+
+
+def test_get_bags_cursor_pagination(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_admin: dict
+):
+    """Test walking the bag list by cursor while bags are being added"""
+    for i in range(5):
+        session.add(Bag(brand="Dior", model=f"Saddle {i}", color="Blue", condition="good", account_id=test_admin.id))
+    session.commit()
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/api/v1/bags", params=params, headers=auth_headers_admin)
+        assert response.status_code == 200
+        seen.extend(bag["model"] for bag in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        if len(seen) == 2:
+            # A bag added mid-listing lands on a later page without shifting earlier ones
+            session.add(Bag(brand="Dior", model="Saddle new", color="Red", condition="good", account_id=test_admin.id))
+            session.commit()
+        params = {"limit": 2, "cursor": cursor}
+
+    assert seen == [f"Saddle {i}" for i in range(5)] + ["Saddle new"]
+
+
+def test_bag_reads_answer_conditional_gets(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    auth_headers_streamer: dict,
+    auth_headers_admin: dict
+):
+    """Test bag reads return 304 for a current ETag and a new ETag after any write"""
+    bag = Bag(brand="Chanel", model="Boy", color="Black", condition="good", account_id=test_streamer.id)
+    session.add(bag)
+    session.commit()
+
+    url = f"/api/v1/bag/{bag.id}/scripts"
+    response = client.get(url, headers=auth_headers_streamer)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    response = client.get(url, headers={**auth_headers_streamer, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # An edit that moves no stats counter still changes the ETag
+    bag.model = "Boy Bag"
+    session.commit()
+    response = client.get(url, headers={**auth_headers_streamer, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    response = client.get("/api/v1/bags", headers=auth_headers_admin)
+    etag = response.headers["ETag"]
+    assert client.get("/api/v1/bags", headers={**auth_headers_admin, "If-None-Match": etag}).status_code == 304
+    bulk_import_bags(
+        enumerate([{"name": "Speedy", "brand": "Louis Vuitton"}], start=1), parse_import_row, test_streamer.id, session
+    )
+    assert client.get("/api/v1/bags", headers={**auth_headers_admin, "If-None-Match": etag}).status_code == 200
+
+
+def test_get_bags_invalid_cursor(client: TestClient, auth_headers_admin: dict):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/api/v1/bags", params={"cursor": "not-a-cursor"}, headers=auth_headers_admin)
+    assert response.status_code == 400
+
+
+def test_get_bags_stats(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_admin: dict
+):
+    """Test bag statistics and per-bag script totals"""
+    for i in range(20):
+        bag = Bag(brand="Chanel" if i % 2 else "Gucci", model=f"Model {i}", color="Black", condition="good", account_id=test_admin.id)
+        session.add(bag)
+        session.flush()
+        session.add(Script(bag_id=bag.id, content="Hook", script_type=ScriptType.hook, used_count=2, like_count=1))
+        session.add(Script(bag_id=bag.id, content="Buy now", script_type=ScriptType.cta, used_count=1))
+    session.commit()
+
+    response = client.get("/api/v1/bags/stats", headers=auth_headers_admin)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_bags"] == 20
+    assert data["total_scripts"] == 40
+    assert data["brands"] == {"Chanel": 10, "Gucci": 10}
+    assert data["script_types"] == {"hook": 20, "cta": 20}
+    assert data["avg_scripts_per_bag"] == 2
+    assert data["total_usage"] == 60
+    assert data["total_likes"] == 20
+
+    response = client.get(f"/api/v1/bag/{bag.id}", headers=auth_headers_admin)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["script_count"] == 2
+    assert data["total_usage"] == 3
+    assert data["total_likes"] == 1
+
+
+def test_bulk_delete_bags(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_admin: dict
+):
+    """Test deleting bags by filter and id removes their scripts and feedback in bulk"""
+    bags = [
+        Bag(brand=brand, model=f"Model {i}", color="Black", condition="good", price=100, account_id=test_admin.id)
+        for i, brand in enumerate(["Chanel", "Chanel", "Gucci", "Prada"])
+    ]
+    session.add_all(bags)
+    session.commit()
+    for bag in bags:
+        script = Script(bag_id=bag.id, content="Hook", script_type=ScriptType.hook, used_count=1)
+        session.add(script)
+        session.flush()
+        session.add(Feedback(script_id=script.id, rating=1))
+    session.commit()
+    bag_ids = [bag.id for bag in bags]
+
+    response = client.post("/api/v1/bags/bulk-delete", json={"brand": "chanel"}, headers=auth_headers_admin)
+    assert response.status_code == 200
+    assert sorted(response.json()["bag_ids"]) == bag_ids[:2]
+
+    response = client.post("/api/v1/bags/bulk-delete", json={"bag_ids": [bag_ids[2]]}, headers=auth_headers_admin)
+    assert response.json()["deleted_count"] == 1
+
+    response = client.post("/api/v1/bags/bulk-delete", json={}, headers=auth_headers_admin)
+    assert response.status_code == 400
+
+    session.expire_all()
+    assert session.exec(select(Bag.id)).all() == [bag_ids[3]]
+    assert session.exec(select(func.count(Script.id))).one() == 1
+    assert session.exec(select(func.count(Feedback.id))).one() == 1
+    stats = {row.name: (row.item_count, row.used_count, row.total_value) for row in session.exec(select(AccountStat))}
+    assert stats == {"Chanel": (0, 0, 0), "Gucci": (0, 0, 0), "Prada": (1, 0, 100), "hook": (1, 1, 0)}
@@ -0,0 +1,108 @@
+"""
+Test database engine configuration and indexes
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.core.db import create_db_engine
+from app.core.pagination import encode_cursor, keyset_page
+from app.models import Bag, Feedback, PhraseMap, Script
+
+
+def test_sqlite_engine_applies_pragmas(tmp_path):
+    """Test that SQLite connections run in WAL mode with the configured pragmas"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -64000
+    engine.dispose()
+
+
+def query_plan(session: Session, statement) -> str:
+    """SQLite EXPLAIN QUERY PLAN output for a statement, one step per line"""
+    sql = statement.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    rows = session.exec(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+since = datetime(2024, 1, 1)
+until = datetime(2024, 2, 1)
+cursor = encode_cursor(since, 100)
+
+HOT_QUERIES = {
+    # get_bag_scripts / teleprompter scripts frame
+    "scripts_for_bag": (
+        select(Script).where(Script.bag_id == 1),
+        ["ix_script_bag_id_script_type"],
+    ),
+    # Bag list and /match candidates for one account
+    "bags_for_account": (
+        select(Bag).where(Bag.account_id == 1),
+        ["ix_bag_account_id_created_at_id"],
+    ),
+    # Bulk import matching rows to existing bags
+    "bags_by_import_key": (
+        select(Bag.id).where(Bag.account_id == 1, Bag.import_key.in_([1, 2])),
+        ["ix_bag_import_key_account_id"],
+    ),
+    # get_scripts
+    "scripts_for_account": (
+        select(Script).join(Bag).where(Bag.account_id == 1),
+        ["ix_bag_account_id_created_at_id", "ix_script_bag_id_script_type"],
+    ),
+    # get_repetition_analytics feedback window
+    "feedback_window_for_account": (
+        select(Feedback).join(Script).join(Bag).where(
+            Bag.account_id == 1,
+            Feedback.live_event_ts >= since,
+            Feedback.live_event_ts <= until,
+        ),
+        ["ix_bag_account_id_created_at_id", "ix_feedback_script_id_live_event_ts"],
+    ),
+    # GET /feedback?script_id=
+    "feedback_for_script": (
+        select(Feedback).where(Feedback.script_id == 1).order_by(Feedback.live_event_ts.desc()),
+        ["ix_feedback_script_id_live_event_ts"],
+    ),
+    # Analytics dashboard
+    "feedback_created_since": (
+        select(Feedback).where(Feedback.created_at >= since),
+        ["ix_feedback_created_at"],
+    ),
+    # GET /bags, next page for a streamer and for an admin
+    "bag_page_for_account": (
+        keyset_page(select(Bag).where(Bag.account_id == 1), Bag.created_at, Bag.id, cursor, 100),
+        ["ix_bag_account_id_created_at_id"],
+    ),
+    "bag_page": (
+        keyset_page(select(Bag), Bag.created_at, Bag.id, cursor, 100),
+        ["ix_bag_created_at_id"],
+    ),
+    # GET /feedback, next page for an admin
+    "feedback_page": (
+        keyset_page(
+            select(Feedback).join(Script).join(Bag), Feedback.live_event_ts, Feedback.id, cursor, 50, descending=True
+        ),
+        ["ix_feedback_live_event_ts_id"],
+    ),
+    # apply_phrase_map
+    "active_phrase_maps": (
+        select(PhraseMap).where(PhraseMap.account_id == 1, PhraseMap.active == True),
+        ["ix_phrasemap_account_id_active"],
+    ),
+}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_queries_use_indexes(session: Session, name: str):
+    """Test that hot queries search an index instead of scanning the table"""
+    statement, indexes = HOT_QUERIES[name]
+    plan = query_plan(session, statement)
+    for index in indexes:
+        assert index in plan, plan
+    assert "SCAN" not in plan, plan
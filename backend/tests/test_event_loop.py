@@ -0,0 +1,127 @@
+"""
+Test that blocking work stays off the event loop
+"""
+import asyncio
+import statistics
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.routes.match import best_bag_match, bags_for_matching_statement
+from app.core.executors import BoundedExecutor, ExecutorBusyError
+from app.core.security import create_access_token
+from app.models import Account, Bag
+
+
+def measure_pings(websocket, count: int) -> list:
+    """Round-trip times of sequential WebSocket pings, in seconds"""
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        websocket.send_json({"type": "ping"})
+        # Match events for the account may arrive before the pong
+        while websocket.receive_json()["type"] != "pong":
+            pass
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.005)
+    return latencies
+
+
+def test_ping_latency_flat_while_matching(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test that WebSocket pings stay fast while /match runs at full load"""
+    session.add_all([
+        Bag(
+            brand=f"Brand{i % 50}",
+            model=f"Model number {i}",
+            color=f"Color{i % 13}",
+            condition="good",
+            account_id=test_streamer.id
+        )
+        for i in range(6000)
+    ])
+    session.commit()
+
+    # How long one match holds a CPU when run inline
+    bags = session.exec(bags_for_matching_statement(test_streamer.id)).all()
+    started = time.perf_counter()
+    best_bag_match("Hermes Birkin 30 black togo leather", bags)
+    single_match_seconds = time.perf_counter() - started
+
+    token = create_access_token(test_streamer.id)
+    with client.websocket_connect(f"/ws/render?token={token}") as websocket:
+        assert websocket.receive_json()["type"] == "hello"
+        idle = measure_pings(websocket, 20)
+
+        stop = threading.Event()
+        completed = []
+
+        def run_matches():
+            while not stop.is_set():
+                response = client.get(
+                    "/api/v1/match",
+                    params={"title": "Hermes Birkin 30 black togo leather"},
+                    headers=auth_headers_streamer
+                )
+                completed.append(response.status_code)
+
+        workers = [threading.Thread(target=run_matches) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        try:
+            time.sleep(0.2)
+            loaded = measure_pings(websocket, 40)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    assert completed, "matching never ran"
+    assert statistics.median(loaded) < statistics.median(idle) + 0.05
+    # Had matches run on the loop, most pings would wait for a whole match
+    assert statistics.quantiles(loaded, n=10)[-1] < single_match_seconds
+
+
+def test_cancelled_job_keeps_its_executor_slot():
+    """Test that a job's slot is held until its thread finishes, not until its awaiter is cancelled"""
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_job():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    async def run():
+        job = asyncio.create_task(executor.run(blocking_job))
+        await asyncio.to_thread(started.wait, 5)
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+
+        # The worker thread is still busy, so there is no room for another job
+        assert executor.pending == 1
+        with pytest.raises(ExecutorBusyError):
+            await executor.run(blocking_job)
+
+        release.set()
+        for _ in range(100):
+            if executor.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert executor.pending == 0
+        assert await executor.run(blocking_job) == "done"
+
+    try:
+        asyncio.run(run())
+    finally:
+        release.set()
+        executor.shutdown()
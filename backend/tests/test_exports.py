@@ -0,0 +1,81 @@
+"""
+Test streaming exports
+"""
+import csv
+import io
+import json
+
+import pyarrow.parquet as pq
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import Account, Bag, Feedback, Script, ScriptType
+
+
+def add_bags(session: Session, account: Account, count: int) -> list:
+    bags = [
+        Bag(brand="Chanel", model=f"Flap {i}", color="Black", condition="good", price=1000 + i, account_id=account.id)
+        for i in range(count)
+    ]
+    session.add_all(bags)
+    session.commit()
+    return bags
+
+
+def test_export_formats(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    test_admin: Account,
+    auth_headers_streamer: dict,
+    monkeypatch
+):
+    """Test bags export as NDJSON, CSV and Parquet in batches, scoped to the caller's account"""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    bags = add_bags(session, test_streamer, 5)
+    add_bags(session, test_admin, 1)
+
+    response = client.get("/api/v1/exports/bags", headers=auth_headers_streamer)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [bag.id for bag in bags]
+    assert rows[0]["price"] == 1000
+
+    response = client.get("/api/v1/exports/bags", params={"format": "csv"}, headers=auth_headers_streamer)
+    assert response.headers["content-disposition"] == "attachment; filename=bags.csv"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["model"] for row in rows] == [bag.model for bag in bags]
+
+    response = client.get("/api/v1/exports/bags", params={"format": "parquet"}, headers=auth_headers_streamer)
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    assert parquet.metadata.num_rows == 5
+    assert parquet.num_row_groups == 3
+    assert parquet.read().column("model").to_pylist() == [bag.model for bag in bags]
+
+
+def test_export_scripts_and_feedback(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test scripts and feedback exports carry plain values, including empty exports"""
+    [bag] = add_bags(session, test_streamer, 1)
+    script = Script(bag_id=bag.id, content="Say hi", script_type=ScriptType.cta)
+    session.add(script)
+    session.commit()
+
+    response = client.get("/api/v1/exports/scripts", params={"format": "csv"}, headers=auth_headers_streamer)
+    [row] = list(csv.DictReader(io.StringIO(response.text)))
+    assert row["script_type"] == "cta"
+    assert row["bag_id"] == str(bag.id)
+
+    response = client.get("/api/v1/exports/feedback", params={"format": "csv"}, headers=auth_headers_streamer)
+    assert response.text.splitlines() == ["rating,live_event_ts,comment,id,script_id,created_at"]
+
+    session.add(Feedback(script_id=script.id, rating=1, comment="Great"))
+    session.commit()
+    response = client.get("/api/v1/exports/feedback", params={"format": "parquet"}, headers=auth_headers_streamer)
+    assert pq.read_table(io.BytesIO(response.content)).column("comment").to_pylist() == ["Great"]
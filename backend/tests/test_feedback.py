@@ -0,0 +1,134 @@
+"""
+Test feedback and script usage endpoints (async database path)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.security import create_access_token
+from app.models import Account, AccountStat, Bag, Feedback, Script
+from app.services.script_counters import increment_script_counters
+
+
+@pytest.fixture(name="script")
+def script_fixture(session: Session, test_streamer: Account) -> Script:
+    bag = Bag(brand="Gucci", model="Jackie", color="Tan", condition="good", account_id=test_streamer.id)
+    session.add(bag)
+    session.commit()
+    script = Script(content="Look at this Jackie", bag_id=bag.id)
+    session.add(script)
+    session.commit()
+    session.refresh(script)
+    return script
+
+
+def test_submit_feedback(client: TestClient, session: Session, script: Script, auth_headers_streamer: dict):
+    """Test that feedback is stored and updates the script's like count"""
+    response = client.post(
+        "/api/v1/feedback",
+        json={"script_id": script.id, "rating": 1},
+        headers=auth_headers_streamer
+    )
+    assert response.status_code == 200
+    assert response.json()["script_id"] == script.id
+
+    response = client.get("/api/v1/feedback", headers=auth_headers_streamer)
+    assert response.status_code == 200
+    assert [entry["rating"] for entry in response.json()] == [1]
+
+    session.refresh(script)
+    assert script.like_count == 1
+
+
+def test_feedback_cursor_pagination(
+    client: TestClient,
+    session: Session,
+    script: Script,
+    auth_headers_streamer: dict
+):
+    """Test that feedback pages run newest first and don't repeat entries"""
+    started = datetime(2024, 5, 1, 20, 0)
+    session.add_all([
+        Feedback(script_id=script.id, rating=1, comment=f"#{i}", live_event_ts=started + timedelta(minutes=i))
+        for i in range(5)
+    ])
+    # Same timestamp as #4: the id breaks the tie
+    session.add(Feedback(script_id=script.id, rating=-1, comment="#4b", live_event_ts=started + timedelta(minutes=4)))
+    session.commit()
+
+    pages = []
+    params = {"limit": 2, "script_id": script.id}
+    while True:
+        response = client.get("/api/v1/feedback", params=params, headers=auth_headers_streamer)
+        assert response.status_code == 200
+        pages.append([entry["comment"] for entry in response.json()])
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert pages == [["#4b", "#4"], ["#3", "#2"], ["#1", "#0"]]
+
+
+def test_submit_feedback_other_account(
+    client: TestClient,
+    session: Session,
+    script: Script
+):
+    """Test that streamers can't rate another account's scripts"""
+    other = Account(email="other@example.com", name="Other", hashed_password="x", role="streamer")
+    session.add(other)
+    session.commit()
+    session.refresh(other)
+
+    response = client.post(
+        "/api/v1/feedback",
+        json={"script_id": script.id, "rating": 1},
+        headers={"Authorization": f"Bearer {create_access_token(other.id)}"}
+    )
+    assert response.status_code == 404
+
+
+def test_script_usage_recorded(
+    client: TestClient,
+    session: Session,
+    script: Script,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test that script usage is counted over HTTP and over the WebSocket"""
+    response = client.post(f"/api/v1/scripts/{script.id}/used", headers=auth_headers_streamer)
+    assert response.status_code == 200
+    assert response.json()["used_count"] == 1
+
+    token = create_access_token(test_streamer.id)
+    with client.websocket_connect(f"/ws/render?token={token}") as websocket:
+        assert websocket.receive_json()["type"] == "hello"
+        websocket.send_json({"type": "script_used", "data": {"script_id": script.id}})
+        # Handled in order, so the pong means the usage was written
+        websocket.send_json({"type": "ping"})
+        assert websocket.receive_json()["type"] == "pong"
+
+    session.refresh(script)
+    assert script.used_count == 2
+
+
+def test_concurrent_counter_writes_lose_no_increments(session: Session, script: Script, test_streamer: Account):
+    """Test that usage and likes recorded at the same time from several devices all count"""
+    def record(index: int):
+        # Each device writes over its own connection
+        with Session(session.get_bind()) as device_session:
+            used, likes = (1, 0) if index % 2 else (0, 1)
+            assert increment_script_counters(script.id, used, likes, test_streamer.id, device_session)
+            device_session.commit()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(record, range(40)))
+
+    session.refresh(script)
+    assert (script.used_count, script.like_count) == (20, 20)
+    stat = session.get(AccountStat, (test_streamer.id, "script_type", "hook"))
+    session.refresh(stat)
+    assert (stat.used_count, stat.like_count) == (20, 20)
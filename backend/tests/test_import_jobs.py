@@ -0,0 +1,143 @@
+"""
+Test background import jobs
+"""
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models import Account, Bag, ImportJob, ImportJobStatus
+from app.services.import_jobs import job_file_path, run_import_job
+
+CSV_CONTENT = (
+    "name,brand,price,details,conditions\n"
+    "Classic Flap,Chanel,7500,Caviar leather,Excellent\n"
+    ",Hermès,15000,Togo leather,Like New\n"
+    "Lady Dior,Dior,5500,Cannage lambskin,Very Good\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def import_job_dir(tmp_path, monkeypatch):
+    """Keep uploaded files in the test's directory"""
+    monkeypatch.setattr(settings, "IMPORT_JOB_DIR", str(tmp_path / "import_jobs"))
+
+
+@pytest.fixture(name="closed_loop")
+def closed_loop_fixture():
+    """Event loop that progress frames are not published to (jobs run on the test thread)"""
+    loop = asyncio.new_event_loop()
+    loop.close()
+    return loop
+
+
+def save_job(session: Session, account: Account, content: str, **fields) -> ImportJob:
+    job = ImportJob(filename="bags.csv", file_ext="csv", account_id=account.id, **fields)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    os.makedirs(settings.IMPORT_JOB_DIR, exist_ok=True)
+    with open(job_file_path(job), "w") as file:
+        file.write(content)
+    return job
+
+
+def test_import_job_streams_progress(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test an upload returns a job at once and reports progress until it completes"""
+    with client.websocket_connect(f"/ws/render?token={create_access_token(test_streamer.id)}") as websocket:
+        assert websocket.receive_json()["type"] == "hello"
+
+        response = client.post(
+            "/api/v1/import-jobs",
+            headers=auth_headers_streamer,
+            files={"file": ("bags.csv", CSV_CONTENT.encode(), "text/csv")}
+        )
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+
+        statuses = []
+        while not statuses or statuses[-1] not in ("completed", "failed"):
+            message = websocket.receive_json()
+            if message["type"] == "import_progress":
+                assert message["data"]["id"] == job_id
+                statuses.append(message["data"]["status"])
+
+    assert statuses[0] == "running"
+    assert statuses[-1] == "completed"
+
+    session.expire_all()  # The job was created through this session
+    response = client.get(f"/api/v1/import-jobs/{job_id}", headers=auth_headers_streamer)
+    assert response.status_code == 200
+    job = response.json()
+    assert job["rows_processed"] == 3
+    assert job["rows_imported"] == 2
+    assert job["rows_failed"] == 1
+    assert job["errors"][0].startswith("Row 3: ")
+    assert job["finished_at"] is not None
+    assert not os.listdir(settings.IMPORT_JOB_DIR)
+
+    bags = session.exec(select(Bag).where(Bag.account_id == test_streamer.id)).all()
+    assert sorted(bag.model for bag in bags) == ["Classic Flap", "Lady Dior"]
+
+
+def test_import_job_hidden_from_other_accounts(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_streamer: dict
+):
+    """Test streamers can't read another account's import job"""
+    job = save_job(session, test_admin, CSV_CONTENT, status=ImportJobStatus.completed)
+
+    response = client.get(f"/api/v1/import-jobs/{job.id}", headers=auth_headers_streamer)
+    assert response.status_code == 404
+
+
+def test_interrupted_import_job_resumes(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    closed_loop
+):
+    """Test a job picks up after the rows committed before it was interrupted"""
+    job = save_job(
+        session, test_streamer, CSV_CONTENT,
+        status=ImportJobStatus.running, rows_processed=2, rows_imported=1, rows_failed=1,
+        errors=["Row 3: Name is required"]
+    )
+
+    run_import_job(job.id, session.get_bind(), closed_loop)
+
+    session.refresh(job)
+    assert job.status == ImportJobStatus.completed
+    assert job.rows_processed == 3
+    assert job.rows_imported == 2
+    assert job.errors == ["Row 3: Name is required"]
+    bags = session.exec(select(Bag)).all()
+    assert [bag.model for bag in bags] == ["Lady Dior"]
+
+
+def test_import_job_without_file_fails(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    closed_loop
+):
+    """Test a job whose upload is gone fails instead of staying pending"""
+    job = save_job(session, test_streamer, CSV_CONTENT)
+    os.remove(job_file_path(job))
+
+    run_import_job(job.id, session.get_bind(), closed_loop)
+
+    session.refresh(job)
+    assert job.status == ImportJobStatus.failed
+    assert job.error == "Uploaded file is no longer available"
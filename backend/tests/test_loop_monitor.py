@@ -0,0 +1,46 @@
+"""
+Test event loop lag monitoring
+"""
+import asyncio
+import logging
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.loop_monitor import LoopLagMonitor
+
+
+def blocking_handler():
+    """Stands in for a callback that blocks the loop"""
+    time.sleep(0.3)
+
+
+def test_blocked_loop_logs_offending_stack(caplog):
+    """Test that a blocked loop is counted and the blocking call is logged"""
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.1, window=100, stack_log_cooldown=0)
+
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_handler()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+        asyncio.run(run())
+
+    assert monitor.stalls == 1
+    assert monitor.max_lag >= 0.2
+    assert monitor.percentiles()["max"] == monitor.max_lag
+    assert any("blocking_handler" in record.getMessage() for record in caplog.records)
+
+
+def test_metrics_endpoint(client: TestClient):
+    """Test that /metrics exposes loop lag and connection gauges"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'event_loop_lag_seconds{quantile="0.99"}' in response.text
+    assert "event_loop_stalls_total" in response.text
+    assert "websocket_connections" in response.text
+    assert 'executor_pending_jobs{executor="match"}' in response.text
@@ -0,0 +1,56 @@
+"""
+Test per-request SQL query counting
+"""
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.query_stats import track_queries
+from app.models import Account, Bag, PhraseMap, Script
+
+
+def test_query_count_headers(client: TestClient, auth_headers_admin: dict):
+    """Test that local responses report SQL statements and DB time"""
+    response = client.get("/api/v1/bags", headers=auth_headers_admin)
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Query-Count"]) >= 2  # account lookup + bags
+    assert float(response.headers["X-DB-Query-Time-Ms"]) >= 0
+
+    metrics = client.get("/metrics").text
+    assert 'db_queries_total{route="GET /api/v1/bags"}' in metrics
+
+
+def test_repeated_statement_detected(session: Session, test_streamer: Account):
+    """Test that a statement run once per item is reported as repeated"""
+    with track_queries() as stats:
+        for _ in range(12):
+            session.exec(select(Bag).where(Bag.account_id == test_streamer.id)).all()
+
+    assert stats.count == 12
+    [(statement, executions)] = stats.repeated_statements(10)
+    assert executions == 12
+    assert "FROM bag" in statement
+
+
+def test_phrase_map_rescan_query_budget(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_admin: dict,
+    query_budget
+):
+    """Test that rescanning phrase maps doesn't re-query the rules per script"""
+    session.add(PhraseMap(find_phrase="purse", replace_phrase="bag", account_id=test_admin.id))
+    bag = Bag(brand="Prada", model="Galleria", color="Black", condition="good", account_id=test_admin.id)
+    session.add(bag)
+    session.commit()
+    session.add_all([
+        Script(content=f"Grab this purse now! #{i}", bag_id=bag.id) for i in range(25)
+    ])
+    session.commit()
+
+    # Account, scripts, rules, the batched UPDATE and the account revision bump
+    with query_budget(5):
+        response = client.post("/api/v1/phrase-map/rescan", headers=auth_headers_admin)
+
+    assert response.status_code == 200
+    assert response.json()["result"]["updated_scripts"] == 25
@@ -0,0 +1,44 @@
+"""
+Test script listing
+"""
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Account, Bag, Script, ScriptType
+
+
+def test_get_scripts_projection(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_admin: dict,
+    query_budget
+):
+    """Test the script listing is served by one query, with optional sparse fields"""
+    bag = Bag(brand="Gucci", model="Marmont", color="Red", condition="good", account_id=test_admin.id)
+    session.add(bag)
+    session.commit()
+    session.add_all([
+        Script(bag_id=bag.id, content="x" * 30, script_type=ScriptType.value, like_count=11, used_count=2),
+        Script(bag_id=bag.id, content="Hello", script_type=ScriptType.hook),
+    ])
+    session.commit()
+
+    # Account lookup, ETag revision and the listing itself
+    with query_budget(3):
+        response = client.get("/api/v1/scripts", headers=auth_headers_admin)
+    first = response.json()[0]
+    assert first["title"] == "Gucci Marmont - value"
+    assert first["category"] == "pricing"
+    assert first["tags"] == ["Gucci", "Red", "value"]
+    assert first["is_favorite"] is True
+    assert first["estimated_duration"] == 10
+    assert first["usage_count"] == 2
+
+    response = client.get(
+        "/api/v1/scripts", params={"fields": "title,tags", "category": "opening"}, headers=auth_headers_admin
+    )
+    assert response.json() == [{"title": "Gucci Marmont - hook", "tags": ["Gucci", "Red", "hook"]}]
+
+    response = client.get("/api/v1/scripts", params={"fields": "title,bag"}, headers=auth_headers_admin)
+    assert response.status_code == 400
@@ -0,0 +1,71 @@
+"""
+Test full-text search
+"""
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.routes.bags import parse_import_row
+from app.models import Account, Bag, Script
+from app.services.bag_import import bulk_import_bags
+from app.services.bag_delete import delete_bags
+from app.services.search import search
+
+
+def add_bag(session: Session, account: Account, **fields) -> Bag:
+    bag = Bag(color="Black", condition="good", account_id=account.id, **fields)
+    session.add(bag)
+    session.commit()
+    session.refresh(bag)
+    return bag
+
+
+def test_search_ranks_bags_and_scripts(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    test_admin: Account,
+    auth_headers_streamer: dict,
+    auth_headers_admin: dict
+):
+    """Test search matches word prefixes across bags and scripts, scoped to the caller's account"""
+    kelly = add_bag(session, test_streamer, brand="Hermès", model="Kelly 28", details="Epsom leather")
+    flap = add_bag(session, test_streamer, brand="Chanel", model="Classic Flap")
+    add_bag(session, test_admin, brand="Hermès", model="Birkin 30")
+    session.add(Script(bag_id=flap.id, content="A classic to rival any Hermes Kelly"))
+    session.commit()
+
+    response = client.get("/api/v1/search", params={"q": "herm kel"}, headers=auth_headers_streamer)
+    assert response.status_code == 200
+    results = response.json()
+    assert [(result["type"], result["bag_id"]) for result in results] == [("bag", kelly.id), ("script", flap.id)]
+    assert results[0]["title"] == "Hermès Kelly 28"
+
+    response = client.get("/api/v1/search", params={"q": "herm", "limit": 1}, headers=auth_headers_streamer)
+    assert len(response.json()) == 1
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/api/v1/search", params={"q": "herm", "limit": 1, "cursor": cursor}, headers=auth_headers_streamer
+    )
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/v1/bags", params={"q": "epsom"}, headers=auth_headers_admin)
+    assert [bag["id"] for bag in response.json()] == [kelly.id]
+
+
+def test_search_index_follows_bulk_writes(session: Session, test_streamer: Account):
+    """Test bulk-imported, edited and bulk-deleted bags are reflected in search"""
+    bulk_import_bags(
+        enumerate([{"name": "Lady Dior", "brand": "Dior", "details": "Cannage lambskin"}], start=1),
+        parse_import_row, test_streamer.id, session
+    )
+    [result] = search("cannage", None, 0, 10, session)
+
+    bag = session.get(Bag, result["id"])
+    bag.details = "Patent leather"
+    session.commit()
+    assert search("cannage", None, 0, 10, session) == []
+    assert len(search("patent", None, 0, 10, session)) == 1
+
+    delete_bags([Bag.id == bag.id], session)
+    assert search("patent", None, 0, 10, session) == []
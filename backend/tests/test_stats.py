@@ -0,0 +1,142 @@
+"""
+Test the per-account stats rollup
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.models import Account, AccountStat, Bag, Script, ScriptType
+from app.services.bag_delete import delete_bags
+from app.services.script_counters import increment_script_counters
+from app.services.stats import rebuild_account_stats
+
+
+def rollup(session: Session) -> dict:
+    session.expire_all()
+    return {
+        (row.account_id, row.dimension, row.name): (row.item_count, row.used_count, row.like_count, row.total_value)
+        for row in session.exec(select(AccountStat)).all()
+        if row.item_count
+    }
+
+
+def test_write_paths_keep_rollup_current(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test that the rollup matches a rebuild after bag, script, usage, like and feedback writes"""
+    bags = [
+        Bag(brand="Gucci", model="Jackie", color="Tan", condition="good", price=1200, account_id=test_streamer.id),
+        Bag(brand="Gucci", model="Dionysus", color="Black", condition="good", price=1800, account_id=test_streamer.id),
+        Bag(brand="Prada", model="Galleria", color="Black", condition="fair", account_id=test_streamer.id),
+    ]
+    session.add_all(bags)
+    session.commit()
+    scripts = [Script(content=f"Script {i}", bag_id=bag.id) for i, bag in enumerate(bags)]
+    scripts.append(Script(content="Buy now", script_type=ScriptType.cta, bag_id=bags[0].id))
+    session.add_all(scripts)
+    session.commit()
+
+    assert client.post(f"/api/v1/scripts/{scripts[0].id}/used", headers=auth_headers_streamer).status_code == 200
+    response = client.post(
+        "/api/v1/feedback", json={"script_id": scripts[3].id, "rating": 1}, headers=auth_headers_streamer
+    )
+    assert response.status_code == 200
+    response = client.post(f"/api/v1/scripts/{scripts[3].id}/like", headers=auth_headers_streamer)
+    assert response.json()["like_count"] == 15
+    response = client.post(
+        "/api/v1/feedback", json={"script_id": scripts[0].id, "rating": -1}, headers=auth_headers_streamer
+    )
+    assert response.status_code == 200
+
+    bags[1].brand = "Prada"
+    bags[1].price = 2000
+    scripts[2].script_type = ScriptType.story
+    session.delete(scripts[1])
+    session.commit()
+    session.delete(bags[1])
+    session.commit()
+
+    incremental = rollup(session)
+    assert incremental[(test_streamer.id, "brand", "Gucci")] == (1, 0, 0, 1200)
+    assert incremental[(test_streamer.id, "brand", "Prada")] == (1, 0, 0, 0)
+    assert incremental[(test_streamer.id, "script_type", "hook")] == (1, 1, 0, 0)
+    assert incremental[(test_streamer.id, "script_type", "cta")] == (1, 0, 15, 0)
+
+    rebuild_account_stats(session)
+    assert rollup(session) == incremental
+
+
+def test_rolled_back_writes_leave_rollup_unchanged(session: Session, test_streamer: Account):
+    """Test that deltas of a rolled-back transaction are discarded"""
+    session.add(Bag(brand="Celine", model="Luggage", color="Grey", condition="good", account_id=test_streamer.id))
+    session.flush()
+    session.rollback()
+    session.add(Bag(brand="Loewe", model="Puzzle", color="Tan", condition="good", account_id=test_streamer.id))
+    session.commit()
+
+    assert rollup(session) == {(test_streamer.id, "brand", "Loewe"): (1, 0, 0, 0)}
+
+
+def test_bags_stats_reads_rollup(
+    client: TestClient,
+    session: Session,
+    test_admin: Account,
+    auth_headers_admin: dict,
+    query_budget
+):
+    """Test that /bags/stats is one rollup read however many bags exist"""
+    session.add_all(
+        Bag(brand="Fendi", model=f"Baguette {i}", color="Pink", condition="good", account_id=test_admin.id)
+        for i in range(50)
+    )
+    session.commit()
+
+    # Account lookup and the rollup read
+    with query_budget(2):
+        response = client.get("/api/v1/bags/stats", headers=auth_headers_admin)
+    assert response.status_code == 200
+    assert response.json()["brands"] == {"Fendi": 50}
+
+
+def test_bag_delete_waits_for_concurrent_usage(session: Session, test_streamer: Account):
+    """Test that a use recorded while bags are being deleted doesn't leave the rollup behind"""
+    bag = Bag(brand="Gucci", model="Jackie", color="Tan", condition="good", account_id=test_streamer.id)
+    session.add(bag)
+    session.commit()
+    script = Script(content="Look at this Jackie", bag_id=bag.id)
+    session.add(script)
+    session.commit()
+    engine = session.get_bind()
+
+    def record_use():
+        with Session(engine) as device_session:
+            increment_script_counters(script.id, 1, 0, None, device_session)
+            device_session.commit()
+
+    device = ThreadPoolExecutor(max_workers=1)
+    usage = []
+
+    def use_before_delete(connection, cursor, statement, parameters, context, executemany):
+        # A device records a use between the rollup aggregates and the DELETE
+        if not usage and statement.startswith("DELETE FROM bag"):
+            usage.append(device.submit(record_use))
+            wait(usage, timeout=0.5)
+
+    event.listen(engine, "before_cursor_execute", use_before_delete)
+    try:
+        delete_bags([Bag.id == bag.id], session)
+    finally:
+        event.remove(engine, "before_cursor_execute", use_before_delete)
+    usage[0].result()
+    device.shutdown()
+
+    session.expire_all()
+    assert [
+        (row.item_count, row.used_count) for row in session.exec(select(AccountStat)).all()
+        if row.dimension == "script_type"
+    ] == [(0, 0)]
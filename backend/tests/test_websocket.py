@@ -0,0 +1,184 @@
+"""
+Test WebSocket channel routing
+"""
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from sqlmodel import Session, select
+
+from app.core.security import create_access_token
+from app.models import Account, Bag, Script
+from app.services.websocket_manager import ConnectionManager, account_channel, bag_channel
+
+
+def test_websocket_requires_token(client: TestClient):
+    """Test that unauthenticated WebSocket connections are rejected"""
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/ws/render") as websocket:
+            websocket.receive_json()
+
+
+def test_missing_product_alert_scoped_to_account(
+    client: TestClient,
+    test_admin: Account,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test that missing product alerts only reach the caller's devices"""
+    admin_token = create_access_token(test_admin.id)
+    streamer_token = create_access_token(test_streamer.id)
+
+    with client.websocket_connect(f"/ws/render?token={admin_token}") as admin_ws, \
+            client.websocket_connect(f"/ws/render?token={streamer_token}") as streamer_ws:
+        assert admin_ws.receive_json()["type"] == "hello"
+        assert streamer_ws.receive_json()["type"] == "hello"
+
+        response = client.get(
+            "/api/v1/match",
+            params={"title": "Unknown Product"},
+            headers=auth_headers_streamer
+        )
+        assert response.status_code == 404
+
+        message = streamer_ws.receive_json()
+        assert message["type"] == "missing_product"
+        assert message["data"]["title"] == "Unknown Product"
+
+        # The admin's next frame is its own pong, not the streamer's alert
+        admin_ws.send_json({"type": "ping"})
+        assert admin_ws.receive_json()["type"] == "pong"
+
+
+def test_switch_routed_to_room(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test that room-tagged switch commands only reach devices in that room"""
+    bag = Bag(
+        brand="Chanel",
+        model="Classic Flap",
+        color="Black",
+        condition="good",
+        account_id=test_streamer.id
+    )
+    session.add(bag)
+    session.commit()
+    session.refresh(bag)
+
+    token = create_access_token(test_streamer.id)
+
+    with client.websocket_connect(f"/ws/render?token={token}&room=live-1") as room_ws, \
+            client.websocket_connect(f"/ws/render?token={token}&room=live-2") as other_ws:
+        assert room_ws.receive_json()["type"] == "hello"
+        assert other_ws.receive_json()["type"] == "hello"
+
+        response = client.get(
+            "/api/v1/match",
+            params={"title": "Chanel Classic Flap", "room": "live-1"},
+            headers=auth_headers_streamer
+        )
+        assert response.status_code == 200
+
+        message = room_ws.receive_json()
+        assert message["type"] == "switch"
+        assert message["data"]["bag_id"] == bag.id
+
+        other_ws.send_json({"type": "ping"})
+        assert other_ws.receive_json()["type"] == "pong"
+
+
+def test_default_scripts_streamed_and_saved_on_use(
+    client: TestClient,
+    session: Session,
+    test_streamer: Account
+):
+    """Test a bag without scripts streams its default scripts and saves them when one is used"""
+    bag = Bag(brand="Dior", model="Saddle", color="Blue", condition="good", price=3200, account_id=test_streamer.id)
+    session.add(bag)
+    session.commit()
+    session.refresh(bag)
+
+    token = create_access_token(test_streamer.id)
+    with client.websocket_connect(f"/ws/render?token={token}") as websocket:
+        assert websocket.receive_json()["type"] == "hello"
+        websocket.send_json({"type": "subscribe", "data": {"bag_id": bag.id}})
+
+        message = websocket.receive_json()
+        assert message["type"] == "scripts"
+        [block] = message["data"]["scripts"]
+        assert block["hook"] == "Check out this amazing Dior Saddle!"
+        assert block["value"] == "Amazing value at $3200.0 - good condition!"
+
+        websocket.send_json({"type": "script_used", "data": {"bag_id": bag.id, "script_type": "value"}})
+        websocket.send_json({"type": "ping"})
+        assert websocket.receive_json()["type"] == "pong"
+
+    scripts = session.exec(select(Script).where(Script.bag_id == bag.id)).all()
+    assert {script.script_type.value: script.used_count for script in scripts} == {
+        "hook": 0, "look": 0, "story": 0, "value": 1, "cta": 0
+    }
+
+
+def test_resume_replays_missed_frames(
+    client: TestClient,
+    test_streamer: Account,
+    auth_headers_streamer: dict
+):
+    """Test that a reconnecting client only receives the frames it missed"""
+    token = create_access_token(test_streamer.id)
+    channel = account_channel(test_streamer.id)
+
+    with client.websocket_connect(f"/ws/render?token={token}") as websocket:
+        hello = websocket.receive_json()
+        epoch = hello["data"]["epoch"]
+        last_seq = hello["data"]["channels"][channel]
+
+    # Alerts raised while the teleprompter is offline
+    for title in ["Missed One", "Missed Two"]:
+        client.get("/api/v1/match", params={"title": title}, headers=auth_headers_streamer)
+
+    with client.websocket_connect(f"/ws/render?token={token}") as websocket:
+        assert websocket.receive_json()["type"] == "hello"
+        websocket.send_json({
+            "type": "resume",
+            "data": {"epoch": epoch, "channels": {channel: last_seq}}
+        })
+
+        first = websocket.receive_json()
+        second = websocket.receive_json()
+        assert [first["data"]["title"], second["data"]["title"]] == ["Missed One", "Missed Two"]
+        assert [first["seq"], second["seq"]] == [last_seq + 1, last_seq + 2]
+
+
+def test_replay_falls_back_to_snapshot():
+    """Test that clients outside the replay buffer get a snapshot instead"""
+    manager = ConnectionManager(replay_buffer_size=2)
+    for bag_id in range(1, 5):
+        manager.record_frame({"type": "switch", "data": {"bag_id": bag_id}}, "account:1")
+
+    assert [frame["seq"] for frame in manager.frames_since("account:1", 2, manager.epoch)] == [3, 4]
+    assert manager.frames_since("account:1", 1, manager.epoch) is None
+    assert manager.frames_since("account:1", 4, "previous-epoch") is None
+
+    snapshot = manager.snapshot_frame("account:1")
+    assert snapshot["seq"] == 4
+    assert [frame["data"]["bag_id"] for frame in snapshot["data"]["frames"]] == [4]
+
+
+def test_forget_bags_drops_their_state():
+    """Test that deleted bags leave no channel state or switch snapshot behind"""
+    manager = ConnectionManager()
+    manager.join("device", bag_channel(7))
+    manager.record_frame({"type": "scripts", "data": {"bag_id": 7}}, bag_channel(7))
+    manager.record_frame({"type": "switch", "data": {"bag_id": 7}}, "account:1")
+    manager.record_frame({"type": "switch", "data": {"bag_id": 8}}, "account:2")
+
+    manager.forget_bags([7])
+
+    assert bag_channel(7) not in manager.channels
+    assert manager.connection_channels["device"] == set()
+    assert manager.frames_since(bag_channel(7), 0, manager.epoch) == []
+    assert manager.snapshot_frame("account:1")["data"]["frames"] == []
+    assert len(manager.snapshot_frame("account:2")["data"]["frames"]) == 1
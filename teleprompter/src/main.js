@@ -229,11 +229,19 @@ ipcMain.handle('get-overlay-status', () => {
 // New IPC handlers for WebSocket configuration
 ipcMain.handle('get-ws-config', () => {
   const host = store.get('wsHost', 'localhost:8000');
-  return { host };
+  const token = store.get('wsToken', '');
+  const room = store.get('wsRoom', '');
+  return { host, token, room };
 });
 
 ipcMain.handle('set-ws-config', (event, config) => {
   store.set('wsHost', config.host);
+  if (config.token !== undefined) {
+    store.set('wsToken', config.token);
+  }
+  if (config.room !== undefined) {
+    store.set('wsRoom', config.room);
+  }
   return true;
 });
 
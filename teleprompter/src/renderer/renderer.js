@@ -11,6 +11,10 @@ let isAutoScrolling = false;
 let autoScrollInterval = null;
 let isOverlayMode = false;
 let wsHost = 'localhost:8000'; // Default WebSocket host
+let wsToken = ''; // Access token binding the connection to an account
+let wsRoom = ''; // Optional live room to receive room-scoped events
+let serverEpoch = null; // Server epoch the sequence numbers below belong to
+let channelSeqs = {}; // Last sequence number seen per channel, for resuming
 
 // Script block types in order
 const blockTypes = ['hook', 'look', 'story', 'value', 'cta'];
@@ -47,6 +51,8 @@ async function loadSettings() {
         // Use secure preload script to access settings
         const wsConfig = await window.electronAPI.getWSConfig();
         wsHost = wsConfig.host || 'localhost:8000';
+        wsToken = wsConfig.token || '';
+        wsRoom = wsConfig.room || '';
         
         const savedBagId = await window.electronAPI.getStoreValue('lastBagId');
         
@@ -67,8 +73,12 @@ function connectWebSocket() {
     }
     
     // Use configurable WebSocket host
-    const wsUrl = `ws://${wsHost}/ws/render`;
-    console.log(`Connecting to WebSocket: ${wsUrl}`);
+    const params = new URLSearchParams({ token: wsToken });
+    if (wsRoom) {
+        params.set('room', wsRoom);
+    }
+    const wsUrl = `ws://${wsHost}/ws/render?${params.toString()}`;
+    console.log(`Connecting to WebSocket: ws://${wsHost}/ws/render`);
     
     try {
         // Use built-in WebSocket API instead of requiring ws module
@@ -77,11 +87,7 @@ function connectWebSocket() {
         websocket.onopen = () => {
             console.log('WebSocket connected');
             updateConnectionStatus(true);
-            
-            // Subscribe to current bag if we have one
-            if (currentBagId) {
-                subscribe(currentBagId);
-            }
+            // Subscribing or resuming happens once the server says hello
         };
         
         websocket.onmessage = (event) => {
@@ -117,7 +123,17 @@ function connectWebSocket() {
 function handleWebSocketMessage(message) {
     console.log('WebSocket message received:', message);
     
+    if (message.channel && typeof message.seq === 'number') {
+        channelSeqs[message.channel] = message.seq;
+    }
+    
     switch (message.type) {
+        case 'hello':
+            handleHelloMessage(message.data);
+            break;
+        case 'snapshot':
+            handleSnapshotMessage(message);
+            break;
         case 'scripts':
             handleScriptsMessage(message.data);
             break;
@@ -135,6 +151,38 @@ function handleWebSocketMessage(message) {
     }
 }
 
+function handleHelloMessage(data) {
+    const hasHistory = serverEpoch !== null && Object.keys(channelSeqs).length > 0;
+    
+    if (hasHistory) {
+        // Reconnect: ask only for the frames missed while offline
+        const message = {
+            type: 'resume',
+            data: { epoch: serverEpoch, channels: channelSeqs }
+        };
+        websocket.send(JSON.stringify(message));
+        console.log('Resuming channels:', channelSeqs);
+    } else if (currentBagId) {
+        // First connection: subscribe to the last bag we showed
+        subscribe(currentBagId);
+    }
+    
+    serverEpoch = data.epoch;
+    for (const [channel, seq] of Object.entries(data.channels || {})) {
+        if (!(channel in channelSeqs)) {
+            channelSeqs[channel] = seq;
+        }
+    }
+}
+
+function handleSnapshotMessage(message) {
+    // Fell outside the replay buffer: apply the latest frame of each type
+    for (const frame of message.data.frames || []) {
+        handleWebSocketMessage(frame);
+    }
+    channelSeqs[message.channel] = message.seq;
+}
+
 function handleScriptsMessage(data) {
     currentBagId = data.bag_id;
     scripts = data.scripts || [];
@@ -327,12 +375,25 @@ function updateOverlayUI() {
 async function openSettings() {
     const currentConfig = await window.electronAPI.getWSConfig();
     const newHost = prompt('Enter WebSocket host (host:port):', currentConfig.host);
+    if (newHost === null) {
+        return;
+    }
+    const newToken = prompt('Enter access token:', currentConfig.token || '');
+    const newRoom = prompt('Enter live room ID (optional):', currentConfig.room || '');
+    
+    const config = {
+        host: newHost || currentConfig.host,
+        token: newToken === null ? currentConfig.token : newToken,
+        room: newRoom === null ? currentConfig.room : newRoom
+    };
     
-    if (newHost && newHost !== currentConfig.host) {
-        await window.electronAPI.setWSConfig({ host: newHost });
-        wsHost = newHost;
+    if (config.host !== currentConfig.host || config.token !== currentConfig.token || config.room !== currentConfig.room) {
+        await window.electronAPI.setWSConfig(config);
+        wsHost = config.host;
+        wsToken = config.token;
+        wsRoom = config.room;
         
-        // Reconnect to new host
+        // Reconnect with new settings
         connectWebSocket();
     }
 }